@@ -1,5 +1,6 @@
 from rest_framework import serializers
 from django.contrib.auth import get_user_model
+from django.core.exceptions import FieldDoesNotExist
 from django.contrib.auth.password_validation import validate_password
 from .models import Organization
 
@@ -18,6 +19,42 @@ class OrganizationSerializer(serializers.ModelSerializer):
         read_only_fields = ['id', 'slug', 'created_at', 'updated_at']
 
 
+class UserIdentityMap:
+    """
+    Request-scoped registry of users.
+    
+    Each user is loaded at most once (with its organization) and serialized
+    at most once per response, however many rows reference it. Put one in
+    the serializer context as 'user_identity_map' and prime it with every
+    referenced id before serializing.
+    """
+    
+    def __init__(self):
+        self._users = {}
+        self._representations = {}
+    
+    def prime(self, user_ids):
+        missing = {pk for pk in user_ids if pk is not None and pk not in self._users}
+        if not missing:
+            return
+        for user in User.objects.select_related('organization').filter(pk__in=missing):
+            self._users[user.pk] = user
+        for pk in missing - set(self._users):
+            self._users[pk] = None
+    
+    def get(self, pk):
+        if pk is None:
+            return None
+        if pk not in self._users:
+            self.prime([pk])
+        return self._users[pk]
+    
+    def representation(self, key, build):
+        if key not in self._representations:
+            self._representations[key] = build()
+        return self._representations[key]
+
+
 class UserSerializer(serializers.ModelSerializer):
     organization_details = OrganizationSerializer(source='organization', read_only=True)
     full_name = serializers.CharField(source='get_full_name', read_only=True)
@@ -30,6 +67,27 @@ class UserSerializer(serializers.ModelSerializer):
             'is_verified', 'is_active', 'created_at', 'updated_at'
         ]
         read_only_fields = ['id', 'created_at', 'updated_at']
+    
+    def get_attribute(self, instance):
+        # Resolve foreign keys through the identity map instead of loading the user per row
+        identity_map = self.context.get('user_identity_map')
+        if identity_map is not None and len(self.source_attrs) == 1 and hasattr(instance, '_meta'):
+            try:
+                field = instance._meta.get_field(self.source_attrs[0])
+            except FieldDoesNotExist:
+                field = None
+            if field is not None and field.many_to_one:
+                return identity_map.get(getattr(instance, field.attname))
+        return super().get_attribute(instance)
+    
+    def to_representation(self, instance):
+        identity_map = self.context.get('user_identity_map')
+        if identity_map is None:
+            return super().to_representation(instance)
+        user = identity_map.get(instance.pk) or instance
+        return identity_map.representation(
+            (type(self), instance.pk), lambda: super(UserSerializer, self).to_representation(user)
+        )
 
 
 class UserCreateSerializer(serializers.ModelSerializer):
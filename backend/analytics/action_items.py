@@ -0,0 +1,96 @@
+"""
+Incremental maintenance of the ActionItem work queue.
+
+An application has at most one open action item, determined by its stage.
+Items carry a due_at timestamp, so applications "age into" the queue
+without any periodic job: the endpoint simply reads items that are due.
+"""
+from datetime import timedelta
+from django.db import transaction
+from candidates.models import JobApplication
+from .models import ActionItem
+
+# stage -> (item_type, title, action, priority, age before the item is due)
+ACTION_RULES = {
+    'applied': ('schedule', 'Schedule Phone Screen', 'Schedule', 2, timedelta(days=1)),
+    'screening': ('schedule', 'Schedule Technical Interview', 'Schedule', 2, timedelta(days=1)),
+    'technical': ('feedback', 'Feedback overdue', 'Submit', 1, timedelta(days=2)),
+    'onsite': ('feedback', 'Feedback overdue', 'Submit', 1, timedelta(days=2)),
+    'final': ('feedback', 'Feedback overdue', 'Submit', 1, timedelta(days=2)),
+    'offer': ('offer', 'Offer expires soon', 'Follow Up', 0, timedelta(days=5)),
+}
+
+ITEM_FIELDS = [
+    'organization_id', 'job_id', 'item_type', 'priority', 'title', 'action',
+    'candidate_name', 'job_title', 'stage_entered_at', 'due_at',
+]
+
+
+def build_item(application):
+    """Return an unsaved ActionItem for the application, or None if nothing is pending"""
+    rule = ACTION_RULES.get(application.stage)
+    if rule is None or application.status != 'active':
+        return None
+
+    item_type, title, action, priority, age = rule
+    return ActionItem(
+        organization_id=application.job.organization_id,
+        application_id=application.id,
+        job_id=application.job_id,
+        item_type=item_type,
+        priority=priority,
+        title=title,
+        action=action,
+        candidate_name=application.candidate.full_name,
+        job_title=application.job.title,
+        stage_entered_at=application.stage_updated_at,
+        due_at=application.stage_updated_at + age,
+    )
+
+
+def sync_application(application_id):
+    """Create, update or remove the action item for one application"""
+    application = JobApplication.objects.select_related('candidate', 'job').filter(pk=application_id).first()
+    item = build_item(application) if application else None
+    if item is None:
+        ActionItem.objects.filter(application_id=application_id).delete()
+        return None
+
+    ActionItem.objects.update_or_create(
+        application_id=application_id,
+        defaults={field: getattr(item, field) for field in ITEM_FIELDS},
+    )
+    return item
+
+
+def rebuild_action_items(applications=None, batch_size=1000):
+    """Recompute the queue for a set of applications (all by default) in bulk"""
+    if applications is None:
+        applications = JobApplication.objects.all()
+
+    created = 0
+    with transaction.atomic():
+        ActionItem.objects.filter(application__in=applications).delete()
+        batch = []
+        for application in applications.select_related('candidate', 'job').iterator(chunk_size=batch_size):
+            item = build_item(application)
+            if item is not None:
+                batch.append(item)
+            if len(batch) >= batch_size:
+                created += len(ActionItem.objects.bulk_create(batch))
+                batch = []
+        created += len(ActionItem.objects.bulk_create(batch))
+    return created
+
+
+def serialize_item(item):
+    return {
+        'id': f"{item.item_type}-{item.application_id}",
+        'type': item.item_type,
+        'title': item.title,
+        'candidate': item.candidate_name,
+        'job': item.job_title,
+        'action': item.action,
+        'priority': item.get_priority_display(),
+        'created_at': item.stage_entered_at.isoformat(),
+    }
@@ -0,0 +1,91 @@
+"""
+Aggregate queries shared by the analytics endpoints.
+
+Every helper here answers its question with a fixed number of SQL
+statements, independent of how many rows the organization has.
+"""
+from datetime import timedelta
+from django.db.models import Avg, Count, DurationField, ExpressionWrapper, F, Q
+from django.utils import timezone
+from jobs.models import JobStageCount
+from jobs.pipelines import DEFAULT_PIPELINE, pipeline_for
+
+# Interview statuses that should not count towards the day's schedule
+INACTIVE_INTERVIEW_STATUSES = ['cancelled', 'no_show', 'rescheduled']
+
+
+def duration_days(value):
+    """Convert an aggregated duration (timedelta or None) to fractional days"""
+    if not value:
+        return 0
+    if isinstance(value, timedelta):
+        return value.total_seconds() / 86400
+    # Some backends hand back raw microseconds for duration aggregates
+    return float(value) / 86400 / 1_000_000
+
+
+def application_summary(applications, today=None, stages=DEFAULT_PIPELINE.funnel):
+    """
+    Summarize a JobApplication queryset in a single conditional-aggregation query.
+
+    Returns a dict with the histogram over `stages` (the funnel of the
+    pipelines involved, see jobs.pipelines.funnel_for), distinct candidate count,
+    applications received today and the average time to fill (days from the
+    job being posted to the hire).
+    """
+    today = today or timezone.localdate()
+
+    aggregates = {
+        f'stage_{stage}': Count('id', filter=Q(stage=stage))
+        for stage in stages
+    }
+    aggregates['total_candidates'] = Count('candidate', distinct=True)
+    aggregates['new_applications'] = Count('id', filter=Q(applied_at__date=today))
+    aggregates['time_to_fill'] = Avg(
+        ExpressionWrapper(F('stage_updated_at') - F('job__posted_date'), output_field=DurationField()),
+        filter=Q(stage='hired', job__posted_date__isnull=False),
+    )
+
+    row = applications.aggregate(**aggregates)
+
+    return {
+        'candidates_by_stage': {stage: row[f'stage_{stage}'] for stage in stages},
+        'total_candidates': row['total_candidates'],
+        'new_applications': row['new_applications'],
+        'time_to_fill': duration_days(row['time_to_fill']),
+    }
+
+
+def interviews_on(interviews, day):
+    """Count interviews scheduled on the given day, ignoring cancelled ones"""
+    return interviews.filter(scheduled_at__date=day).exclude(
+        status__in=INACTIVE_INTERVIEW_STATUSES
+    ).count()
+
+
+def stage_histograms(jobs):
+    """
+    Per-job stage counts for many jobs from their denormalized counters, in one query.
+
+    Returns {job_id: {stage: count}} over each job's pipeline funnel, in order.
+    """
+    histograms = {job.id: dict.fromkeys(pipeline_for(job).funnel, 0) for job in jobs}
+    rows = JobStageCount.objects.filter(job_id__in=histograms).values_list('job_id', 'stage', 'count')
+    for job_id, stage, count in rows:
+        if stage in histograms[job_id]:
+            histograms[job_id][stage] = count
+    return histograms
+
+
+def next_action(histogram):
+    """Describe the most pressing step for a job given its stage histogram"""
+    interviewing = sum(histogram.get(stage, 0) for stage in ('technical', 'onsite', 'final'))
+    if histogram.get('applied'):
+        return f"Review {histogram['applied']} applications"
+    if histogram.get('screening'):
+        return f"Schedule {histogram['screening']} phone screens"
+    if interviewing:
+        return f"Conduct {interviewing} interviews"
+    if histogram.get('offer'):
+        return f"Follow up on {histogram['offer']} offers"
+    return "Post job to attract candidates"
@@ -0,0 +1,74 @@
+"""
+Per-organization result cache for the analytics endpoints.
+
+Cached results are keyed by the per-organization data version (see
+recruitment_backend/versions.py). Writes to the models the endpoints read
+from bump that version (see signals.py), so stale entries are simply never
+read again and expire on their own; nothing is ever flushed.
+"""
+import hashlib
+import threading
+from functools import wraps
+from django.conf import settings
+from django.core.cache import cache
+from django.utils import timezone
+from rest_framework.response import Response
+from recruitment_backend.versions import get_version, scope_for
+
+
+class CacheStats:
+    """Thread-safe hit/miss counters per endpoint for this process"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._counters = {}
+
+    def record(self, endpoint, hit):
+        with self._lock:
+            counters = self._counters.setdefault(endpoint, {'hits': 0, 'misses': 0})
+            counters['hits' if hit else 'misses'] += 1
+
+    def snapshot(self):
+        with self._lock:
+            endpoints = {name: dict(counters) for name, counters in self._counters.items()}
+        for counters in endpoints.values():
+            total = counters['hits'] + counters['misses']
+            counters['hit_rate'] = round(counters['hits'] / total * 100, 1) if total else 0
+        return endpoints
+
+    def reset(self):
+        with self._lock:
+            self._counters.clear()
+
+
+stats = CacheStats()
+
+
+def result_key(endpoint, request, vary_on_user=False):
+    scope = scope_for(request.user)
+    params = '&'.join(f'{key}={value}' for key, value in sorted(request.query_params.items()))
+    if vary_on_user:
+        params += f'&user={request.user.pk}'
+    digest = hashlib.md5(params.encode()).hexdigest()
+    # Day-dependent figures ("today", days open) must not leak across midnight
+    return f'analytics:{endpoint}:{scope}:{get_version(scope)}:{timezone.localdate()}:{digest}'
+
+
+def cached_endpoint(endpoint, vary_on_user=False):
+    """Cache a function view's successful response data per organization"""
+    def decorator(view):
+        @wraps(view)
+        def wrapper(request, *args, **kwargs):
+            key = result_key(endpoint, request, vary_on_user=vary_on_user)
+            data = cache.get(key)
+            if data is not None:
+                stats.record(endpoint, hit=True)
+                return Response(data)
+
+            stats.record(endpoint, hit=False)
+            response = view(request, *args, **kwargs)
+            if response.status_code == 200:
+                cache.set(key, response.data, getattr(settings, 'ANALYTICS_CACHE_TIMEOUT', 300))
+            return response
+        return wrapper
+    return decorator
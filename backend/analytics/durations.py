@@ -0,0 +1,79 @@
+"""
+Time-in-stage statistics from the StageTransition log.
+
+The time an application spent in a stage is the gap between the
+transition into it and the next transition out, paired up in SQL with a
+LEAD() window per application. Medians and 90th percentiles are then
+computed over NumPy arrays, one vectorized pass per group.
+"""
+import numpy as np
+from django.db.models import DurationField, ExpressionWrapper, F, Window
+from django.db.models.functions import Lead
+from candidates.models import StageTransition
+
+
+def stage_durations(transitions):
+    """
+    Completed stage stays for a StageTransition queryset.
+
+    Returns (job_ids, stages, seconds) as parallel NumPy arrays. Stays that
+    are still in progress have no exit time and are left out.
+    """
+    rows = list(transitions.annotate(
+        left_at=Window(Lead('at'), partition_by=[F('application_id')], order_by=F('at').asc()),
+    ).annotate(
+        duration=ExpressionWrapper(F('left_at') - F('at'), output_field=DurationField()),
+    ).filter(left_at__isnull=False).values_list('application__job_id', 'to_stage', 'duration'))
+    if not rows:
+        return np.array([], dtype=np.int64), np.array([], dtype=object), np.array([], dtype=np.float64)
+
+    job_ids, stages, durations = zip(*rows)
+    seconds = np.array(durations, dtype='timedelta64[us]').astype(np.float64) / 1e6
+    return np.array(job_ids, dtype=np.int64), np.array(stages, dtype=object), seconds
+
+
+def _summaries(stages, seconds):
+    """Median / p90 in days per stage for one group of stays"""
+    summary = {}
+    if not len(seconds):
+        return summary
+    order = np.argsort(stages, kind='stable')
+    stages, seconds = stages[order], seconds[order]
+    unique, starts = np.unique(stages, return_index=True)
+    for stage, chunk in zip(unique, np.split(seconds, starts[1:])):
+        median, p90 = np.percentile(chunk, [50, 90]) / 86400
+        summary[stage] = {
+            'count': int(chunk.size),
+            'median_days': round(float(median), 2),
+            'p90_days': round(float(p90), 2),
+        }
+    return summary
+
+
+def time_in_stage(transitions):
+    """Organization-wide and per-job time-in-stage summaries"""
+    job_ids, stages, seconds = stage_durations(transitions)
+
+    jobs = {}
+    if job_ids.size:
+        order = np.argsort(job_ids, kind='stable')
+        job_ids, stages, seconds = job_ids[order], stages[order], seconds[order]
+        unique, starts = np.unique(job_ids, return_index=True)
+        bounds = list(starts[1:]) + [job_ids.size]
+        for job_id, start, end in zip(unique, starts, bounds):
+            jobs[int(job_id)] = _summaries(stages[start:end], seconds[start:end])
+
+    return {
+        'organization': _summaries(stages, seconds),
+        'jobs': jobs,
+    }
+
+
+def transitions_for(user, job_id=None):
+    if user.is_platform_admin:
+        transitions = StageTransition.objects.all()
+    else:
+        transitions = StageTransition.objects.filter(application__job__organization=user.organization)
+    if job_id:
+        transitions = transitions.filter(application__job_id=job_id)
+    return transitions
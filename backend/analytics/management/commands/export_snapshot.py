@@ -0,0 +1,49 @@
+from django.core.management.base import BaseCommand, CommandError
+from accounts.models import Organization
+from analytics.snapshots import ARROW_AVAILABLE, SNAPSHOT_BATCH_SIZE, SNAPSHOT_FORMATS, export_snapshot
+
+
+class Command(BaseCommand):
+    help = 'Write columnar snapshots of jobs, applications, transitions, interviews and feedback'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--organization', dest='organizations', action='append',
+            help='Organization slug to export (repeatable, defaults to all active organizations)'
+        )
+        parser.add_argument(
+            '--format', dest='file_format', choices=list(SNAPSHOT_FORMATS), default='parquet',
+            help='Output file format'
+        )
+        parser.add_argument(
+            '--full', action='store_true',
+            help='Export every row instead of only those changed since the last snapshot'
+        )
+        parser.add_argument(
+            '--output-dir', dest='output_dir',
+            help='Directory to write snapshots to (defaults to ANALYTICS_SNAPSHOT_DIR)'
+        )
+        parser.add_argument(
+            '--batch-size', type=int, default=SNAPSHOT_BATCH_SIZE,
+            help='Rows per record batch; bounds memory use'
+        )
+
+    def handle(self, *args, **options):
+        if not ARROW_AVAILABLE:
+            raise CommandError('pyarrow is not installed')
+
+        organizations = Organization.objects.filter(is_active=True)
+        if options['organizations']:
+            organizations = Organization.objects.filter(slug__in=options['organizations'])
+
+        for organization in organizations:
+            manifest = export_snapshot(
+                organization, file_format=options['file_format'], full=options['full'],
+                output_dir=options['output_dir'], batch_size=options['batch_size'],
+            )
+            counts = ', '.join(f"{name}={table['rows']}" for name, table in manifest['tables'].items())
+            self.stdout.write(f"  {organization.name}: {counts}")
+
+        self.stdout.write(
+            self.style.SUCCESS('Successfully exported analytics snapshots!')
+        )
@@ -0,0 +1,24 @@
+from django.core.management.base import BaseCommand
+from candidates.models import JobApplication
+from analytics.action_items import rebuild_action_items
+
+
+class Command(BaseCommand):
+    help = 'Rebuild the next-action work queue from current application data'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--organization', dest='organization',
+            help='Only rebuild items for this organization slug'
+        )
+
+    def handle(self, *args, **options):
+        applications = JobApplication.objects.all()
+        if options['organization']:
+            applications = applications.filter(job__organization__slug=options['organization'])
+
+        created = rebuild_action_items(applications)
+
+        self.stdout.write(
+            self.style.SUCCESS(f'Successfully rebuilt {created} action item(s)!')
+        )
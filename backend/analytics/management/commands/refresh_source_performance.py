@@ -0,0 +1,30 @@
+from django.core.management.base import BaseCommand
+from accounts.models import Organization
+from analytics.sources import refresh_source_performance
+
+
+class Command(BaseCommand):
+    help = 'Compute SourcePerformance from application data, refreshing only months with new activity'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--organization', dest='organization',
+            help='Only refresh this organization slug'
+        )
+        parser.add_argument(
+            '--full', action='store_true',
+            help='Recompute every month instead of only those touched since the last run'
+        )
+
+    def handle(self, *args, **options):
+        organizations = Organization.objects.filter(is_active=True)
+        if options['organization']:
+            organizations = Organization.objects.filter(slug=options['organization'])
+
+        for organization in organizations:
+            months = refresh_source_performance(organization, full=options['full'])
+            self.stdout.write(f"  {organization.name}: {months} month(s) recomputed")
+
+        self.stdout.write(
+            self.style.SUCCESS('Successfully refreshed source performance!')
+        )
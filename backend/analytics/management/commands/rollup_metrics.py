@@ -0,0 +1,52 @@
+from datetime import timedelta
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+from accounts.models import Organization
+from analytics.rollup import rollup_metrics
+
+
+class Command(BaseCommand):
+    help = 'Roll up daily RecruitmentMetrics rows, recomputing only days whose source data changed'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--organization', action='append', dest='organizations', default=[],
+            help='Organization slug to roll up (repeatable, default: all active organizations)'
+        )
+        parser.add_argument(
+            '--backfill-days', type=int, default=None,
+            help='Recompute this many days of history instead of only changed days'
+        )
+        parser.add_argument(
+            '--workers', type=int, default=getattr(settings, 'ANALYTICS_ROLLUP_WORKERS', 1),
+            help='Number of organizations to process in parallel'
+        )
+
+    def handle(self, *args, **options):
+        organizations = Organization.objects.filter(is_active=True)
+        if options['organizations']:
+            organizations = Organization.objects.filter(slug__in=options['organizations'])
+            missing = set(options['organizations']) - set(organizations.values_list('slug', flat=True))
+            if missing:
+                raise CommandError(f"Unknown organization(s): {', '.join(sorted(missing))}")
+
+        days = None
+        if options['backfill_days']:
+            today = timezone.localdate()
+            days = {today - timedelta(days=offset) for offset in range(options['backfill_days'])}
+
+        results = rollup_metrics(organizations, days=days, workers=options['workers'])
+        names = dict(organizations.values_list('id', 'name'))
+
+        failed = 0
+        for organization_id, written in results.items():
+            if written is None:
+                failed += 1
+                self.stdout.write(self.style.ERROR(f"  Rollup failed for {names[organization_id]}"))
+            else:
+                self.stdout.write(f"  {names[organization_id]}: {written} day(s) updated")
+
+        if failed:
+            raise CommandError(f'Metrics rollup failed for {failed} organization(s)')
+        self.stdout.write(self.style.SUCCESS('Successfully rolled up recruitment metrics!'))
@@ -0,0 +1,41 @@
+# Generated by Django 5.0.2 on 2026-10-18 03:16
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('accounts', '0001_initial'),
+        ('analytics', '0002_analyticscheckpoint'),
+        ('candidates', '0002_candidate_relevant_experience_and_more'),
+        ('jobs', '0002_job_feedback_template_job_publish_company_website_and_more'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ActionItem',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('item_type', models.CharField(choices=[('feedback', 'Feedback Overdue'), ('offer', 'Offer Expiring'), ('schedule', 'Ready to Schedule')], max_length=20)),
+                ('priority', models.IntegerField(choices=[(0, 'critical'), (1, 'high'), (2, 'medium'), (3, 'low')])),
+                ('title', models.CharField(max_length=255)),
+                ('action', models.CharField(max_length=50)),
+                ('candidate_name', models.CharField(max_length=201)),
+                ('job_title', models.CharField(max_length=255)),
+                ('stage_entered_at', models.DateTimeField()),
+                ('due_at', models.DateTimeField()),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('application', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, related_name='action_item', to='candidates.jobapplication')),
+                ('job', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='action_items', to='jobs.job')),
+                ('organization', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='action_items', to='accounts.organization')),
+            ],
+            options={
+                'db_table': 'action_items',
+                'ordering': ['priority', 'due_at'],
+                'indexes': [models.Index(fields=['organization', 'priority', 'due_at'], name='action_items_queue_idx')],
+            },
+        ),
+    ]
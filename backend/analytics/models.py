@@ -82,4 +82,68 @@ class SourcePerformance(models.Model):
         ordering = ['-period_end']
     
     def __str__(self):
-        return f"{self.source_name} - {self.period_start} to {self.period_end}"
\ No newline at end of file
+        return f"{self.source_name} - {self.period_start} to {self.period_end}"
+
+
+class AnalyticsCheckpoint(models.Model):
+    """High-water mark for incremental analytics jobs, one row per organization and job"""
+    organization = models.ForeignKey('accounts.Organization', on_delete=models.CASCADE, related_name='analytics_checkpoints')
+    name = models.CharField(max_length=100)
+    last_run_at = models.DateTimeField()
+    
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+    
+    class Meta:
+        db_table = 'analytics_checkpoints'
+        unique_together = ['organization', 'name']
+        ordering = ['organization', 'name']
+    
+    def __str__(self):
+        return f"{self.name} for {self.organization.name} at {self.last_run_at}"
+
+
+class ActionItem(models.Model):
+    """Materialized next-action work queue, one open item per application"""
+    ITEM_TYPE_CHOICES = [
+        ('feedback', 'Feedback Overdue'),
+        ('offer', 'Offer Expiring'),
+        ('schedule', 'Ready to Schedule'),
+    ]
+    
+    PRIORITY_CHOICES = [
+        (0, 'critical'),
+        (1, 'high'),
+        (2, 'medium'),
+        (3, 'low'),
+    ]
+    
+    organization = models.ForeignKey('accounts.Organization', on_delete=models.CASCADE, related_name='action_items')
+    application = models.OneToOneField('candidates.JobApplication', on_delete=models.CASCADE, related_name='action_item')
+    job = models.ForeignKey('jobs.Job', on_delete=models.CASCADE, related_name='action_items')
+    
+    item_type = models.CharField(max_length=20, choices=ITEM_TYPE_CHOICES)
+    priority = models.IntegerField(choices=PRIORITY_CHOICES)
+    title = models.CharField(max_length=255)
+    action = models.CharField(max_length=50)
+    
+    # Denormalized so the queue is served without joins
+    candidate_name = models.CharField(max_length=201)
+    job_title = models.CharField(max_length=255)
+    
+    # When the application entered its stage, and when the item becomes actionable
+    stage_entered_at = models.DateTimeField()
+    due_at = models.DateTimeField()
+    
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+    
+    class Meta:
+        db_table = 'action_items'
+        ordering = ['priority', 'due_at']
+        indexes = [
+            models.Index(fields=['organization', 'priority', 'due_at'], name='action_items_queue_idx'),
+        ]
+    
+    def __str__(self):
+        return f"{self.title} - {self.candidate_name}"
@@ -0,0 +1,370 @@
+"""
+Daily RecruitmentMetrics rollup.
+
+Each organization gets one RecruitmentMetrics row per day, derived from
+Job, JobApplication, Interview and ApplicationActivity. Incremental runs
+recompute from the earliest day whose source rows changed since the
+previous run (tracked through an AnalyticsCheckpoint) through today, since
+cumulative fields carry every earlier change forward. A deletion leaves
+no row to date, so one seen in the sync change log redoes every day
+already rolled up.
+
+Runs are scheduled from outside the web processes (cron runs
+`manage.py rollup_metrics`), so there is one rollup per deployment rather
+than one per worker.
+"""
+import logging
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from datetime import datetime, time, timedelta
+from django.db import connections, transaction
+from django.db.models import Avg, Count, DurationField, ExpressionWrapper, F, FloatField, Min, Q, Sum
+from django.db.models.functions import TruncDate
+from django.utils import timezone
+from accounts.models import Organization
+from jobs.models import Job
+from candidates.models import JobApplication, ApplicationActivity
+from interviews.models import Interview
+from sync.models import ChangeLogEntry
+from .aggregates import duration_days
+from .models import AnalyticsCheckpoint, RecruitmentMetrics
+
+logger = logging.getLogger(__name__)
+
+CHECKPOINT_NAME = 'recruitment_metrics'
+
+# Stages that count as "in review" for applications_in_review
+REVIEW_STAGES = ['screening', 'phone_screen', 'technical', 'onsite', 'final']
+
+# Change log entities whose deletion can change any past day's figures
+DELETION_ENTITIES = ['job', 'application', 'interview']
+
+# Fields written by the rollup; cost fields are maintained elsewhere and left untouched
+ROLLUP_FIELDS = [
+    'active_jobs', 'new_jobs', 'closed_jobs',
+    'total_applications', 'new_applications', 'applications_in_review',
+    'interviews_scheduled', 'interviews_completed', 'interviews_cancelled',
+    'offers_extended', 'offers_accepted', 'offers_rejected', 'hires_completed',
+    'avg_time_to_fill', 'avg_time_to_hire', 'offer_acceptance_rate',
+]
+
+
+def _day_bounds(day):
+    start = timezone.make_aware(datetime.combine(day, time.min))
+    return start, start + timedelta(days=1)
+
+
+def _daily_counts(queryset, field, start, end):
+    """Count rows per calendar day of `field` within [start, end)"""
+    rows = queryset.filter(**{f'{field}__gte': start, f'{field}__lt': end}).annotate(
+        day=TruncDate(field)
+    ).values('day').annotate(total=Count('id')).values_list('day', 'total')
+    return dict(rows)
+
+
+def _source_querysets(organization):
+    return {
+        'jobs': Job.objects.filter(organization=organization),
+        'applications': JobApplication.objects.filter(job__organization=organization),
+        'interviews': Interview.objects.filter(application__job__organization=organization),
+        'activities': ApplicationActivity.objects.filter(application__job__organization=organization),
+    }
+
+
+def changed_days(organization, since):
+    """Return the set of days touched by source rows modified after `since`"""
+    sources = _source_querysets(organization)
+    tracked = [
+        (sources['jobs'], 'updated_at', ['posted_date', 'closed_date']),
+        (sources['applications'], 'updated_at', ['applied_at', 'stage_updated_at']),
+        (sources['interviews'], 'updated_at', ['scheduled_at', 'completed_at', 'cancelled_at']),
+        (sources['activities'], 'created_at', ['created_at']),
+    ]
+
+    days = set()
+    for queryset, modified_field, date_fields in tracked:
+        changed = queryset.filter(**{f'{modified_field}__gt': since})
+        for field in date_fields:
+            days.update(
+                changed.exclude(**{f'{field}__isnull': True}).annotate(
+                    day=TruncDate(field)
+                ).values_list('day', flat=True).distinct()
+            )
+    return days
+
+
+def deletions_since(organization, since):
+    """Whether any job, application or interview of the organization was deleted after `since`"""
+    return ChangeLogEntry.objects.filter(
+        organization=organization, action='deleted', entity__in=DELETION_ENTITIES, changed_at__gt=since
+    ).exists()
+
+
+def compute_daily_metrics(organization, days):
+    """
+    Compute RecruitmentMetrics field values for each of `days`.
+
+    Every metric is a grouped query over the covering date range, so the
+    number of queries does not depend on how many days are requested.
+    Cumulative metrics (active jobs, total applications) are carried
+    forward from a baseline count taken before the first day.
+    """
+    if not days:
+        return {}
+
+    days = sorted(days)
+    range_start, _ = _day_bounds(days[0])
+    _, range_end = _day_bounds(days[-1])
+    sources = _source_querysets(organization)
+    jobs = sources['jobs']
+    applications = sources['applications']
+    interviews = sources['interviews']
+    activities = sources['activities']
+
+    # Jobs: open at the end of the day = posted and not yet closed
+    posted = jobs.filter(posted_date__isnull=False)
+    new_jobs = _daily_counts(posted, 'posted_date', range_start, range_end)
+    closed_jobs = _daily_counts(posted, 'closed_date', range_start, range_end)
+    active_baseline = posted.filter(posted_date__lt=range_start).exclude(closed_date__lt=range_start).count()
+
+    # Applications
+    new_applications = _daily_counts(applications, 'applied_at', range_start, range_end)
+    total_baseline = applications.filter(applied_at__lt=range_start).count()
+    in_review = applications.filter(stage__in=REVIEW_STAGES)
+    new_in_review = _daily_counts(in_review, 'applied_at', range_start, range_end)
+    in_review_baseline = in_review.filter(applied_at__lt=range_start).count()
+
+    # Interviews
+    interviews_scheduled = _daily_counts(interviews, 'scheduled_at', range_start, range_end)
+    interviews_completed = _daily_counts(interviews, 'completed_at', range_start, range_end)
+    interviews_cancelled = _daily_counts(interviews, 'cancelled_at', range_start, range_end)
+
+    # Offers come from the activity log
+    offer_rows = activities.filter(
+        created_at__gte=range_start, created_at__lt=range_end,
+        activity_type__in=['offer_extended', 'offer_accepted', 'offer_rejected'],
+    ).annotate(day=TruncDate('created_at')).values('day').annotate(
+        extended=Count('id', filter=Q(activity_type='offer_extended')),
+        accepted=Count('id', filter=Q(activity_type='offer_accepted')),
+        rejected=Count('id', filter=Q(activity_type='offer_rejected')),
+    )
+    offers = {row['day']: row for row in offer_rows}
+
+    # Hires and their durations
+    hire_rows = applications.filter(
+        stage='hired', stage_updated_at__gte=range_start, stage_updated_at__lt=range_end
+    ).annotate(day=TruncDate('stage_updated_at')).values('day').annotate(
+        hires=Count('id'),
+        time_to_fill=Avg(
+            ExpressionWrapper(F('stage_updated_at') - F('job__posted_date'), output_field=DurationField()),
+            filter=Q(job__posted_date__isnull=False),
+        ),
+        time_to_hire=Avg(ExpressionWrapper(F('stage_updated_at') - F('applied_at'), output_field=DurationField())),
+    )
+    hires = {row['day']: row for row in hire_rows}
+
+    wanted = set(days)
+    results = {}
+    active_jobs = active_baseline
+    total_applications = total_baseline
+    applications_in_review = in_review_baseline
+    day = days[0]
+    while day <= days[-1]:
+        active_jobs += new_jobs.get(day, 0) - closed_jobs.get(day, 0)
+        total_applications += new_applications.get(day, 0)
+        applications_in_review += new_in_review.get(day, 0)
+
+        if day in wanted:
+            offer = offers.get(day, {})
+            hire = hires.get(day, {})
+            extended = offer.get('extended', 0)
+            accepted = offer.get('accepted', 0)
+            results[day] = {
+                'active_jobs': active_jobs,
+                'new_jobs': new_jobs.get(day, 0),
+                'closed_jobs': closed_jobs.get(day, 0),
+                'total_applications': total_applications,
+                'new_applications': new_applications.get(day, 0),
+                'applications_in_review': applications_in_review,
+                'interviews_scheduled': interviews_scheduled.get(day, 0),
+                'interviews_completed': interviews_completed.get(day, 0),
+                'interviews_cancelled': interviews_cancelled.get(day, 0),
+                'offers_extended': extended,
+                'offers_accepted': accepted,
+                'offers_rejected': offer.get('rejected', 0),
+                'hires_completed': hire.get('hires', 0),
+                'avg_time_to_fill': round(duration_days(hire.get('time_to_fill')), 2),
+                'avg_time_to_hire': round(duration_days(hire.get('time_to_hire')), 2),
+                'offer_acceptance_rate': round(accepted / extended * 100, 2) if extended else 0,
+            }
+        day += timedelta(days=1)
+
+    return results
+
+
+def save_daily_metrics(organization, values_by_day):
+    """Upsert computed rows, leaving cost fields untouched"""
+    if not values_by_day:
+        return 0
+
+    with transaction.atomic():
+        existing = {
+            row.date: row
+            for row in RecruitmentMetrics.objects.select_for_update().filter(
+                organization=organization, date__in=list(values_by_day)
+            )
+        }
+        to_update, to_create = [], []
+        for day, values in values_by_day.items():
+            row = existing.get(day)
+            if row is None:
+                to_create.append(RecruitmentMetrics(organization=organization, date=day, **values))
+                continue
+            for field, value in values.items():
+                setattr(row, field, value)
+            row.updated_at = timezone.now()
+            to_update.append(row)
+
+        RecruitmentMetrics.objects.bulk_create(to_create)
+        RecruitmentMetrics.objects.bulk_update(to_update, ROLLUP_FIELDS + ['updated_at'])
+
+    return len(values_by_day)
+
+
+def rollup_organization(organization, days=None, backfill_days=30):
+    """
+    Refresh one organization's daily rows.
+
+    With explicit `days` those days are recomputed. Otherwise every day
+    from the earliest one whose source rows changed since the last run (or
+    the first rolled-up day, after a deletion) through today is recomputed;
+    the first run backfills `backfill_days` of history.
+    """
+    started_at = timezone.now()
+    today = timezone.localdate(started_at)
+    checkpoint = AnalyticsCheckpoint.objects.filter(
+        organization=organization, name=CHECKPOINT_NAME
+    ).first()
+
+    if days is None:
+        if checkpoint:
+            first_rolled_up = RecruitmentMetrics.objects.filter(
+                organization=organization
+            ).aggregate(first=Min('date'))['first'] or today
+            if deletions_since(organization, checkpoint.last_run_at):
+                first = first_rolled_up
+            else:
+                # Earlier days have no rows to fix; their changes reach later days through the baselines
+                first = max(min(changed_days(organization, checkpoint.last_run_at), default=today), first_rolled_up)
+            days = {first + timedelta(days=offset) for offset in range((today - first).days + 1)}
+        else:
+            days = {today - timedelta(days=offset) for offset in range(backfill_days)}
+        days.add(today)
+    # Never write rows for the future (interviews can be scheduled ahead)
+    days = {day for day in days if day <= today}
+
+    written = save_daily_metrics(organization, compute_daily_metrics(organization, days))
+
+    AnalyticsCheckpoint.objects.update_or_create(
+        organization=organization, name=CHECKPOINT_NAME,
+        defaults={'last_run_at': started_at},
+    )
+    return written
+
+
+def _rollup_in_thread(organization, days, backfill_days):
+    try:
+        return rollup_organization(organization, days=days, backfill_days=backfill_days)
+    finally:
+        # Worker threads get their own connections; release them when done
+        connections.close_all()
+
+
+def rollup_metrics(organizations=None, days=None, backfill_days=30, workers=1):
+    """
+    Run the rollup for several organizations, optionally in parallel.
+
+    Returns a dict of organization id to number of rows written. Failures
+    are logged and reported as None so one organization cannot block the rest.
+    """
+    if organizations is None:
+        organizations = Organization.objects.filter(is_active=True)
+    organizations = list(organizations)
+    results = {}
+
+    if workers <= 1:
+        for organization in organizations:
+            try:
+                results[organization.id] = rollup_organization(organization, days=days, backfill_days=backfill_days)
+            except Exception:
+                logger.exception("Metrics rollup failed for organization %s", organization.id)
+                results[organization.id] = None
+        return results
+
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        futures = {
+            executor.submit(_rollup_in_thread, organization, days, backfill_days): organization
+            for organization in organizations
+        }
+        for future in as_completed(futures):
+            organization = futures[future]
+            try:
+                results[organization.id] = future.result()
+            except Exception:
+                logger.exception("Metrics rollup failed for organization %s", organization.id)
+                results[organization.id] = None
+    return results
+
+
+def _percent_change(current, previous):
+    if not previous:
+        return 0
+    return round((current - previous) / previous * 100, 1)
+
+
+def metric_trends(metrics, period_days=30, today=None):
+    """
+    Period-over-period deltas from precomputed RecruitmentMetrics rows.
+
+    Compares the last `period_days` days with the period before it using a
+    single aggregate over the rollup table; raw tables are not touched.
+    """
+    today = today or timezone.localdate()
+    current_start = today - timedelta(days=period_days - 1)
+    previous_start = current_start - timedelta(days=period_days)
+    current = Q(date__gte=current_start, date__lte=today)
+    previous = Q(date__gte=previous_start, date__lt=current_start)
+    # Weight each day's average by its hires so busy days count for more
+    hire_weighted_fill = ExpressionWrapper(F('avg_time_to_fill') * F('hires_completed'), output_field=FloatField())
+
+    row = metrics.filter(date__gte=previous_start, date__lte=today).aggregate(
+        active_jobs_current=Avg('active_jobs', filter=current),
+        active_jobs_previous=Avg('active_jobs', filter=previous),
+        fill_days_current=Sum(hire_weighted_fill, filter=current),
+        fill_days_previous=Sum(hire_weighted_fill, filter=previous),
+        hires_current=Sum('hires_completed', filter=current),
+        hires_previous=Sum('hires_completed', filter=previous),
+        offers_extended_current=Sum('offers_extended', filter=current),
+        offers_extended_previous=Sum('offers_extended', filter=previous),
+        offers_accepted_current=Sum('offers_accepted', filter=current),
+        offers_accepted_previous=Sum('offers_accepted', filter=previous),
+        cost_current=Avg('cost_per_hire', filter=current & Q(cost_per_hire__gt=0)),
+        cost_previous=Avg('cost_per_hire', filter=previous & Q(cost_per_hire__gt=0)),
+    )
+
+    def ratio(numerator, denominator, scale=1):
+        numerator, denominator = row[numerator] or 0, row[denominator] or 0
+        return numerator / denominator * scale if denominator else 0
+
+    return {
+        'active_jobs_change': _percent_change(row['active_jobs_current'] or 0, row['active_jobs_previous'] or 0),
+        'time_to_fill_change': _percent_change(
+            ratio('fill_days_current', 'hires_current'), ratio('fill_days_previous', 'hires_previous')
+        ),
+        'offer_rate_change': _percent_change(
+            ratio('offers_accepted_current', 'offers_extended_current', 100),
+            ratio('offers_accepted_previous', 'offers_extended_previous', 100),
+        ),
+        'cost_per_hire_change': _percent_change(
+            float(row['cost_current'] or 0), float(row['cost_previous'] or 0)
+        ),
+    }
@@ -0,0 +1,181 @@
+"""
+Time-bucketed counts for the analytics series endpoint.
+
+Bucketing is done in the database (date truncation plus GROUP BY), so only
+one row per bucket and group crosses the wire. Buckets that ended before
+today are cached one by one under the organization's data version: a
+closed bucket still changes when an application moves stage (stage groups
+and hires), is deleted or has its job renamed, so any write retires them.
+Between writes only the missing buckets and the current, still-open
+bucket are queried.
+"""
+import math
+from datetime import timedelta
+from django.conf import settings
+from django.core.cache import cache
+from django.db.models import Count, DateField
+from django.db.models.functions import Trunc
+from candidates.models import JobApplication
+from interviews.models import Interview
+from recruitment_backend.versions import get_version, scope_for
+from .cache import stats
+from .sources import normalize_source
+
+SERIES_INTERVALS = ['day', 'week', 'month']
+
+# metric -> (model, timestamp field, organization lookup, extra filters, prefix to the application)
+SERIES_METRICS = {
+    'applications': (JobApplication, 'applied_at', 'job__organization', {}, ''),
+    'interviews': (Interview, 'scheduled_at', 'application__job__organization', {}, 'application__'),
+    'hires': (JobApplication, 'stage_updated_at', 'job__organization', {'stage': 'hired'}, ''),
+}
+
+# group -> (key lookup, label lookup) relative to the application
+SERIES_GROUPS = {
+    'job': ('job_id', 'job__title'),
+    'department': ('job__department_id', 'job__department__name'),
+    'source': ('candidate__source', None),
+    'stage': ('stage', None),
+}
+
+DEFAULT_MAX_POINTS = 200
+MAX_POINTS_LIMIT = 1000
+# Longest start..end span a request may ask for
+MAX_SPAN_DAYS = 5 * 366
+
+
+def bucket_start(day, interval):
+    if interval == 'week':
+        return day - timedelta(days=day.weekday())
+    if interval == 'month':
+        return day.replace(day=1)
+    return day
+
+
+def next_bucket(start, interval):
+    if interval == 'week':
+        return start + timedelta(days=7)
+    if interval == 'month':
+        return (start + timedelta(days=32)).replace(day=1)
+    return start + timedelta(days=1)
+
+
+def bucket_range(start, end, interval):
+    """Start dates of every bucket overlapping [start, end]"""
+    buckets = []
+    current = bucket_start(start, interval)
+    while current <= end:
+        buckets.append(current)
+        current = next_bucket(current, interval)
+    return buckets
+
+
+def _bucket_key(scope, version, metric, interval, group_by, bucket):
+    return f'analytics:series:{scope}:{version}:{metric}:{interval}:{group_by or "total"}:{bucket.isoformat()}'
+
+
+def _group_key(group_by, raw):
+    if group_by == 'source':
+        name = normalize_source(raw)
+        return name, name
+    return ('none' if raw is None else str(raw)), None
+
+
+def query_buckets(queryset, field, interval, group_by, prefix, first, last):
+    """Counts per bucket (and group) for buckets first..last, one grouped query"""
+    results = {
+        bucket: {'counts': {}, 'labels': {}}
+        for bucket in bucket_range(first, last, interval)
+    }
+    rows = queryset.filter(**{
+        f'{field}__date__gte': first,
+        f'{field}__date__lt': next_bucket(last, interval),
+    }).annotate(bucket=Trunc(field, interval, output_field=DateField()))
+
+    lookups = ['bucket']
+    if group_by:
+        key_lookup, label_lookup = SERIES_GROUPS[group_by]
+        lookups.append(prefix + key_lookup)
+        if label_lookup:
+            lookups.append(prefix + label_lookup)
+
+    for row in rows.values(*lookups).annotate(total=Count('id')).order_by():
+        bucket = results[row['bucket']]
+        key, label = 'total', None
+        if group_by:
+            key, label = _group_key(group_by, row[prefix + key_lookup])
+            if label_lookup:
+                label = row[prefix + label_lookup]
+        bucket['counts'][key] = bucket['counts'].get(key, 0) + row['total']
+        if label is not None:
+            bucket['labels'][key] = label
+    return results
+
+
+def downsample(buckets, max_points):
+    """Merge consecutive buckets so at most max_points remain; counts are summed"""
+    factor = max(1, math.ceil(len(buckets) / max_points))
+    merged = []
+    for index in range(0, len(buckets), factor):
+        group = buckets[index:index + factor]
+        counts = {}
+        for _, data in group:
+            for key, value in data['counts'].items():
+                counts[key] = counts.get(key, 0) + value
+        merged.append((group[0][0], counts))
+    return merged, factor
+
+
+def metric_series(user, metric, interval, start, end, today, group_by=None, max_points=DEFAULT_MAX_POINTS):
+    """Bucketed counts of `metric` between two dates, reusing cached closed buckets"""
+    model, field, organization_lookup, filters, prefix = SERIES_METRICS[metric]
+    queryset = model.objects.filter(**filters)
+    if not user.is_platform_admin:
+        queryset = queryset.filter(**{organization_lookup: user.organization})
+
+    scope = scope_for(user)
+    version = get_version(scope)
+    end = min(end, today)
+    buckets = bucket_range(start, end, interval)
+    keys = {bucket: _bucket_key(scope, version, metric, interval, group_by, bucket) for bucket in buckets}
+    closed = [bucket for bucket in buckets if next_bucket(bucket, interval) <= today]
+
+    data = {}
+    cached = cache.get_many([keys[bucket] for bucket in closed])
+    for bucket in closed:
+        if keys[bucket] in cached:
+            data[bucket] = cached[keys[bucket]]
+
+    missing = [bucket for bucket in buckets if bucket not in data]
+    stats.record('series', hit=not missing)
+    if missing:
+        fresh = query_buckets(queryset, field, interval, group_by, prefix, missing[0], missing[-1])
+        for bucket in missing:
+            data[bucket] = fresh[bucket]
+        cache.set_many(
+            {keys[bucket]: data[bucket] for bucket in missing if bucket in closed},
+            timeout=getattr(settings, 'ANALYTICS_SERIES_BUCKET_TIMEOUT', 24 * 3600)
+        )
+
+    labels = {}
+    for bucket in buckets:
+        labels.update(data[bucket]['labels'])
+    points, factor = downsample([(bucket, data[bucket]) for bucket in buckets], max_points)
+
+    return {
+        'metric': metric,
+        'interval': interval,
+        'group_by': group_by,
+        'start': buckets[0].isoformat() if buckets else None,
+        'end': end.isoformat(),
+        'buckets_per_point': factor,
+        'labels': labels,
+        'points': [
+            {
+                'bucket': bucket.isoformat(),
+                'total': sum(counts.values()),
+                **({'groups': counts} if group_by else {}),
+            }
+            for bucket, counts in points
+        ],
+    }
@@ -0,0 +1,78 @@
+"""
+Keep derived analytics in step with the data behind them: invalidate
+cached results and maintain the action item queue. The same per-organization
+version also feeds the list/detail ETags (recruitment_backend.mixins), which
+is why candidate and activity writes bump it too.
+"""
+from django.db.models.signals import post_save, post_delete, m2m_changed
+from django.dispatch import receiver
+from jobs.models import Job, Pipeline
+from candidates.models import ApplicationActivity, Candidate, JobApplication
+from interviews.models import Interview, InterviewFeedback
+from recruitment_backend.versions import bump_version_on_commit
+from .action_items import sync_application
+from .models import ActionItem
+
+
+def _organization_id(instance):
+    """Resolve the owning organization without loading whole related objects"""
+    if isinstance(instance, (Job, Candidate, Pipeline)):
+        return instance.organization_id
+    if isinstance(instance, JobApplication):
+        return Job.objects.filter(pk=instance.job_id).values_list('organization_id', flat=True).first()
+    if isinstance(instance, ApplicationActivity):
+        return JobApplication.objects.filter(pk=instance.application_id).values_list(
+            'job__organization_id', flat=True
+        ).first()
+    if isinstance(instance, Interview):
+        return JobApplication.objects.filter(pk=instance.application_id).values_list(
+            'job__organization_id', flat=True
+        ).first()
+    if isinstance(instance, InterviewFeedback):
+        return Interview.objects.filter(pk=instance.interview_id).values_list(
+            'application__job__organization_id', flat=True
+        ).first()
+    return None
+
+
+@receiver(post_save, sender=Job)
+@receiver(post_save, sender=Pipeline)
+@receiver(post_save, sender=Candidate)
+@receiver(post_save, sender=JobApplication)
+@receiver(post_save, sender=ApplicationActivity)
+@receiver(post_save, sender=Interview)
+@receiver(post_save, sender=InterviewFeedback)
+@receiver(post_delete, sender=Job)
+@receiver(post_delete, sender=Pipeline)
+@receiver(post_delete, sender=Candidate)
+@receiver(post_delete, sender=JobApplication)
+@receiver(post_delete, sender=Interview)
+@receiver(post_delete, sender=InterviewFeedback)
+def invalidate_analytics_cache(sender, instance, **kwargs):
+    # During cascades the parent may already be gone; the cascade root
+    # (a Job or JobApplication) still resolves and bumps the version.
+    bump_version_on_commit(_organization_id(instance))
+
+
+@receiver(m2m_changed, sender=Job.recruiters.through)
+def invalidate_on_recruiters_change(sender, instance, action, **kwargs):
+    # Recruiter assignment drives the per-recruiter action item filter
+    if action in ('post_add', 'post_remove', 'post_clear') and isinstance(instance, Job):
+        bump_version_on_commit(instance.organization_id)
+
+
+@receiver(post_save, sender=JobApplication)
+def sync_action_item(sender, instance, **kwargs):
+    sync_application(instance.pk)
+
+
+@receiver(post_save, sender=Candidate)
+def refresh_action_item_candidate(sender, instance, created, **kwargs):
+    if not created:
+        ActionItem.objects.filter(application__candidate=instance).update(candidate_name=instance.full_name)
+
+
+@receiver(post_save, sender=Job)
+def refresh_action_item_job(sender, instance, created, **kwargs):
+    if not created:
+        ActionItem.objects.filter(job=instance).update(job_title=instance.title)
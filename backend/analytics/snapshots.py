@@ -0,0 +1,219 @@
+"""
+Columnar snapshots of an organization's hiring data for offline analysis.
+
+Each table is read with values_list().iterator() and written to a Parquet
+or Arrow IPC file one record batch at a time, so memory is bounded by the
+batch size. Columns are typed: stages and statuses are dictionary-encoded
+against the model choices, timestamps are UTC microseconds and ratings
+keep their decimal precision. Incremental snapshots only contain rows
+changed since the previous snapshot of the organization.
+"""
+from pathlib import Path
+from django.conf import settings
+from django.utils import timezone
+from candidates.models import JobApplication, StageTransition
+from interviews.models import Interview, InterviewFeedback
+from jobs.models import Job
+from .models import AnalyticsCheckpoint
+
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+    ARROW_AVAILABLE = True
+except ImportError:
+    ARROW_AVAILABLE = False
+
+CHECKPOINT_NAME = 'snapshot_export'
+
+SNAPSHOT_FORMATS = {
+    'parquet': 'parquet',
+    'arrow': 'arrow',
+}
+
+SNAPSHOT_BATCH_SIZE = 10000
+
+
+def _choices(field_choices):
+    return ('category', [value for value, _ in field_choices])
+
+
+# table -> (model, organization lookup, change timestamp, [(lookup, column, kind)])
+SNAPSHOT_TABLES = {
+    'jobs': (Job, 'organization', 'updated_at', [
+        ('id', 'job_id', 'int64'),
+        ('title', 'title', 'string'),
+        ('department__name', 'department', 'string'),
+        ('status', 'status', _choices(Job.STATUS_CHOICES)),
+        ('urgency', 'urgency', _choices(Job.URGENCY_CHOICES)),
+        ('job_type', 'job_type', _choices(Job.JOB_TYPE_CHOICES)),
+        ('experience_level', 'experience_level', _choices(Job.EXPERIENCE_LEVEL_CHOICES)),
+        ('openings', 'openings', 'int32'),
+        ('sla_days', 'sla_days', 'int32'),
+        ('salary_min', 'salary_min', ('decimal', 10, 2)),
+        ('salary_max', 'salary_max', ('decimal', 10, 2)),
+        ('posted_date', 'posted_at', 'timestamp'),
+        ('closed_date', 'closed_at', 'timestamp'),
+        ('created_at', 'created_at', 'timestamp'),
+        ('updated_at', 'updated_at', 'timestamp'),
+    ]),
+    'applications': (JobApplication, 'job__organization', 'updated_at', [
+        ('id', 'application_id', 'int64'),
+        ('job_id', 'job_id', 'int64'),
+        ('candidate_id', 'candidate_id', 'int64'),
+        ('candidate__source', 'source', 'string'),
+        ('stage', 'stage', _choices(JobApplication.STAGE_CHOICES)),
+        ('status', 'status', _choices(JobApplication.STATUS_CHOICES)),
+        ('overall_rating', 'overall_rating', ('decimal', 3, 2)),
+        ('ai_score', 'ai_score', 'int16'),
+        ('offer_amount', 'offer_amount', ('decimal', 10, 2)),
+        ('applied_at', 'applied_at', 'timestamp'),
+        ('stage_updated_at', 'stage_updated_at', 'timestamp'),
+        ('rejected_at', 'rejected_at', 'timestamp'),
+        ('offer_extended_at', 'offer_extended_at', 'timestamp'),
+        ('offer_accepted_at', 'offer_accepted_at', 'timestamp'),
+        ('updated_at', 'updated_at', 'timestamp'),
+    ]),
+    'transitions': (StageTransition, 'application__job__organization', 'at', [
+        ('id', 'transition_id', 'int64'),
+        ('application_id', 'application_id', 'int64'),
+        ('application__job_id', 'job_id', 'int64'),
+        ('from_stage', 'from_stage', _choices(JobApplication.STAGE_CHOICES)),
+        ('to_stage', 'to_stage', _choices(JobApplication.STAGE_CHOICES)),
+        ('actor_id', 'actor_id', 'int64'),
+        ('at', 'at', 'timestamp'),
+    ]),
+    'interviews': (Interview, 'application__job__organization', 'updated_at', [
+        ('id', 'interview_id', 'int64'),
+        ('application_id', 'application_id', 'int64'),
+        ('application__job_id', 'job_id', 'int64'),
+        ('interview_type', 'interview_type', _choices(Interview.INTERVIEW_TYPE_CHOICES)),
+        ('round_number', 'round_number', 'int16'),
+        ('status', 'status', _choices(Interview.STATUS_CHOICES)),
+        ('scheduled_at', 'scheduled_at', 'timestamp'),
+        ('duration_minutes', 'duration_minutes', 'int32'),
+        ('completed_at', 'completed_at', 'timestamp'),
+        ('cancelled_at', 'cancelled_at', 'timestamp'),
+        ('updated_at', 'updated_at', 'timestamp'),
+    ]),
+    'feedback': (InterviewFeedback, 'interview__application__job__organization', 'updated_at', [
+        ('id', 'feedback_id', 'int64'),
+        ('interview_id', 'interview_id', 'int64'),
+        ('interview__application_id', 'application_id', 'int64'),
+        ('interviewer_id', 'interviewer_id', 'int64'),
+        ('recommendation', 'recommendation', _choices(InterviewFeedback.RECOMMENDATION_CHOICES)),
+        ('overall_rating', 'overall_rating', 'int8'),
+        ('technical_rating', 'technical_rating', 'int8'),
+        ('communication_rating', 'communication_rating', 'int8'),
+        ('problem_solving_rating', 'problem_solving_rating', 'int8'),
+        ('cultural_fit_rating', 'cultural_fit_rating', 'int8'),
+        ('is_submitted', 'is_submitted', 'bool'),
+        ('submitted_at', 'submitted_at', 'timestamp'),
+        ('updated_at', 'updated_at', 'timestamp'),
+    ]),
+}
+
+
+def _arrow_type(kind):
+    if isinstance(kind, tuple):
+        if kind[0] == 'category':
+            return pa.dictionary(pa.int8(), pa.string())
+        return pa.decimal128(kind[1], kind[2])
+    if kind == 'timestamp':
+        return pa.timestamp('us', tz='UTC')
+    if kind == 'string':
+        return pa.string()
+    if kind == 'bool':
+        return pa.bool_()
+    return getattr(pa, kind)()
+
+
+def table_schema(columns):
+    return pa.schema([(name, _arrow_type(kind)) for _, name, kind in columns])
+
+
+def _column(values, kind):
+    if isinstance(kind, tuple) and kind[0] == 'category':
+        # A fixed dictionary per column keeps every batch compatible with the IPC file format
+        categories = kind[1]
+        index = {value: position for position, value in enumerate(categories)}
+        indices = pa.array([index.get(value) for value in values], type=pa.int8())
+        return pa.DictionaryArray.from_arrays(indices, pa.array(categories, type=pa.string()))
+    return pa.array(values, type=_arrow_type(kind))
+
+
+def _record_batch(rows, columns, schema):
+    arrays = [_column(values, kind) for values, (_, _, kind) in zip(zip(*rows), columns)]
+    return pa.RecordBatch.from_arrays(arrays, schema=schema)
+
+
+def _open_writer(path, schema, file_format):
+    if file_format == 'parquet':
+        return pq.ParquetWriter(str(path), schema, compression='zstd')
+    return pa.ipc.new_file(str(path), schema)
+
+
+def write_table(queryset, columns, path, file_format, batch_size=SNAPSHOT_BATCH_SIZE):
+    """Write a queryset to one columnar file in batches and return the row count"""
+    schema = table_schema(columns)
+    rows_written = 0
+    writer = _open_writer(path, schema, file_format)
+    try:
+        batch = []
+        for row in queryset.values_list(*[lookup for lookup, _, _ in columns]).iterator(chunk_size=batch_size):
+            batch.append(row)
+            if len(batch) >= batch_size:
+                writer.write_batch(_record_batch(batch, columns, schema))
+                rows_written += len(batch)
+                batch = []
+        if batch:
+            writer.write_batch(_record_batch(batch, columns, schema))
+            rows_written += len(batch)
+    finally:
+        # Closing without any batches still leaves a readable file carrying the schema
+        writer.close()
+    return rows_written
+
+
+def export_snapshot(organization, file_format='parquet', full=False, output_dir=None, batch_size=SNAPSHOT_BATCH_SIZE):
+    """
+    Write every snapshot table for an organization into a new directory.
+
+    Unless `full` is set, rows unchanged since the organization's previous
+    snapshot are skipped. Returns a manifest describing the written files.
+    """
+    if not ARROW_AVAILABLE:
+        raise RuntimeError('pyarrow is required for analytics snapshots')
+    if file_format not in SNAPSHOT_FORMATS:
+        raise ValueError(f'Unknown snapshot format: {file_format}')
+
+    started_at = timezone.now()
+    checkpoint = AnalyticsCheckpoint.objects.filter(organization=organization, name=CHECKPOINT_NAME).first()
+    since = None if full or checkpoint is None else checkpoint.last_run_at
+
+    root = Path(output_dir or settings.ANALYTICS_SNAPSHOT_DIR)
+    directory = root / organization.slug / started_at.strftime('%Y%m%dT%H%M%S%fZ')
+    directory.mkdir(parents=True, exist_ok=True)
+
+    tables = {}
+    for name, (model, organization_lookup, changed_field, columns) in SNAPSHOT_TABLES.items():
+        queryset = model.objects.filter(**{organization_lookup: organization})
+        if since is not None:
+            queryset = queryset.filter(**{f'{changed_field}__gt': since})
+        path = directory / f'{name}.{SNAPSHOT_FORMATS[file_format]}'
+        tables[name] = {
+            'path': str(path.relative_to(root)),
+            'rows': write_table(queryset.order_by('pk'), columns, path, file_format, batch_size),
+        }
+
+    AnalyticsCheckpoint.objects.update_or_create(
+        organization=organization, name=CHECKPOINT_NAME,
+        defaults={'last_run_at': started_at},
+    )
+    return {
+        'organization': organization.slug,
+        'format': file_format,
+        'incremental': since is not None,
+        'since': since.isoformat() if since else None,
+        'created_at': started_at.isoformat(),
+        'tables': tables,
+    }
@@ -0,0 +1,206 @@
+"""
+SourcePerformance aggregation from real application data.
+
+Volume and conversion counts come from JobApplication stages, grouped by
+the candidate's free-text source, which is normalized so that "linkedin",
+"LinkedIn Jobs" and "Linked-In" land in the same bucket. Persisted rows
+cover calendar months; incremental refreshes recompute only the months
+touched by new activity since the last run.
+"""
+import re
+from datetime import timedelta
+from decimal import Decimal
+from django.db import transaction
+from django.db.models import Count, Q
+from django.db.models.functions import TruncMonth
+from django.utils import timezone
+from candidates.models import JobApplication
+from interviews.models import Interview
+from recruitment_backend.versions import bump_version_on_commit
+from .models import AnalyticsCheckpoint, SourcePerformance
+
+CHECKPOINT_NAME = 'source_performance'
+
+# Stages at or beyond the first human screen count as qualified
+QUALIFIED_STAGES = ['phone_screen', 'technical', 'onsite', 'final', 'offer', 'hired']
+OFFER_STAGES = ['offer', 'hired']
+
+UNKNOWN_SOURCE = 'Direct'
+
+SOURCE_ALIASES = {
+    'linkedin': 'LinkedIn',
+    'linked in': 'LinkedIn',
+    'referral': 'Referrals',
+    'referrals': 'Referrals',
+    'employee referral': 'Referrals',
+    'employee referrals': 'Referrals',
+    'indeed': 'Indeed',
+    'glassdoor': 'Glassdoor',
+    'company website': 'Company Website',
+    'website': 'Company Website',
+    'careers page': 'Company Website',
+    'career site': 'Company Website',
+    'careers site': 'Company Website',
+}
+
+# Generic suffixes that do not identify a different source ("LinkedIn Jobs")
+_NOISE_SUFFIXES = (' jobs', ' job board', ' ads')
+
+
+def normalize_source(name):
+    """Map free-text source names onto a canonical label"""
+    cleaned = (name or '').strip().lower()
+    # "https://www.indeed.com" -> "indeed"
+    cleaned = re.sub(r'^(https?://)?(www\.)?', '', cleaned)
+    cleaned = re.sub(r'\.(com|net|org|io|co)(/.*)?$', '', cleaned)
+    cleaned = re.sub(r'[\s\-_./]+', ' ', cleaned).strip()
+    if not cleaned:
+        return UNKNOWN_SOURCE
+    for suffix in _NOISE_SUFFIXES:
+        if cleaned.endswith(suffix) and cleaned[:-len(suffix)] in SOURCE_ALIASES:
+            cleaned = cleaned[:-len(suffix)]
+    if cleaned in SOURCE_ALIASES:
+        return SOURCE_ALIASES[cleaned]
+    return cleaned.title()
+
+
+def month_bounds(day):
+    start = day.replace(day=1)
+    next_month = (start + timedelta(days=32)).replace(day=1)
+    return start, next_month - timedelta(days=1)
+
+
+def compute_source_performance(applications, period_start, period_end):
+    """
+    Per-source counts and rates for applications received in a period.
+
+    `applications` is a tenant-scoped JobApplication queryset. Two grouped
+    queries are issued regardless of volume; results are keyed by the
+    normalized source name.
+    """
+    in_period = applications.filter(
+        applied_at__date__gte=period_start, applied_at__date__lte=period_end
+    )
+    rows = in_period.values('candidate__source').annotate(
+        total=Count('id'),
+        qualified=Count('id', filter=Q(stage__in=QUALIFIED_STAGES)),
+        offers=Count('id', filter=Q(stage__in=OFFER_STAGES) | Q(offer_extended_at__isnull=False)),
+        hires=Count('id', filter=Q(stage='hired')),
+    ).order_by()
+    interview_rows = Interview.objects.filter(application__in=in_period).values(
+        'application__candidate__source'
+    ).annotate(total=Count('id')).order_by()
+
+    results = {}
+
+    def bucket(raw_source):
+        return results.setdefault(normalize_source(raw_source), {
+            'total_applications': 0,
+            'qualified_candidates': 0,
+            'interviews_scheduled': 0,
+            'offers_extended': 0,
+            'hires_made': 0,
+        })
+
+    for row in rows:
+        counts = bucket(row['candidate__source'])
+        counts['total_applications'] += row['total']
+        counts['qualified_candidates'] += row['qualified']
+        counts['offers_extended'] += row['offers']
+        counts['hires_made'] += row['hires']
+    for row in interview_rows:
+        bucket(row['application__candidate__source'])['interviews_scheduled'] += row['total']
+
+    for counts in results.values():
+        counts.update(performance_rates(counts))
+    return results
+
+
+def performance_rates(counts):
+    def rate(numerator, denominator):
+        return round(counts[numerator] / counts[denominator] * 100, 2) if counts[denominator] else 0
+
+    return {
+        'qualification_rate': rate('qualified_candidates', 'total_applications'),
+        'interview_to_offer_rate': rate('offers_extended', 'interviews_scheduled'),
+        'offer_to_hire_rate': rate('hires_made', 'offers_extended'),
+    }
+
+
+def _cost_fields(total_cost, counts):
+    def per(denominator):
+        return (Decimal(total_cost) / counts[denominator]).quantize(Decimal('0.01')) if counts[denominator] else Decimal('0')
+
+    return {
+        'cost_per_application': per('total_applications'),
+        'cost_per_hire': per('hires_made'),
+    }
+
+
+def save_source_performance(organization, period_start, period_end, results):
+    """Replace one period's rows for an organization, keeping manually entered costs"""
+    with transaction.atomic():
+        existing = {
+            row.source_name: row
+            for row in SourcePerformance.objects.select_for_update().filter(
+                organization=organization, period_start=period_start, period_end=period_end
+            )
+        }
+        for source_name, counts in results.items():
+            row = existing.pop(source_name, None) or SourcePerformance(
+                organization=organization, source_name=source_name,
+                period_start=period_start, period_end=period_end,
+            )
+            for field, value in counts.items():
+                setattr(row, field, value)
+            for field, value in _cost_fields(row.total_cost, counts).items():
+                setattr(row, field, value)
+            row.save()
+
+        # Sources with no applications left in the period
+        SourcePerformance.objects.filter(pk__in=[row.pk for row in existing.values()]).delete()
+
+    bump_version_on_commit(organization.id)
+
+
+def application_months(applications):
+    """First day of each month in which the given applications were received"""
+    months = applications.annotate(month=TruncMonth('applied_at')).values_list('month', flat=True).distinct()
+    return {timezone.localdate(month).replace(day=1) for month in months}
+
+
+def touched_months(applications, since):
+    """Months whose applications, their interviews or their candidates changed after `since`"""
+    return application_months(applications.filter(
+        Q(updated_at__gt=since)
+        | Q(interviews__updated_at__gt=since)
+        | Q(candidate__updated_at__gt=since)
+    ))
+
+
+def refresh_source_performance(organization, full=False):
+    """
+    Recompute persisted monthly rows for an organization.
+
+    Only months touched since the previous refresh are recomputed unless
+    `full` is set or the organization has never been processed.
+    """
+    started_at = timezone.now()
+    checkpoint = AnalyticsCheckpoint.objects.filter(organization=organization, name=CHECKPOINT_NAME).first()
+    applications = JobApplication.objects.filter(job__organization=organization)
+
+    if full or checkpoint is None:
+        months = application_months(applications)
+    else:
+        months = touched_months(applications, checkpoint.last_run_at)
+
+    for month in sorted(months):
+        period_start, period_end = month_bounds(month)
+        results = compute_source_performance(applications, period_start, period_end)
+        save_source_performance(organization, period_start, period_end, results)
+
+    AnalyticsCheckpoint.objects.update_or_create(
+        organization=organization, name=CHECKPOINT_NAME,
+        defaults={'last_run_at': started_at},
+    )
+    return len(months)
@@ -1,3 +1,526 @@
+import shutil
+import tempfile
+from datetime import timedelta
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
 from django.test import TestCase
+from django.utils import timezone
+from rest_framework.test import APIClient
+from accounts.models import Organization
+from jobs.models import Job
+from candidates.models import Candidate, JobApplication, StageTransition
+from interviews.models import Interview
+from recruitment_backend.versions import check_shared_cache
+from .models import ActionItem, AnalyticsCheckpoint, RecruitmentMetrics, SourcePerformance
+from .action_items import rebuild_action_items
+from .sources import refresh_source_performance
+from .rollup import rollup_organization
+from .cache import stats
+from .snapshots import export_snapshot
 
-# Create your tests here.
+User = get_user_model()
+
+
+class AnalyticsTestCase(TestCase):
+    """Shared fixtures for analytics endpoint tests"""
+
+    def setUp(self):
+        cache.clear()
+        self.organization = Organization.objects.create(name='Acme', slug='acme')
+        self.user = User.objects.create_user(
+            username='recruiter', email='recruiter@acme.test', password='secret',
+            organization=self.organization, role='recruiter'
+        )
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+        self.job = self.create_job('Backend Engineer')
+
+    def create_job(self, title, **kwargs):
+        defaults = {
+            'organization': self.organization,
+            'title': title,
+            'description': 'Build things',
+            'requirements': 'Python',
+            'location': 'Remote',
+            'status': 'open',
+            'posted_date': timezone.now() - timedelta(days=10),
+        }
+        defaults.update(kwargs)
+        return Job.objects.create(**defaults)
+
+    def create_applications(self, count, stage='applied', job=None):
+        job = job or self.job
+        offset = Candidate.objects.count()
+        applications = []
+        for index in range(offset, offset + count):
+            candidate = Candidate.objects.create(
+                organization=self.organization,
+                first_name='Candidate', last_name=str(index),
+                email=f'candidate{index}@example.com', phone='555-0100'
+            )
+            applications.append(JobApplication.objects.create(job=job, candidate=candidate, stage=stage))
+        return applications
+
+
+class DashboardMetricsTests(AnalyticsTestCase):
+
+    def test_counts_stages_offers_and_interviews(self):
+        self.create_applications(3, stage='applied')
+        self.create_applications(2, stage='offer')
+        hired = self.create_applications(1, stage='hired')[0]
+        Interview.objects.create(
+            application=hired, interview_type='technical', scheduled_at=timezone.now()
+        )
+        Interview.objects.create(
+            application=hired, interview_type='onsite', scheduled_at=timezone.now(), status='cancelled'
+        )
+
+        response = self.client.get('/api/analytics/dashboard/')
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data['active_jobs'], 1)
+        self.assertEqual(response.data['total_candidates'], 6)
+        self.assertEqual(response.data['candidates_by_stage']['applied'], 3)
+        self.assertEqual(response.data['offers_pending'], 2)
+        self.assertEqual(response.data['offer_rate'], 50.0)
+        self.assertEqual(response.data['new_applications'], 6)
+        self.assertEqual(response.data['interviews_today'], 1)
+        self.assertAlmostEqual(response.data['time_to_fill'], 10.0, places=0)
+
+    def test_query_count_is_constant(self):
+        self.create_applications(5, stage='hired')
+        # Active jobs, pipelines in use, application summary, trends, interviews today
+        with self.assertNumQueries(5) as small:
+            self.client.get('/api/analytics/dashboard/')
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.create_applications(50, stage='hired')
+            self.create_applications(50, stage='technical', job=self.create_job('Designer'))
+        with self.assertNumQueries(len(small.captured_queries)):
+            self.client.get('/api/analytics/dashboard/')
+
+
+class MetricsRollupTests(AnalyticsTestCase):
+
+    def test_first_run_backfills_and_writes_checkpoint(self):
+        self.create_applications(2)
+
+        written = rollup_organization(self.organization, backfill_days=7)
+
+        self.assertEqual(written, 7)
+        today = RecruitmentMetrics.objects.get(organization=self.organization, date=timezone.localdate())
+        self.assertEqual(today.new_applications, 2)
+        self.assertEqual(today.total_applications, 2)
+        self.assertEqual(today.active_jobs, 1)
+        self.assertTrue(AnalyticsCheckpoint.objects.filter(organization=self.organization).exists())
+
+    def test_incremental_run_only_touches_changed_days(self):
+        rollup_organization(self.organization, backfill_days=7)
+        self.create_applications(3)
+
+        written = rollup_organization(self.organization)
+
+        self.assertEqual(written, 1)
+        today = RecruitmentMetrics.objects.get(organization=self.organization, date=timezone.localdate())
+        self.assertEqual(today.new_applications, 3)
+
+    def test_backdated_rows_and_deletes_refresh_cumulative_days(self):
+        rollup_organization(self.organization, backfill_days=7)
+        applications = self.create_applications(2)
+        JobApplication.objects.filter(pk__in=[a.pk for a in applications]).update(
+            applied_at=timezone.now() - timedelta(days=3)
+        )
+
+        self.assertEqual(rollup_organization(self.organization), 4)
+        totals = dict(RecruitmentMetrics.objects.filter(
+            organization=self.organization
+        ).values_list('date', 'total_applications'))
+        today = timezone.localdate()
+        self.assertEqual((totals[today - timedelta(days=4)], totals[today]), (0, 2))
+
+        applications[0].delete()
+        self.assertEqual(rollup_organization(self.organization), 7)
+        self.assertEqual(
+            RecruitmentMetrics.objects.get(organization=self.organization, date=today).total_applications, 1
+        )
+
+    def test_dashboard_trends_come_from_rollup_rows(self):
+        today = timezone.localdate()
+        RecruitmentMetrics.objects.create(organization=self.organization, date=today, active_jobs=12)
+        RecruitmentMetrics.objects.create(
+            organization=self.organization, date=today - timedelta(days=40), active_jobs=10
+        )
+
+        response = self.client.get('/api/analytics/dashboard/')
+
+        self.assertEqual(response.data['active_jobs_change'], 20.0)
+        self.assertEqual(response.data['offer_rate_change'], 0)
+
+    def test_metrics_filters_reject_bad_dates_and_periods(self):
+        today = timezone.localdate()
+        RecruitmentMetrics.objects.create(organization=self.organization, date=today, active_jobs=3)
+
+        response = self.client.get('/api/analytics/metrics/', {'start': today.isoformat()})
+        self.assertEqual(len(response.data['results']), 1)
+        for params in ({'start': 'bad'}, {'end': '2024-13-01'}):
+            self.assertEqual(self.client.get('/api/analytics/metrics/', params).status_code, 400)
+
+        trends = '/api/analytics/metrics/trends/'
+        self.assertEqual(self.client.get(trends, {'period': 7}).status_code, 200)
+        for period in ('0', 'abc', '99999999999'):
+            self.assertEqual(self.client.get(trends, {'period': period}).status_code, 400)
+
+
+class AnalyticsCacheTests(AnalyticsTestCase):
+
+    def setUp(self):
+        super().setUp()
+        stats.reset()
+
+    def test_repeated_requests_hit_the_cache(self):
+        self.create_applications(2)
+        self.client.get('/api/analytics/dashboard/')
+
+        with self.assertNumQueries(0):
+            response = self.client.get('/api/analytics/dashboard/')
+
+        self.assertEqual(response.data['total_candidates'], 2)
+        self.assertEqual(stats.snapshot()['dashboard'], {'hits': 1, 'misses': 1, 'hit_rate': 50.0})
+
+    def test_application_write_invalidates_only_its_organization(self):
+        other = Organization.objects.create(name='Other', slug='other')
+        other_user = User.objects.create_user(
+            username='other', email='other@other.test', password='secret', organization=other
+        )
+        other_client = APIClient()
+        other_client.force_authenticate(other_user)
+        self.client.get('/api/analytics/dashboard/')
+        other_client.get('/api/analytics/dashboard/')
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.create_applications(1)
+
+        response = self.client.get('/api/analytics/dashboard/')
+        other_client.get('/api/analytics/dashboard/')
+
+        self.assertEqual(response.data['total_candidates'], 1)
+        self.assertEqual(stats.snapshot()['dashboard'], {'hits': 1, 'misses': 3, 'hit_rate': 25.0})
+
+    def test_deploy_check_flags_a_per_process_cache(self):
+        locmem = {'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'}}
+        redis = {'default': {'BACKEND': 'django.core.cache.backends.redis.RedisCache'}}
+
+        with self.settings(CACHES=locmem):
+            self.assertEqual([error.id for error in check_shared_cache(None)], ['recruitment_backend.W001'])
+        with self.settings(CACHES=redis):
+            self.assertEqual(check_shared_cache(None), [])
+
+
+class JobsAnalyticsTests(AnalyticsTestCase):
+
+    def test_histograms_and_next_action(self):
+        self.create_applications(2, stage='screening')
+        self.create_applications(1, stage='offer')
+
+        response = self.client.get('/api/analytics/jobs/')
+
+        self.assertEqual(response.status_code, 200)
+        job = response.data['results'][0]
+        self.assertEqual(job['applications_count'], 3)
+        self.assertEqual(job['candidates_by_stage']['screening'], 2)
+        self.assertEqual(job['next_action'], 'Schedule 2 phone screens')
+
+    def test_orders_by_urgency_then_overdue(self):
+        self.create_job('Critical Role', urgency='critical')
+        self.create_job('Overdue Role', urgency='medium', posted_date=timezone.now() - timedelta(days=40))
+
+        response = self.client.get('/api/analytics/jobs/')
+        titles = [job['title'] for job in response.data['results']]
+        self.assertEqual(titles, ['Critical Role', 'Overdue Role', 'Backend Engineer'])
+
+        response = self.client.get('/api/analytics/jobs/', {'ordering': 'overdue'})
+        self.assertEqual(response.data['results'][0]['title'], 'Overdue Role')
+
+    def test_sql_ordering_matches_the_job_properties_across_pages(self):
+        now = timezone.now()
+        self.create_job('Due Today', posted_date=now - timedelta(days=21, hours=1))
+        self.create_job('A Day Late', posted_date=now - timedelta(days=22, hours=1))
+        self.create_job('Never Posted', urgency='low', posted_date=None)
+        for index in range(20):
+            self.create_job(f'Role {index}', urgency=['high', 'low'][index % 2], sla_days=index)
+
+        titles = []
+        for page in (1, 2):
+            response = self.client.get('/api/analytics/jobs/', {'page': page})
+            titles += [(job['title'], job['is_overdue']) for job in response.data['results']]
+
+        self.assertEqual(len(titles), 24)
+        medium = [title for title, _ in titles if title in ('Due Today', 'A Day Late', 'Backend Engineer')]
+        self.assertEqual(medium, ['A Day Late', 'Due Today', 'Backend Engineer'])
+        self.assertEqual(dict(titles)['A Day Late'], True)
+        self.assertEqual(dict(titles)['Due Today'], False)
+        self.assertEqual(titles[-1], ('Never Posted', False))
+
+    def test_query_count_is_independent_of_job_count(self):
+        for index in range(2):
+            self.create_applications(2, job=self.create_job(f'Role {index}'))
+        with self.assertNumQueries(3) as few_jobs:
+            self.client.get('/api/analytics/jobs/', {'page': 1})
+
+        with self.captureOnCommitCallbacks(execute=True):
+            for index in range(2, 15):
+                self.create_applications(2, stage='technical', job=self.create_job(f'Role {index}'))
+        with self.assertNumQueries(len(few_jobs.captured_queries)):
+            response = self.client.get('/api/analytics/jobs/', {'page': 1})
+
+        self.assertEqual(response.data['count'], 16)
+
+
+class RecentActivityTests(AnalyticsTestCase):
+
+    def age_applications(self, applications, days):
+        JobApplication.objects.filter(pk__in=[app.pk for app in applications]).update(
+            stage_updated_at=timezone.now() - timedelta(days=days)
+        )
+        rebuild_action_items()
+
+    def test_items_follow_stage_changes(self):
+        application = self.create_applications(1, stage='technical')[0]
+        self.assertEqual(ActionItem.objects.get(application=application).item_type, 'feedback')
+
+        application.stage = 'offer'
+        application.save()
+        self.assertEqual(ActionItem.objects.get(application=application).item_type, 'offer')
+
+        application.status = 'rejected'
+        application.save()
+        self.assertFalse(ActionItem.objects.filter(application=application).exists())
+
+    def test_returns_due_items_by_priority_in_one_query(self):
+        self.create_applications(1, stage='applied')
+        self.age_applications(self.create_applications(2, stage='applied'), days=2)
+        self.age_applications(self.create_applications(1, stage='offer'), days=6)
+
+        with self.assertNumQueries(1):
+            response = self.client.get('/api/analytics/activity/')
+
+        results = response.data['results']
+        self.assertEqual([item['type'] for item in results], ['offer', 'schedule', 'schedule'])
+        self.assertEqual(results[0]['priority'], 'critical')
+        self.assertEqual(results[0]['job'], 'Backend Engineer')
+
+    def test_mine_filters_by_assigned_recruiter(self):
+        other_job = self.create_job('Designer')
+        self.age_applications(self.create_applications(1, stage='final', job=other_job), days=3)
+        self.age_applications(self.create_applications(1, stage='final'), days=3)
+        self.job.recruiters.add(self.user)
+
+        response = self.client.get('/api/analytics/activity/', {'mine': 'true'})
+
+        self.assertEqual([item['job'] for item in response.data['results']], ['Backend Engineer'])
+        response = self.client.get('/api/analytics/activity/', {'mine': 'false'})
+        self.assertEqual(len(response.data['results']), 2)
+
+    def test_limit_is_clamped(self):
+        self.age_applications(self.create_applications(2, stage='final'), days=3)
+
+        response = self.client.get('/api/analytics/activity/', {'limit': -5})
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(response.data['results']), 1)
+
+
+class SourcePerformanceTests(AnalyticsTestCase):
+
+    def set_source(self, applications, source):
+        Candidate.objects.filter(applications__in=applications).update(source=source)
+
+    def test_refresh_groups_normalized_sources(self):
+        self.set_source(self.create_applications(2, stage='hired'), 'LinkedIn Jobs')
+        self.set_source(self.create_applications(2, stage='applied'), 'linkedin')
+        self.set_source(self.create_applications(1, stage='offer'), 'Referral')
+
+        refresh_source_performance(self.organization)
+
+        linkedin = SourcePerformance.objects.get(organization=self.organization, source_name='LinkedIn')
+        self.assertEqual(linkedin.total_applications, 4)
+        self.assertEqual(linkedin.hires_made, 2)
+        self.assertEqual(linkedin.offer_to_hire_rate, 100)
+        self.assertEqual(linkedin.qualification_rate, 50)
+        referrals = SourcePerformance.objects.get(organization=self.organization, source_name='Referrals')
+        self.assertEqual(referrals.offers_extended, 1)
+
+        response = self.client.get('/api/analytics/sources/')
+        self.assertEqual(response.data['results'][0]['source_name'], 'LinkedIn')
+
+    def test_incremental_refresh_skips_untouched_months(self):
+        old = self.create_applications(1)
+        JobApplication.objects.filter(pk=old[0].pk).update(applied_at=timezone.now() - timedelta(days=70))
+        refresh_source_performance(self.organization)
+        self.assertEqual(refresh_source_performance(self.organization), 0)
+
+        self.create_applications(1)
+
+        self.assertEqual(refresh_source_performance(self.organization), 1)
+
+    def test_arbitrary_period_is_computed_live(self):
+        self.set_source(self.create_applications(3, stage='technical'), 'Indeed')
+        today = timezone.localdate().isoformat()
+
+        response = self.client.get('/api/analytics/sources/', {'start': today, 'end': today})
+
+        self.assertEqual(response.data['results'][0]['source_name'], 'Indeed')
+        self.assertEqual(response.data['results'][0]['qualified_candidates'], 3)
+
+
+class TimeInStageTests(AnalyticsTestCase):
+
+    def log_stays(self, application, stays):
+        """Record consecutive stays as (stage, days) pairs ending now"""
+        at = timezone.now() - timedelta(days=sum(days for _, days in stays))
+        previous = ''
+        for stage, days in stays:
+            StageTransition.objects.create(application=application, from_stage=previous, to_stage=stage, at=at)
+            previous, at = stage, at + timedelta(days=days)
+        StageTransition.objects.create(application=application, from_stage=previous, to_stage='hired', at=at)
+
+    def test_median_and_p90_per_stage_and_job(self):
+        applications = self.create_applications(10)
+        for index, application in enumerate(applications, start=1):
+            self.log_stays(application, [('applied', index), ('screening', 2)])
+
+        response = self.client.get('/api/analytics/time-in-stage/')
+
+        applied = response.data['organization']['applied']
+        self.assertEqual(applied['count'], 10)
+        self.assertAlmostEqual(applied['median_days'], 5.5, places=1)
+        self.assertAlmostEqual(applied['p90_days'], 9.1, places=1)
+        self.assertAlmostEqual(response.data['jobs'][self.job.id]['screening']['median_days'], 2, places=1)
+        # The open-ended hired stay has no exit yet
+        self.assertNotIn('hired', response.data['organization'])
+
+    def test_job_filter_must_be_an_id(self):
+        response = self.client.get('/api/analytics/time-in-stage/', {'job': 'abc'})
+        self.assertEqual(response.status_code, 400)
+        response = self.client.get('/api/analytics/time-in-stage/', {'job': self.job.id})
+        self.assertEqual(response.status_code, 200)
+
+    def test_note_save_does_not_reset_stage_clock(self):
+        application = self.create_applications(1, stage='technical')[0]
+        entered = application.stage_updated_at
+
+        application.overall_rating = 4
+        application.save()
+        application.refresh_from_db()
+
+        self.assertEqual(application.stage_updated_at, entered)
+
+
+class SnapshotExportTests(AnalyticsTestCase):
+
+    def setUp(self):
+        super().setUp()
+        self.output_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.output_dir)
+
+    def test_typed_columns_and_incremental_export(self):
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+
+        first, second = self.create_applications(2, stage='technical')
+        first.move_to_stage('onsite')
+
+        manifest = export_snapshot(self.organization, output_dir=self.output_dir, batch_size=1)
+        applications = pq.read_table(f"{self.output_dir}/{manifest['tables']['applications']['path']}")
+
+        self.assertFalse(manifest['incremental'])
+        self.assertEqual(manifest['tables']['applications']['rows'], 2)
+        self.assertTrue(pa.types.is_dictionary(applications.schema.field('stage').type))
+        self.assertEqual(applications.schema.field('applied_at').type, pa.timestamp('us', tz='UTC'))
+        self.assertEqual(applications.schema.field('overall_rating').type, pa.decimal128(3, 2))
+        self.assertEqual(applications.column('stage').to_pylist(), ['onsite', 'technical'])
+        self.assertEqual(manifest['tables']['transitions']['rows'], 1)
+
+        second.move_to_stage('onsite')
+        manifest = export_snapshot(self.organization, output_dir=self.output_dir)
+
+        self.assertTrue(manifest['incremental'])
+        self.assertEqual(manifest['tables']['applications']['rows'], 1)
+        self.assertEqual(manifest['tables']['jobs']['rows'], 0)
+
+    def test_arrow_format_and_admin_only_endpoint(self):
+        import pyarrow as pa
+
+        self.create_applications(3)
+        response = self.client.post('/api/analytics/snapshots/', {'format': 'arrow'})
+        self.assertEqual(response.status_code, 403)
+
+        self.user.role = 'admin'
+        self.user.save()
+        with self.settings(ANALYTICS_SNAPSHOT_DIR=self.output_dir):
+            response = self.client.post('/api/analytics/snapshots/', {'format': 'arrow'})
+
+        self.assertEqual(response.status_code, 201)
+        with pa.memory_map(f"{self.output_dir}/{response.data['tables']['applications']['path']}") as source:
+            self.assertEqual(pa.ipc.open_file(source).read_all().num_rows, 3)
+
+
+class MetricsSeriesTests(AnalyticsTestCase):
+
+    def backdate(self, applications, days):
+        JobApplication.objects.filter(pk__in=[a.pk for a in applications]).update(
+            applied_at=timezone.now() - timedelta(days=days)
+        )
+
+    def test_daily_counts_grouped_by_stage(self):
+        self.backdate(self.create_applications(2, stage='technical'), 3)
+        self.backdate(self.create_applications(1), 3)
+        self.create_applications(1)
+        start = (timezone.localdate() - timedelta(days=3)).isoformat()
+
+        response = self.client.get('/api/analytics/series/', {'interval': 'day', 'start': start, 'group_by': 'stage'})
+
+        self.assertEqual(response.status_code, 200)
+        points = response.data['points']
+        self.assertEqual(len(points), 4)
+        self.assertEqual(points[0]['groups'], {'technical': 2, 'applied': 1})
+        self.assertEqual(points[-1]['total'], 1)
+
+    def test_closed_buckets_are_served_from_cache(self):
+        self.backdate(self.create_applications(2), 10)
+        params = {'interval': 'day', 'start': (timezone.localdate() - timedelta(days=30)).isoformat()}
+        self.client.get('/api/analytics/series/', params)
+
+        # Only the open bucket (today) is queried again
+        with self.assertNumQueries(1):
+            response = self.client.get('/api/analytics/series/', params)
+        self.assertEqual(sum(point['total'] for point in response.data['points']), 2)
+
+    def test_closed_buckets_follow_stage_moves(self):
+        applications = self.create_applications(2)
+        self.backdate(applications, 10)
+        params = {
+            'interval': 'day', 'group_by': 'stage',
+            'start': (timezone.localdate() - timedelta(days=10)).isoformat(),
+        }
+        self.assertEqual(self.client.get('/api/analytics/series/', params).data['points'][0]['groups'], {'applied': 2})
+
+        with self.captureOnCommitCallbacks(execute=True):
+            applications[0].move_to_stage('screening')
+        groups = self.client.get('/api/analytics/series/', params).data['points'][0]['groups']
+        self.assertEqual(groups, {'applied': 1, 'screening': 1})
+
+    def test_out_of_range_dates_are_rejected(self):
+        for params in ({'end': '0001-01-05'}, {'start': '0001-01-01'}):
+            response = self.client.get('/api/analytics/series/', params)
+            self.assertEqual(response.status_code, 400)
+
+    def test_downsampling_respects_point_budget(self):
+        self.backdate(self.create_applications(3), 40)
+        start = (timezone.localdate() - timedelta(days=89)).isoformat()
+
+        response = self.client.get('/api/analytics/series/', {'interval': 'day', 'start': start, 'points': 10})
+
+        self.assertLessEqual(len(response.data['points']), 10)
+        self.assertEqual(response.data['buckets_per_point'], 9)
+        self.assertEqual(sum(point['total'] for point in response.data['points']), 3)
@@ -2,7 +2,9 @@ from django.urls import path, include
 from rest_framework.routers import DefaultRouter
 from .views import (
     RecruitmentMetricsViewSet, SourcePerformanceViewSet,
-    dashboard_metrics, source_performance, recent_activity, jobs_analytics
+    dashboard_metrics, source_performance, recent_activity, jobs_analytics,
+    time_in_stage_analytics, cache_stats, export_analytics_snapshot,
+    metrics_series
 )
 
 router = DefaultRouter()
@@ -14,4 +16,8 @@ urlpatterns = [
     path('sources/', source_performance, name='source_performance'),
     path('activity/', recent_activity, name='recent_activity'),
     path('jobs/', jobs_analytics, name='jobs_analytics'),
+    path('time-in-stage/', time_in_stage_analytics, name='time_in_stage'),
+    path('series/', metrics_series, name='metrics_series'),
+    path('cache-stats/', cache_stats, name='analytics_cache_stats'),
+    path('snapshots/', export_analytics_snapshot, name='analytics_snapshot'),
 ] + router.urls
\ No newline at end of file
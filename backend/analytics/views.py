@@ -1,18 +1,35 @@
 from rest_framework import viewsets, status
 from rest_framework.decorators import action, api_view, permission_classes
+from rest_framework.exceptions import ParseError
 from rest_framework.response import Response
 from rest_framework.permissions import IsAuthenticated
-from django.db.models import Count, Avg, Q
+from rest_framework.pagination import PageNumberPagination
+from django.db.models import Case, DateTimeField, DurationField, ExpressionWrapper, F, Max, Value, When
+from django.db.models.functions import Coalesce
 from django.utils import timezone
-from datetime import timedelta
-from .models import RecruitmentMetrics, SourcePerformance
-from .serializers import RecruitmentMetricsSerializer, SourcePerformanceSerializer, DashboardMetricsSerializer
+from datetime import date, timedelta
+from .models import RecruitmentMetrics, SourcePerformance, ActionItem
+from .serializers import RecruitmentMetricsSerializer, SourcePerformanceSerializer
+from .aggregates import application_summary, interviews_on, next_action, stage_histograms
+from .rollup import metric_trends
+from .action_items import serialize_item
+from .sources import compute_source_performance
+from .durations import time_in_stage, transitions_for
+from .series import (
+    DEFAULT_MAX_POINTS, MAX_POINTS_LIMIT, MAX_SPAN_DAYS, SERIES_GROUPS, SERIES_INTERVALS, SERIES_METRICS, metric_series
+)
+from .snapshots import ARROW_AVAILABLE, SNAPSHOT_FORMATS, export_snapshot
+from accounts.models import Organization
+from .cache import cached_endpoint, stats as cache_stats_counters
 from jobs.models import Job
-from candidates.models import JobApplication, ApplicationActivity
+from jobs.pipelines import funnel_for
+from candidates.models import JobApplication
+from interviews.models import Interview
 
 
 @api_view(['GET'])
 @permission_classes([IsAuthenticated])
+@cached_endpoint('dashboard')
 def dashboard_metrics(request):
     """Get dashboard metrics for the organization"""
     user = request.user
@@ -21,61 +38,51 @@ def dashboard_metrics(request):
         # Platform admin sees all metrics
         jobs = Job.objects.all()
         applications = JobApplication.objects.all()
+        interviews = Interview.objects.all()
+        metrics = RecruitmentMetrics.objects.all()
     else:
         # Organization-specific metrics
         jobs = Job.objects.filter(organization=user.organization)
         applications = JobApplication.objects.filter(job__organization=user.organization)
+        interviews = Interview.objects.filter(application__job__organization=user.organization)
+        metrics = RecruitmentMetrics.objects.filter(organization=user.organization)
+    
+    today = timezone.localdate()
     
     # Current metrics
     active_jobs = jobs.filter(status='open').count()
-    total_candidates = applications.values('candidate').distinct().count()
-    
-    # Calculate time to fill (average days from posting to hire)
-    hired_applications = applications.filter(stage='hired', job__posted_date__isnull=False)
-    if hired_applications.exists():
-        time_to_fill = sum([
-            (app.stage_updated_at - app.job.posted_date).days 
-            for app in hired_applications if app.job.posted_date
-        ]) / hired_applications.count()
-    else:
-        time_to_fill = 0
+    
+    # Stage histogram, candidates, new applications and time to fill in one query
+    summary = application_summary(applications, today=today, stages=funnel_for(jobs))
+    candidates_by_stage = summary['candidates_by_stage']
+    total_candidates = summary['total_candidates']
+    time_to_fill = summary['time_to_fill']
     
     # Calculate offer acceptance rate
-    offers_extended = applications.filter(stage='offer').count()
-    offers_accepted = applications.filter(stage='hired').count()
+    offers_extended = candidates_by_stage.get('offer', 0)
+    offers_accepted = candidates_by_stage.get('hired', 0)
     offer_rate = (offers_accepted / offers_extended * 100) if offers_extended > 0 else 0
     
     # Mock cost per hire (in real system, this would be calculated from actual costs)
     cost_per_hire = 3200
     
-    # Calculate trends (comparison with previous period)
-    # For demo purposes, using mock data
-    active_jobs_change = 8.5
-    time_to_fill_change = -12.3
-    offer_rate_change = 5.2
-    cost_per_hire_change = -8.1
-    
-    # Candidates by stage
-    candidates_by_stage = {}
-    stage_choices = ['applied', 'screening', 'phone_screen', 'technical', 'onsite', 'final', 'offer', 'hired']
-    for stage in stage_choices:
-        candidates_by_stage[stage] = applications.filter(stage=stage).count()
+    # Trends compare the last 30 days with the 30 before, from the daily rollup
+    trends = metric_trends(metrics, period_days=30, today=today)
     
     # Recent activity counts
-    today = timezone.now().date()
-    interviews_today = 0  # Would need interview model integration
-    offers_pending = applications.filter(stage='offer').count()
-    new_applications = applications.filter(applied_at__date=today).count()
+    interviews_today = interviews_on(interviews, today)
+    offers_pending = candidates_by_stage.get('offer', 0)
+    new_applications = summary['new_applications']
     
     data = {
         'active_jobs': active_jobs,
         'time_to_fill': round(time_to_fill, 1),
         'offer_rate': round(offer_rate, 1),
         'cost_per_hire': cost_per_hire,
-        'active_jobs_change': active_jobs_change,
-        'time_to_fill_change': time_to_fill_change,
-        'offer_rate_change': offer_rate_change,
-        'cost_per_hire_change': cost_per_hire_change,
+        'active_jobs_change': trends['active_jobs_change'],
+        'time_to_fill_change': trends['time_to_fill_change'],
+        'offer_rate_change': trends['offer_rate_change'],
+        'cost_per_hire_change': trends['cost_per_hire_change'],
         'total_candidates': total_candidates,
         'candidates_by_stage': candidates_by_stage,
         'interviews_today': interviews_today,
@@ -88,113 +95,142 @@ def dashboard_metrics(request):
 
 @api_view(['GET'])
 @permission_classes([IsAuthenticated])
+@cached_endpoint('sources')
 def source_performance(request):
     """Get source performance metrics"""
     user = request.user
     
     if user.is_platform_admin:
         sources = SourcePerformance.objects.all()
+        applications = JobApplication.objects.all()
     else:
         sources = SourcePerformance.objects.filter(organization=user.organization)
+        applications = JobApplication.objects.filter(job__organization=user.organization)
+    
+    start = request.query_params.get('start')
+    end = request.query_params.get('end')
+    if start or end:
+        # Arbitrary periods are computed directly from application data
+        try:
+            period_start = date.fromisoformat(start) if start else date.min
+            period_end = date.fromisoformat(end) if end else timezone.localdate()
+        except ValueError:
+            return Response(
+                {'detail': 'start and end must be dates in YYYY-MM-DD format'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        rows = [
+            {'id': None, 'source_name': name, 'cost_per_hire': 0, **counts}
+            for name, counts in compute_source_performance(applications, period_start, period_end).items()
+        ]
+    else:
+        # Otherwise show the most recent precomputed period
+        latest = sources.aggregate(latest=Max('period_end'))['latest']
+        period_start = period_end = None
+        rows = []
+        if latest:
+            period_rows = list(sources.filter(period_end=latest))
+            period_start = min(row.period_start for row in period_rows)
+            period_end = latest
+            rows = [
+                {
+                    'id': source.id,
+                    'source_name': source.source_name,
+                    'total_applications': source.total_applications,
+                    'qualified_candidates': source.qualified_candidates,
+                    'hires_made': source.hires_made,
+                    'qualification_rate': source.qualification_rate,
+                    'offer_to_hire_rate': source.offer_to_hire_rate,
+                    'cost_per_hire': float(source.cost_per_hire) if source.cost_per_hire else 0,
+                }
+                for source in period_rows
+            ]
     
     # Get top 5 sources by conversion rate
-    top_sources = sources.order_by('-offer_to_hire_rate')[:5]
+    rows.sort(key=lambda row: (-row['offer_to_hire_rate'], -row['hires_made']))
     
     source_data = []
-    for source in top_sources:
-        conversion_rate = (source.hires_made / source.total_applications * 100) if source.total_applications > 0 else 0
+    for source in rows[:5]:
+        conversion_rate = (source['hires_made'] / source['total_applications'] * 100) if source['total_applications'] > 0 else 0
         source_data.append({
-            'id': source.id,
-            'source_name': source.source_name,
-            'total_applications': source.total_applications,
-            'qualified_candidates': source.qualified_candidates,
-            'hires_made': source.hires_made,
-            'qualification_rate': source.qualification_rate,
-            'cost_per_hire': float(source.cost_per_hire) if source.cost_per_hire else 0,
+            'id': source['id'],
+            'source_name': source['source_name'],
+            'total_applications': source['total_applications'],
+            'qualified_candidates': source['qualified_candidates'],
+            'hires_made': source['hires_made'],
+            'qualification_rate': source['qualification_rate'],
+            'cost_per_hire': source['cost_per_hire'],
             'conversion_rate': round(conversion_rate, 1),
         })
     
-    return Response({'results': source_data})
+    return Response({
+        'period_start': period_start if period_start != date.min else None,
+        'period_end': period_end,
+        'results': source_data,
+    })
 
 
 @api_view(['GET'])
 @permission_classes([IsAuthenticated])
+@cached_endpoint('activity', vary_on_user=True)
 def recent_activity(request):
     """Get recent activity for next actions"""
     user = request.user
     
     if user.is_platform_admin:
-        applications = JobApplication.objects.all()
+        items = ActionItem.objects.all()
     else:
-        applications = JobApplication.objects.filter(job__organization=user.organization)
+        items = ActionItem.objects.filter(organization=user.organization)
     
-    # Generate next actions based on application stages and timing
-    activities = []
-    
-    # Applications needing feedback
-    pending_feedback = applications.filter(
-        stage__in=['technical', 'onsite', 'final'],
-        stage_updated_at__lt=timezone.now() - timedelta(days=2)
-    )[:5]
-    
-    for app in pending_feedback:
-        activities.append({
-            'id': f"feedback-{app.id}",
-            'type': 'feedback',
-            'title': 'Feedback overdue',
-            'candidate': app.candidate.full_name,
-            'job': app.job.title,
-            'action': 'Submit',
-            'priority': 'high',
-            'created_at': app.stage_updated_at.isoformat(),
-        })
+    # Only show items for jobs the current recruiter is assigned to
+    if str(request.query_params.get('mine', '')).lower() in ('1', 'true', 'yes'):
+        items = items.filter(job__recruiters=user)
     
-    # Offers expiring soon
-    pending_offers = applications.filter(
-        stage='offer',
-        stage_updated_at__lt=timezone.now() - timedelta(days=5)
-    )[:3]
-    
-    for app in pending_offers:
-        activities.append({
-            'id': f"offer-{app.id}",
-            'type': 'offer',
-            'title': 'Offer expires soon',
-            'candidate': app.candidate.full_name,
-            'job': app.job.title,
-            'action': 'Follow Up',
-            'priority': 'critical',
-            'created_at': app.stage_updated_at.isoformat(),
-        })
+    try:
+        limit = max(1, min(int(request.query_params.get('limit', 10)), 100))
+    except ValueError:
+        limit = 10
     
-    # Applications ready for next stage
-    ready_to_advance = applications.filter(
-        stage__in=['applied', 'screening'],
-        stage_updated_at__lt=timezone.now() - timedelta(days=1)
-    )[:4]
-    
-    for app in ready_to_advance:
-        stage_name = 'Phone Screen' if app.stage == 'applied' else 'Technical Interview'
-        activities.append({
-            'id': f"schedule-{app.id}",
-            'type': 'schedule',
-            'title': f'Schedule {stage_name}',
-            'candidate': app.candidate.full_name,
-            'job': app.job.title,
-            'action': 'Schedule',
-            'priority': 'medium',
-            'created_at': app.stage_updated_at.isoformat(),
-        })
+    # Items become due once the application has aged past its threshold
+    due_items = items.filter(due_at__lte=timezone.now()).order_by('priority', 'due_at')[:limit]
     
-    # Sort by priority and limit
-    priority_order = {'critical': 0, 'high': 1, 'medium': 2, 'low': 3}
-    activities.sort(key=lambda x: priority_order.get(x['priority'], 4))
-    
-    return Response({'results': activities[:10]})
+    return Response({'results': [serialize_item(item) for item in due_items]})
+
+
+URGENCY_RANK = {'critical': 0, 'high': 1, 'medium': 2, 'low': 3}
+
+JOB_ORDERINGS = {
+    'urgency': ('urgency_rank', 'on_time', 'opened_at', 'pk'),
+    'overdue': ('deadline', 'urgency_rank', 'pk'),
+}
+
+
+def with_job_deadlines(jobs, now):
+    """
+    Alias what jobs_analytics orders by, in SQL: urgency_rank, opened_at
+    (posted_date, or now when never posted, as Job.days_open counts it),
+    deadline (opened_at plus sla_days) and on_time (0 once Job.is_overdue).
+    """
+    day = Value(timedelta(days=1))
+    jobs = jobs.alias(
+        urgency_rank=Case(
+            *[When(urgency=urgency, then=Value(rank)) for urgency, rank in URGENCY_RANK.items()],
+            default=Value(len(URGENCY_RANK)),
+        ),
+        opened_at=Coalesce('posted_date', Value(now), output_field=DateTimeField()),
+    ).alias(
+        deadline=ExpressionWrapper(
+            F('opened_at') + ExpressionWrapper(F('sla_days') * day, output_field=DurationField()),
+            output_field=DateTimeField(),
+        ),
+    )
+    # is_overdue means more than sla_days whole days open, i.e. a day past the deadline
+    return jobs.alias(on_time=Case(When(deadline__lte=now - timedelta(days=1), then=Value(0)), default=Value(1)))
 
 
 @api_view(['GET'])
 @permission_classes([IsAuthenticated])
+@cached_endpoint('jobs')
 def jobs_analytics(request):
     """Get analytics for active jobs"""
     user = request.user
@@ -204,45 +240,146 @@ def jobs_analytics(request):
     else:
         jobs = Job.objects.filter(organization=user.organization)
     
-    # Get active jobs with analytics
-    active_jobs = jobs.filter(status='open').select_related('department')
+    # Order by urgency (default) or by how far past SLA each job is
+    ordering = request.query_params.get('ordering', 'urgency')
+    if ordering not in JOB_ORDERINGS:
+        return Response(
+            {'detail': f"ordering must be one of: {', '.join(JOB_ORDERINGS)}"},
+            status=status.HTTP_400_BAD_REQUEST
+        )
+    active_jobs = with_job_deadlines(
+        jobs.filter(status='open').select_related('department'), timezone.now()
+    ).order_by(*JOB_ORDERINGS[ordering])
+    
+    paginator = PageNumberPagination()
+    page = paginator.paginate_queryset(active_jobs, request)
+    
+    # One query over the per-stage counters covers every job on the page
+    histograms = stage_histograms(page)
     
     jobs_data = []
-    for job in active_jobs:
-        applications = job.applications.all()
-        
-        # Count candidates by stage
-        candidates_by_stage = {}
-        stage_choices = ['applied', 'screening', 'phone_screen', 'technical', 'onsite', 'final', 'offer', 'hired']
-        for stage in stage_choices:
-            candidates_by_stage[stage] = applications.filter(stage=stage).count()
-        
-        # Determine next action
-        if applications.filter(stage='applied').exists():
-            next_action = f"Review {applications.filter(stage='applied').count()} applications"
-        elif applications.filter(stage='screening').exists():
-            next_action = f"Schedule {applications.filter(stage='screening').count()} phone screens"
-        elif applications.filter(stage__in=['technical', 'onsite', 'final']).exists():
-            next_action = f"Conduct {applications.filter(stage__in=['technical', 'onsite', 'final']).count()} interviews"
-        elif applications.filter(stage='offer').exists():
-            next_action = f"Follow up on {applications.filter(stage='offer').count()} offers"
-        else:
-            next_action = "Post job to attract candidates"
+    for job in page:
+        candidates_by_stage = histograms[job.id]
         
         jobs_data.append({
             'id': job.id,
             'title': job.title,
             'department_name': job.department.name if job.department else 'No Department',
-            'applications_count': applications.count(),
+            'applications_count': sum(candidates_by_stage.values()),
             'candidates_by_stage': candidates_by_stage,
             'days_open': job.days_open,
             'urgency': job.urgency,
-            'next_action': next_action,
+            'next_action': next_action(candidates_by_stage),
             'sla_days': job.sla_days,
             'is_overdue': job.is_overdue,
         })
     
-    return Response({'results': jobs_data})
+    return paginator.get_paginated_response(jobs_data)
+
+
+@api_view(['GET'])
+@permission_classes([IsAuthenticated])
+@cached_endpoint('time_in_stage')
+def time_in_stage_analytics(request):
+    """Median and p90 days spent in each stage, per organization and per job"""
+    job_id = request.query_params.get('job')
+    if job_id:
+        try:
+            job_id = int(job_id)
+        except ValueError:
+            return Response({'detail': 'job must be a job id'}, status=status.HTTP_400_BAD_REQUEST)
+    transitions = transitions_for(request.user, job_id=job_id or None)
+    return Response(time_in_stage(transitions))
+
+
+@api_view(['GET'])
+@permission_classes([IsAuthenticated])
+def metrics_series(request):
+    """Counts per day/week/month for applications, interviews or hires, optionally grouped"""
+    params = request.query_params
+    metric = params.get('metric', 'applications')
+    interval = params.get('interval', 'week')
+    group_by = params.get('group_by') or None
+    for name, value, allowed in (
+        ('metric', metric, SERIES_METRICS),
+        ('interval', interval, SERIES_INTERVALS),
+        ('group_by', group_by, SERIES_GROUPS),
+    ):
+        if value is not None and value not in allowed:
+            return Response(
+                {'detail': f'{name} must be one of: {", ".join(allowed)}'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+    
+    today = timezone.localdate()
+    try:
+        end = date.fromisoformat(params['end']) if params.get('end') else today
+        start = date.fromisoformat(params['start']) if params.get('start') else end - timedelta(days=365)
+        max_points = int(params.get('points', DEFAULT_MAX_POINTS))
+    except (ValueError, OverflowError):
+        return Response(
+            {'detail': 'start and end must be dates in YYYY-MM-DD format and points an integer'},
+            status=status.HTTP_400_BAD_REQUEST
+        )
+    if start > end:
+        return Response({'detail': 'start must not be after end'}, status=status.HTTP_400_BAD_REQUEST)
+    if (end - start).days > MAX_SPAN_DAYS:
+        return Response(
+            {'detail': f'start and end may be at most {MAX_SPAN_DAYS} days apart'},
+            status=status.HTTP_400_BAD_REQUEST
+        )
+    max_points = min(max(max_points, 1), MAX_POINTS_LIMIT)
+    
+    return Response(metric_series(
+        request.user, metric, interval, start, end, today,
+        group_by=group_by, max_points=max_points
+    ))
+
+
+@api_view(['GET'])
+@permission_classes([IsAuthenticated])
+def cache_stats(request):
+    """Hit/miss counters for the analytics result cache in this process"""
+    if not request.user.is_platform_admin:
+        return Response(
+            {'detail': 'Only platform admins can view cache statistics'},
+            status=status.HTTP_403_FORBIDDEN
+        )
+    return Response({'results': cache_stats_counters.snapshot()})
+
+
+@api_view(['POST'])
+@permission_classes([IsAuthenticated])
+def export_analytics_snapshot(request):
+    """Write a Parquet / Arrow snapshot of the organization's hiring data"""
+    user = request.user
+    if not (user.is_org_admin or user.is_platform_admin):
+        return Response(
+            {'detail': 'Only admins can export analytics snapshots'},
+            status=status.HTTP_403_FORBIDDEN
+        )
+    if not ARROW_AVAILABLE:
+        return Response(
+            {'detail': 'Snapshot export not available. Install pyarrow'},
+            status=status.HTTP_503_SERVICE_UNAVAILABLE
+        )
+    
+    file_format = request.data.get('format', 'parquet')
+    if file_format not in SNAPSHOT_FORMATS:
+        return Response(
+            {'detail': f'format must be one of: {", ".join(SNAPSHOT_FORMATS)}'},
+            status=status.HTTP_400_BAD_REQUEST
+        )
+    
+    organization = user.organization
+    if user.is_platform_admin and request.data.get('organization'):
+        organization = Organization.objects.filter(slug=request.data['organization']).first()
+    if organization is None:
+        return Response({'detail': 'Organization not found'}, status=status.HTTP_400_BAD_REQUEST)
+    
+    full = str(request.data.get('full', '')).lower() in ('1', 'true', 'yes')
+    manifest = export_snapshot(organization, file_format=file_format, full=full)
+    return Response(manifest, status=status.HTTP_201_CREATED)
 
 
 class RecruitmentMetricsViewSet(viewsets.ReadOnlyModelViewSet):
@@ -252,8 +389,38 @@ class RecruitmentMetricsViewSet(viewsets.ReadOnlyModelViewSet):
     def get_queryset(self):
         user = self.request.user
         if user.is_platform_admin:
-            return RecruitmentMetrics.objects.all()
-        return RecruitmentMetrics.objects.filter(organization=user.organization)
+            queryset = RecruitmentMetrics.objects.all()
+        else:
+            queryset = RecruitmentMetrics.objects.filter(organization=user.organization)
+        
+        # Filter by date range (YYYY-MM-DD)
+        start = self.request.query_params.get('start')
+        end = self.request.query_params.get('end')
+        try:
+            if start:
+                queryset = queryset.filter(date__gte=date.fromisoformat(start))
+            if end:
+                queryset = queryset.filter(date__lte=date.fromisoformat(end))
+        except ValueError:
+            raise ParseError('start and end must be dates in YYYY-MM-DD format')
+        
+        return queryset
+    
+    @action(detail=False, methods=['get'])
+    def trends(self, request):
+        """Period-over-period changes derived from the daily rollup"""
+        try:
+            period = int(request.query_params.get('period', 30))
+        except ValueError:
+            period = 0
+        if not 0 < period <= MAX_SPAN_DAYS:
+            return Response(
+                {'detail': f'period must be a positive number of days, at most {MAX_SPAN_DAYS}'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        
+        trends = metric_trends(self.get_queryset(), period_days=period)
+        return Response({'period_days': period, **trends})
 
 
 class SourcePerformanceViewSet(viewsets.ReadOnlyModelViewSet):
@@ -2,6 +2,7 @@ from django.contrib import admin
 from django.utils.html import format_html
 from django.urls import reverse
 from django.utils.safestring import mark_safe
+from jobs.pipelines import pipeline_for
 from .models import Candidate, JobApplication, ApplicationActivity
 
 
@@ -129,19 +130,10 @@ class JobApplicationAdmin(admin.ModelAdmin):
     actions = ['advance_to_next_stage', 'reject_applications', 'move_to_offer']
     
     def advance_to_next_stage(self, request, queryset):
-        stage_progression = {
-            'applied': 'screening',
-            'screening': 'phone_screen',
-            'phone_screen': 'technical',
-            'technical': 'onsite',
-            'onsite': 'final',
-            'final': 'offer',
-        }
-        
         updated = 0
         for application in queryset:
-            if application.stage in stage_progression:
-                new_stage = stage_progression[application.stage]
+            new_stage = pipeline_for(application.job).advance(application.stage)
+            if new_stage is not None:
                 application.stage = new_stage
                 application.save()
                 
@@ -0,0 +1,154 @@
+"""
+Bulk stage moves and rejections for many applications at once.
+
+Each operation loads the requested applications once, writes them with
+one bulk_update and logs transitions and activities with bulk_create,
+all in a single transaction. bulk_update and bulk_create skip model
+signals, so the work those signals normally do (stage counters, action
+items, cache versions and the sync change log) is done here explicitly,
+once per batch.
+"""
+from collections import Counter
+from django.db import transaction
+from django.utils import timezone
+from analytics.action_items import rebuild_action_items
+from recruitment_backend.versions import bump_version_on_commit
+from jobs.counters import adjust_stage_count
+from jobs.models import Job
+from jobs.pipelines import pipelines_for
+from sync.changes import record_changes
+from .models import ApplicationActivity, JobApplication, StageTransition
+
+BULK_MAX_IDS = 500
+
+
+def parse_ids(value):
+    """A list of unique application ids, or None if `value` is not one"""
+    if not isinstance(value, list) or not value or len(value) > BULK_MAX_IDS:
+        return None
+    try:
+        ids = [int(item) for item in value]
+    except (TypeError, ValueError):
+        return None
+    return list(dict.fromkeys(ids))
+
+
+def _lock(queryset, ids):
+    applications = queryset.select_related(None).select_for_update().filter(pk__in=ids)
+    return {application.pk: application for application in applications}
+
+
+def _outcomes(ids, found, changed, done_status, refused=()):
+    results = []
+    for application_id in ids:
+        if application_id not in found:
+            results.append({'id': application_id, 'status': 'not_found'})
+        elif application_id in refused:
+            results.append({'id': application_id, 'status': 'not_allowed'})
+        elif application_id in changed:
+            results.append({'id': application_id, 'status': done_status})
+        else:
+            results.append({'id': application_id, 'status': 'unchanged'})
+    return results
+
+
+def _after_write(applications):
+    """Signal-equivalent bookkeeping for applications changed by a bulk write"""
+    ids = [application.pk for application in applications]
+    rebuild_action_items(JobApplication.objects.filter(pk__in=ids))
+
+    organizations = dict(Job.objects.filter(
+        pk__in={application.job_id for application in applications}
+    ).values_list('id', 'organization_id'))
+    by_organization = {}
+    for application in applications:
+        by_organization.setdefault(organizations[application.job_id], []).append(application.pk)
+    for organization_id, object_ids in by_organization.items():
+        bump_version_on_commit(organization_id)
+        record_changes(JobApplication, object_ids, 'updated', organization_id)
+
+
+def bulk_move_to_stage(queryset, ids, stage, actor=None):
+    """
+    Move the applications in `queryset` with the given ids to `stage`.
+
+    Returns one {'id', 'status'} outcome per id: 'moved', 'unchanged'
+    (already in that stage), 'not_allowed' (the job's pipeline has no such
+    move) or 'not_found' (missing or another tenant's).
+    """
+    now = timezone.now()
+    with transaction.atomic():
+        found = _lock(queryset, ids)
+        pipelines = pipelines_for({application.job_id for application in found.values()})
+        moving = [application for application in found.values() if application.stage != stage]
+        refused = {
+            application.pk for application in moving
+            if not pipelines[application.job_id].allows(application.stage, stage)
+        }
+        changed = [application for application in moving if application.pk not in refused]
+
+        deltas = Counter()
+        transitions, activities = [], []
+        for application in changed:
+            deltas[(application.job_id, application.stage)] -= 1
+            deltas[(application.job_id, stage)] += 1
+            transitions.append(StageTransition(
+                application=application, from_stage=application.stage, to_stage=stage, at=now, actor=actor
+            ))
+            activities.append(ApplicationActivity(
+                application=application, user=actor, activity_type='stage_change',
+                description=f'Moved to {stage} stage'
+            ))
+            application.stage = stage
+            application.stage_updated_at = now
+            application.updated_at = now
+            application.version += 1
+
+        JobApplication.objects.bulk_update(changed, ['stage', 'stage_updated_at', 'updated_at', 'version'])
+        StageTransition.objects.bulk_create(transitions)
+        ApplicationActivity.objects.bulk_create(activities)
+        for (job_id, counted_stage), delta in deltas.items():
+            adjust_stage_count(job_id, counted_stage, delta)
+        if changed:
+            _after_write(changed)
+
+    return _outcomes(ids, found, {application.pk for application in changed}, 'moved', refused)
+
+
+def bulk_reject(queryset, ids, reason='', actor=None):
+    """
+    Reject the applications in `queryset` with the given ids.
+
+    Returns one {'id', 'status'} outcome per id: 'rejected', 'unchanged'
+    (already rejected) or 'not_found'.
+    """
+    now = timezone.now()
+    with transaction.atomic():
+        found = _lock(queryset, ids)
+        changed = [application for application in found.values() if application.status != 'rejected']
+
+        transitions, activities = [], []
+        for application in changed:
+            # Rejection ends the time spent in the current stage
+            transitions.append(StageTransition(
+                application=application, from_stage=application.stage, to_stage='rejected', at=now, actor=actor
+            ))
+            activities.append(ApplicationActivity(
+                application=application, user=actor, activity_type='stage_change',
+                description=f'Application rejected: {reason}'
+            ))
+            application.status = 'rejected'
+            application.rejection_reason = reason
+            application.rejected_at = now
+            application.updated_at = now
+            application.version += 1
+
+        JobApplication.objects.bulk_update(
+            changed, ['status', 'rejection_reason', 'rejected_at', 'updated_at', 'version']
+        )
+        StageTransition.objects.bulk_create(transitions)
+        ApplicationActivity.objects.bulk_create(activities)
+        if changed:
+            _after_write(changed)
+
+    return _outcomes(ids, found, {application.pk for application in changed}, 'rejected')
@@ -0,0 +1,33 @@
+# Generated by Django 5.0.2 on 2026-10-18 03:35
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('accounts', '0001_initial'),
+        ('candidates', '0003_stagetransition'),
+        ('jobs', '0003_jobstagecount'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='applicationactivity',
+            index=models.Index(fields=['-created_at', '-id'], name='app_activities_keyset_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='candidate',
+            index=models.Index(fields=['organization', '-created_at', '-id'], name='candidates_keyset_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='candidatenote',
+            index=models.Index(fields=['candidate', '-created_at', '-id'], name='candidate_notes_keyset_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='jobapplication',
+            index=models.Index(fields=['-applied_at', '-id'], name='job_apps_keyset_idx'),
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 5.0.2 on 2026-10-18 03:47
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('candidates', '0004_keyset_indexes'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='jobapplication',
+            name='version',
+            field=models.PositiveIntegerField(default=1),
+        ),
+    ]
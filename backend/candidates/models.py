@@ -1,6 +1,8 @@
-from django.db import models
+from django.db import models, transaction
+from django.db.models.signals import post_save
 from django.contrib.auth import get_user_model
 from django.core.validators import MinValueValidator, MaxValueValidator
+from django.utils import timezone
 
 User = get_user_model()
 
@@ -46,6 +48,9 @@ class Candidate(models.Model):
         db_table = 'candidates'
         unique_together = ['organization', 'email']
         ordering = ['-created_at']
+        indexes = [
+            models.Index(fields=['organization', '-created_at', '-id'], name='candidates_keyset_idx'),
+        ]
     
     def __str__(self):
         return f"{self.first_name} {self.last_name} ({self.email})"
@@ -55,6 +60,10 @@ class Candidate(models.Model):
         return f"{self.first_name} {self.last_name}"
 
 
+class StaleApplication(Exception):
+    """A conditional update found the application changed since it was read"""
+
+
 class JobApplication(models.Model):
     STAGE_CHOICES = [
         ('applied', 'Applied'),
@@ -96,7 +105,7 @@ class JobApplication(models.Model):
     
     # Tracking
     applied_at = models.DateTimeField(auto_now_add=True)
-    stage_updated_at = models.DateTimeField(auto_now=True)
+    stage_updated_at = models.DateTimeField(default=timezone.now)  # only changes with the stage
     rejected_at = models.DateTimeField(null=True, blank=True)
     rejection_reason = models.TextField(blank=True)
     
@@ -108,14 +117,96 @@ class JobApplication(models.Model):
     
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
+    version = models.PositiveIntegerField(default=1)  # bumped on every write, for optimistic concurrency
     
     class Meta:
         db_table = 'job_applications'
         unique_together = ['job', 'candidate']
         ordering = ['-applied_at']
+        indexes = [
+            models.Index(fields=['-applied_at', '-id'], name='job_apps_keyset_idx'),
+        ]
     
     def __str__(self):
         return f"{self.candidate.full_name} - {self.job.title}"
+    
+    def save(self, *args, **kwargs):
+        if not self._state.adding:
+            self.version += 1
+            if kwargs.get('update_fields') is not None:
+                kwargs['update_fields'] = {*kwargs['update_fields'], 'version'}
+        super().save(*args, **kwargs)
+    
+    def conditional_update(self, expected=None, **values):
+        """
+        Write `values` with a single UPDATE ... WHERE pk = <pk> AND <expected>.
+        
+        `expected` maps fields to the values the row must still hold and
+        defaults to the version this instance was read at. Raises
+        StaleApplication when the row no longer matches, so concurrent
+        writers get a conflict instead of overwriting each other, without
+        taking row locks. Model signals are sent as for save().
+        """
+        if expected is None:
+            expected = {'version': self.version}
+        values['updated_at'] = timezone.now()
+        updated = JobApplication.objects.filter(pk=self.pk, **expected).update(
+            version=models.F('version') + 1, **values
+        )
+        if not updated:
+            raise StaleApplication(self.pk)
+        
+        for field, value in values.items():
+            setattr(self, field, value)
+        if 'version' in expected:
+            self.version = expected['version'] + 1
+        else:
+            self.version = JobApplication.objects.filter(pk=self.pk).values_list('version', flat=True).get()
+        post_save.send(
+            sender=JobApplication, instance=self, created=False, raw=False,
+            using=self._state.db, update_fields=frozenset([*values, 'version'])
+        )
+    
+    def move_to_stage(self, stage, actor=None, expected=None, **values):
+        """
+        Change stage (and any other `values`), stamp stage_updated_at and log
+        the transition. The UPDATE is conditional on `expected`, by default
+        the stage this instance holds; raises StaleApplication on conflict.
+        """
+        previous_stage = self.stage
+        if expected is None:
+            expected = {'stage': previous_stage}
+        now = timezone.now()
+        with transaction.atomic():
+            self.conditional_update(expected, stage=stage, stage_updated_at=now, **values)
+            return StageTransition.objects.create(
+                application=self, from_stage=previous_stage, to_stage=stage, at=now, actor=actor
+            )
+
+
+class StageTransition(models.Model):
+    """Append-only log of application stage changes"""
+    application = models.ForeignKey(JobApplication, on_delete=models.CASCADE, related_name='transitions')
+    from_stage = models.CharField(max_length=20, blank=True)  # blank for the initial stage
+    to_stage = models.CharField(max_length=20)
+    at = models.DateTimeField(default=timezone.now)
+    actor = models.ForeignKey(User, on_delete=models.SET_NULL, null=True, blank=True, related_name='stage_transitions')
+    
+    class Meta:
+        db_table = 'stage_transitions'
+        ordering = ['at']
+        indexes = [
+            models.Index(fields=['application', 'at'], name='stage_trans_application_idx'),
+            models.Index(fields=['to_stage', 'at'], name='stage_trans_stage_idx'),
+        ]
+    
+    def __str__(self):
+        return f"{self.application_id}: {self.from_stage or '-'} -> {self.to_stage}"
+    
+    def save(self, *args, **kwargs):
+        if self.pk is not None:
+            raise ValueError('Stage transitions are append-only')
+        super().save(*args, **kwargs)
 
 
 class ApplicationActivity(models.Model):
@@ -140,6 +231,9 @@ class ApplicationActivity(models.Model):
     class Meta:
         db_table = 'application_activities'
         ordering = ['-created_at']
+        indexes = [
+            models.Index(fields=['-created_at', '-id'], name='app_activities_keyset_idx'),
+        ]
     
     def __str__(self):
         return f"{self.activity_type} - {self.application}"
@@ -174,6 +268,9 @@ class CandidateNote(models.Model):
     class Meta:
         db_table = 'candidate_notes'
         ordering = ['-created_at']
+        indexes = [
+            models.Index(fields=['candidate', '-created_at', '-id'], name='candidate_notes_keyset_idx'),
+        ]
     
     def __str__(self):
         return f"Note for {self.candidate.full_name} - {self.note_type}"
\ No newline at end of file
@@ -1,10 +1,12 @@
 from rest_framework import serializers
-from .models import Candidate, JobApplication, ApplicationActivity, CandidateNote
+from recruitment_backend.serializers import SparseFieldsMixin
+from .models import Candidate, JobApplication, ApplicationActivity, CandidateNote, StageTransition, StaleApplication
+from jobs.pipelines import pipeline_for
 from jobs.serializers import JobListSerializer
 from accounts.serializers import UserSerializer
 
 
-class CandidateSerializer(serializers.ModelSerializer):
+class CandidateSerializer(SparseFieldsMixin, serializers.ModelSerializer):
     full_name = serializers.CharField(read_only=True)
     referrer_details = UserSerializer(source='referrer', read_only=True)
     
@@ -18,10 +20,11 @@ class CandidateSerializer(serializers.ModelSerializer):
             'source', 'referrer', 'referrer_details', 'tags', 'notes',
             'created_at', 'updated_at'
         ]
+        expandable_fields = ['referrer_details']
         read_only_fields = ['id', 'created_at', 'updated_at']
 
 
-class ApplicationActivitySerializer(serializers.ModelSerializer):
+class ApplicationActivitySerializer(SparseFieldsMixin, serializers.ModelSerializer):
     user_details = UserSerializer(source='user', read_only=True)
     
     class Meta:
@@ -30,10 +33,11 @@ class ApplicationActivitySerializer(serializers.ModelSerializer):
             'id', 'application', 'user', 'user_details', 'activity_type',
             'description', 'metadata', 'created_at'
         ]
+        expandable_fields = ['user_details']
         read_only_fields = ['id', 'created_at']
 
 
-class JobApplicationSerializer(serializers.ModelSerializer):
+class JobApplicationSerializer(SparseFieldsMixin, serializers.ModelSerializer):
     job_details = JobListSerializer(source='job', read_only=True)
     candidate_details = CandidateSerializer(source='candidate', read_only=True)
     activities = ApplicationActivitySerializer(many=True, read_only=True)
@@ -45,9 +49,31 @@ class JobApplicationSerializer(serializers.ModelSerializer):
             'stage', 'status', 'overall_rating', 'ai_score', 'application_responses',
             'applied_at', 'stage_updated_at', 'rejected_at', 'rejection_reason',
             'offer_extended_at', 'offer_amount', 'offer_accepted_at', 'start_date',
-            'activities', 'created_at', 'updated_at'
+            'activities', 'created_at', 'updated_at', 'version'
         ]
+        expandable_fields = ['job_details', 'candidate_details', 'activities']
         read_only_fields = ['id', 'applied_at', 'stage_updated_at', 'created_at', 'updated_at']
+    
+    def update(self, instance, validated_data):
+        # Clients may send the version they read; the write only applies if
+        # nobody else has written since
+        if validated_data.pop('version', instance.version) != instance.version:
+            raise StaleApplication(instance.pk)
+        expected = {'version': instance.version}
+        
+        new_stage = validated_data.pop('stage', instance.stage)
+        if new_stage == instance.stage:
+            instance.conditional_update(expected, **validated_data)
+            return instance
+        
+        if not pipeline_for(instance.job).allows(instance.stage, new_stage):
+            raise serializers.ValidationError({'stage': f'Cannot move from {instance.stage} to {new_stage}'})
+        
+        request = self.context.get('request')
+        instance.move_to_stage(
+            new_stage, actor=request.user if request else None, expected=expected, **validated_data
+        )
+        return instance
 
 
 class JobApplicationCreateSerializer(serializers.ModelSerializer):
@@ -76,8 +102,17 @@ class JobApplicationCreateSerializer(serializers.ModelSerializer):
             candidate = Candidate.objects.get(id=candidate_id)
         
         validated_data['candidate'] = candidate
+        validated_data['stage'] = pipeline_for(validated_data['job']).initial
         application = JobApplication.objects.create(**validated_data)
         
+        # Log the initial stage so time-in-stage covers it
+        StageTransition.objects.create(
+            application=application,
+            to_stage=application.stage,
+            at=application.applied_at,
+            actor=self.context['request'].user
+        )
+        
         # Create initial activity
         ApplicationActivity.objects.create(
             application=application,
@@ -89,7 +124,7 @@ class JobApplicationCreateSerializer(serializers.ModelSerializer):
         return application
 
 
-class JobApplicationListSerializer(serializers.ModelSerializer):
+class JobApplicationListSerializer(SparseFieldsMixin, serializers.ModelSerializer):
     candidate_name = serializers.CharField(source='candidate.full_name', read_only=True)
     job_title = serializers.CharField(source='job.title', read_only=True)
     
@@ -97,11 +132,11 @@ class JobApplicationListSerializer(serializers.ModelSerializer):
         model = JobApplication
         fields = [
             'id', 'job', 'job_title', 'candidate', 'candidate_name', 'stage',
-            'status', 'overall_rating', 'applied_at', 'stage_updated_at'
+            'status', 'overall_rating', 'applied_at', 'stage_updated_at', 'version'
         ]
 
 
-class CandidateListSerializer(serializers.ModelSerializer):
+class CandidateListSerializer(SparseFieldsMixin, serializers.ModelSerializer):
     applications_count = serializers.SerializerMethodField()
     latest_application = serializers.SerializerMethodField()
     
@@ -112,21 +147,21 @@ class CandidateListSerializer(serializers.ModelSerializer):
             'location', 'source', 'created_at', 'applications_count', 'latest_application'
         ]
     
+    # Both fields read annotations added by CandidateViewSet.get_queryset (see with_application_summary)
     def get_applications_count(self, obj):
-        return obj.applications.count()
+        return obj.applications_total
     
     def get_latest_application(self, obj):
-        latest = obj.applications.order_by('-applied_at').first()
-        if latest:
+        if obj.latest_applied_at:
             return {
-                'job_title': latest.job.title,
-                'stage': latest.stage,
-                'applied_at': latest.applied_at
+                'job_title': obj.latest_job_title,
+                'stage': obj.latest_stage,
+                'applied_at': obj.latest_applied_at
             }
         return None
 
 
-class CandidateNoteSerializer(serializers.ModelSerializer):
+class CandidateNoteSerializer(SparseFieldsMixin, serializers.ModelSerializer):
     created_by_details = UserSerializer(source='created_by', read_only=True)
     
     class Meta:
@@ -136,4 +171,5 @@ class CandidateNoteSerializer(serializers.ModelSerializer):
             'created_by', 'created_by_details', 'created_at', 'updated_at',
             'is_private', 'visible_to_candidate'
         ]
+        expandable_fields = ['created_by_details']
         read_only_fields = ['id', 'created_at', 'updated_at']
\ No newline at end of file
@@ -1,3 +1,405 @@
-from django.test import TestCase
+import json
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.db import connection
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from rest_framework.test import APIClient
+from accounts.models import Organization
+from jobs.models import Job
+from sync.changes import changes_since, latest_cursor
+from .models import ApplicationActivity, Candidate, JobApplication, StageTransition, StaleApplication
 
-# Create your tests here.
+User = get_user_model()
+
+
+class CandidatesTestCase(TestCase):
+    """Shared fixtures for candidate and application API tests"""
+
+    def setUp(self):
+        self.organization = Organization.objects.create(name='Acme', slug='acme')
+        self.user = User.objects.create_user(
+            username='recruiter', email='recruiter@acme.test', password='secret',
+            organization=self.organization, role='recruiter'
+        )
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+        self.job = Job.objects.create(
+            organization=self.organization, title='Backend Engineer', description='Build things',
+            requirements='Python', location='Remote', status='open'
+        )
+
+    def create_candidate(self, index, **kwargs):
+        defaults = {
+            'organization': self.organization,
+            'first_name': 'Candidate',
+            'last_name': str(index),
+            'email': f'candidate{index}@example.com',
+            'phone': '555-0100',
+        }
+        defaults.update(kwargs)
+        return Candidate.objects.create(**defaults)
+
+    def create_application(self, index, stage='applied', job=None):
+        return JobApplication.objects.create(
+            job=job or self.job, candidate=self.create_candidate(index), stage=stage
+        )
+
+
+class StageTransitionTests(CandidatesTestCase):
+
+    def test_advance_and_reject_are_logged(self):
+        application = self.create_application(1)
+
+        self.client.post(f'/api/applications/{application.id}/advance_stage/')
+        self.client.post(f'/api/applications/{application.id}/reject/', {'reason': 'Position filled'})
+
+        transitions = list(application.transitions.values_list('from_stage', 'to_stage', 'actor'))
+        self.assertEqual(transitions, [
+            ('applied', 'screening', self.user.id),
+            ('screening', 'rejected', self.user.id),
+        ])
+
+    def test_serializer_stage_update_is_logged(self):
+        application = self.create_application(1, stage='technical')
+
+        self.client.patch(f'/api/applications/{application.id}/', {'stage': 'onsite'}, format='json')
+        self.client.patch(f'/api/applications/{application.id}/', {'overall_rating': '4.00'}, format='json')
+
+        self.assertEqual(
+            list(StageTransition.objects.values_list('from_stage', 'to_stage')),
+            [('technical', 'onsite')]
+        )
+
+
+class ExportTests(CandidatesTestCase):
+
+    def test_csv_export_is_streamed_and_tenant_scoped(self):
+        self.create_application(1, stage='technical')
+        self.create_application(2)
+        other = Organization.objects.create(name='Other', slug='other')
+        Candidate.objects.create(
+            organization=other, first_name='Hidden', last_name='Person',
+            email='hidden@example.com', phone='555-0199'
+        )
+
+        response = self.client.get('/api/candidates/export/')
+
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response.streaming)
+        lines = b''.join(response.streaming_content).decode().splitlines()
+        self.assertEqual(lines[0].split(',')[:4], ['id', 'first_name', 'last_name', 'email'])
+        self.assertEqual(len(lines), 3)
+        self.assertNotIn('hidden@example.com', '\n'.join(lines))
+
+    def test_ndjson_export_applies_filters(self):
+        self.create_application(1, stage='technical')
+        self.create_application(2)
+
+        response = self.client.get('/api/applications/export/', {'file_format': 'ndjson', 'stage': 'technical'})
+
+        self.assertEqual(response['Content-Type'], 'application/x-ndjson')
+        rows = [json.loads(line) for line in b''.join(response.streaming_content).splitlines()]
+        self.assertEqual(len(rows), 1)
+        self.assertEqual(rows[0]['stage'], 'technical')
+        self.assertEqual(rows[0]['job_title'], 'Backend Engineer')
+        self.assertEqual(rows[0]['candidate_email'], 'candidate1@example.com')
+
+    def test_unknown_format_is_rejected(self):
+        response = self.client.get('/api/candidates/export/', {'file_format': 'xlsx'})
+        self.assertEqual(response.status_code, 400)
+
+
+class CandidateListTests(CandidatesTestCase):
+
+    def test_list_reads_annotations_in_constant_queries(self):
+        first = self.create_application(1, stage='technical').candidate
+        # ETag validators, page count, annotated page
+        with self.assertNumQueries(3) as few_candidates:
+            self.client.get('/api/candidates/')
+
+        other_job = Job.objects.create(
+            organization=self.organization, title='Data Engineer', description='Pipelines',
+            requirements='SQL', location='Remote', status='open'
+        )
+        latest = JobApplication.objects.create(job=other_job, candidate=first, stage='offer')
+        for index in range(2, 12):
+            self.create_application(index)
+        self.create_candidate(99)
+
+        with self.assertNumQueries(len(few_candidates.captured_queries)):
+            response = self.client.get('/api/candidates/')
+
+        rows = {row['id']: row for row in response.data['results']}
+        self.assertEqual(rows[first.id]['applications_count'], 2)
+        self.assertEqual(rows[first.id]['latest_application']['job_title'], 'Data Engineer')
+        self.assertEqual(rows[first.id]['latest_application']['stage'], 'offer')
+        self.assertEqual(rows[first.id]['latest_application']['applied_at'], latest.applied_at)
+        no_applications = next(row for row in rows.values() if row['email'] == 'candidate99@example.com')
+        self.assertEqual(no_applications['applications_count'], 0)
+        self.assertIsNone(no_applications['latest_application'])
+
+
+class KeysetPaginationTests(CandidatesTestCase):
+
+    def setUp(self):
+        super().setUp()
+        cache.clear()
+        for index in range(25):
+            self.create_candidate(index)
+
+    def test_keyset_pages_cover_every_row_without_counting(self):
+        seen = []
+        url, params = '/api/candidates/', {'paginate': 'keyset', 'page_size': 10}
+        while url:
+            with self.assertNumQueries(1):
+                response = self.client.get(url, params)
+            self.assertIsNone(response.data['count'])
+            seen.extend(row['id'] for row in response.data['results'])
+            url, params = response.data['next'], None
+
+        self.assertEqual(seen, list(Candidate.objects.order_by('-created_at', '-id').values_list('id', flat=True)))
+
+    def test_cached_count_is_reused(self):
+        self.client.get('/api/candidates/', {'count': 'cached'})
+        # ETag validators and the page; no COUNT for the paginator
+        with self.assertNumQueries(2):
+            response = self.client.get('/api/candidates/', {'count': 'cached', 'page': 2})
+        self.assertEqual(response.data['count'], 25)
+
+    def test_page_number_mode_is_unchanged_and_bad_cursor_is_rejected(self):
+        response = self.client.get('/api/candidates/', {'page': 2})
+        self.assertEqual(response.data['count'], 25)
+        self.assertEqual(len(response.data['results']), 5)
+
+        self.assertEqual(self.client.get('/api/candidates/', {'cursor': 'not-a-cursor'}).status_code, 404)
+
+
+class SparseFieldsTests(CandidatesTestCase):
+
+    def test_default_shape_is_unchanged(self):
+        application = self.create_application(1)
+
+        data = self.client.get(f'/api/applications/{application.id}/').data
+
+        self.assertIn('job_details', data)
+        self.assertIn('referrer_details', data['candidate_details'])
+        self.assertIn('activities', data)
+
+    def test_fields_and_expand_trim_the_response(self):
+        application = self.create_application(1)
+        url = f'/api/applications/{application.id}/'
+
+        data = self.client.get(url, {'fields': 'id,stage'}).data
+        self.assertEqual(set(data), {'id', 'stage'})
+
+        data = self.client.get(url, {'expand': 'candidate_details'}).data
+        self.assertNotIn('job_details', data)
+        self.assertNotIn('activities', data)
+        self.assertNotIn('referrer_details', data['candidate_details'])
+
+        data = self.client.get(url, {'fields': 'id,candidate_details.email'}).data
+        self.assertEqual(data, {'id': application.id, 'candidate_details': {'email': 'candidate1@example.com'}})
+
+    def test_trimmed_shape_loads_fewer_relations(self):
+        application = self.create_application(1)
+        url = f'/api/applications/{application.id}/'
+
+        # ETag validators and the application itself
+        with self.assertNumQueries(2):
+            self.client.get(url, {'fields': 'id,stage,job_title'})
+
+    def test_writes_ignore_sparse_parameters(self):
+        application = self.create_application(1)
+
+        response = self.client.patch(
+            f'/api/applications/{application.id}/?fields=id', {'overall_rating': '4.50'}, format='json'
+        )
+
+        self.assertEqual(response.status_code, 200)
+        self.assertIn('overall_rating', response.data)
+
+
+class UserIdentityMapTests(CandidatesTestCase):
+
+    def test_each_user_is_loaded_once_per_response(self):
+        colleague = User.objects.create_user(
+            username='colleague', email='colleague@acme.test', password='secret',
+            organization=self.organization, role='recruiter'
+        )
+        application = self.create_application(1)
+        for index in range(10):
+            ApplicationActivity.objects.create(
+                application=application, user=self.user if index % 2 else colleague,
+                activity_type='note_added', description=f'Note {index}'
+            )
+
+        # Page count, activities, then both users with their organization in one query
+        with self.assertNumQueries(3):
+            response = self.client.get('/api/activities/')
+
+        users = {row['user_details']['username'] for row in response.data['results']}
+        self.assertEqual(users, {'recruiter', 'colleague'})
+        self.assertEqual(response.data['results'][0]['user_details']['organization_details']['slug'], 'acme')
+
+    def test_detail_reuses_users_across_nested_fields(self):
+        application = self.create_application(1)
+        application.candidate.referrer = self.user
+        application.candidate.save()
+        ApplicationActivity.objects.create(
+            application=application, user=self.user, activity_type='note_added', description='Note'
+        )
+
+        # ETag validators, application, its activities and the one user
+        with self.assertNumQueries(4):
+            data = self.client.get(f'/api/applications/{application.id}/', {
+                'expand': 'candidate_details.referrer_details,activities.user_details'
+            }).data
+
+        self.assertEqual(data['candidate_details']['referrer_details'], data['activities'][0]['user_details'])
+
+
+class ConditionalGetTests(CandidatesTestCase):
+
+    def setUp(self):
+        super().setUp()
+        cache.clear()
+
+    def test_unchanged_list_returns_304_without_serializing(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            self.create_application(1)
+        response = self.client.get('/api/applications/')
+        etag = response['ETag']
+        self.assertIn('Last-Modified', response)
+
+        # Only the validator aggregate runs
+        with self.assertNumQueries(1):
+            response = self.client.get('/api/applications/', HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 304)
+
+        response = self.client.get('/api/applications/', {'stage': 'applied'}, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+
+    def test_writes_and_deletes_change_the_etag(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            application = self.create_application(1)
+            other = self.create_application(2)
+        url = f'/api/applications/{application.id}/'
+        list_etag = self.client.get('/api/applications/')['ETag']
+        detail_etag = self.client.get(url)['ETag']
+
+        with self.captureOnCommitCallbacks(execute=True):
+            candidate = application.candidate
+            candidate.first_name = 'Renamed'
+            candidate.save()
+        self.assertEqual(self.client.get(url, HTTP_IF_NONE_MATCH=detail_etag).status_code, 200)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            other.delete()
+        self.assertEqual(self.client.get('/api/applications/', HTTP_IF_NONE_MATCH=list_etag).status_code, 200)
+
+    def test_malformed_ids_are_not_found(self):
+        for url in ('/api/applications/abc/', '/api/candidates/abc/', '/api/jobs/abc/', '/api/interviews/abc/'):
+            self.assertEqual(self.client.get(url).status_code, 404, url)
+
+
+@override_settings(SYNC_SETTLE_SECONDS=0)
+class BulkActionTests(CandidatesTestCase):
+
+    def bulk_stage(self, ids, stage):
+        return self.client.post('/api/applications/bulk_stage/', {'ids': ids, 'stage': stage}, format='json')
+
+    def test_bulk_stage_reports_per_id_outcomes_and_keeps_derived_data(self):
+        applications = [self.create_application(index) for index in range(4)]
+        applications[0].move_to_stage('technical')
+        other = Organization.objects.create(name='Other', slug='other')
+        hidden = JobApplication.objects.create(
+            job=Job.objects.create(organization=other, title='Hidden', description='x', requirements='x', location='x'),
+            candidate=self.create_candidate(99, organization=other)
+        )
+        ids = [application.id for application in applications] + [hidden.id]
+        log_start = latest_cursor(self.organization.id)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            response = self.bulk_stage(ids, 'technical')
+
+        self.assertEqual(response.data['updated'], 3)
+        self.assertEqual(
+            [result['status'] for result in response.data['results']],
+            ['unchanged', 'moved', 'moved', 'moved', 'not_found']
+        )
+        self.assertEqual(dict(self.job.stage_counts.filter(count__gt=0).values_list('stage', 'count')), {'technical': 4})
+        self.assertEqual(StageTransition.objects.filter(to_stage='technical', actor=self.user).count(), 3)
+        self.assertEqual(ApplicationActivity.objects.filter(user=self.user).count(), 3)
+        self.assertEqual(JobApplication.objects.get(pk=hidden.pk).stage, 'applied')
+        self.assertEqual(
+            sorted(changes_since(self.organization.id, log_start)['changes']['application']['updated']),
+            ids[1:4]
+        )
+
+    def test_bulk_stage_query_count_is_independent_of_batch_size(self):
+        applications = [self.create_application(index) for index in range(12)]
+        # The first application in a stage creates its counter row; start from existing rows
+        self.create_application(99, stage='onsite')
+        with CaptureQueriesContext(connection) as small:
+            self.bulk_stage([application.id for application in applications[:2]], 'onsite')
+        with CaptureQueriesContext(connection) as large:
+            self.bulk_stage([application.id for application in applications[2:]], 'onsite')
+
+        self.assertEqual(len(small.captured_queries), len(large.captured_queries))
+
+    def test_bulk_reject_and_validation(self):
+        first, second = self.create_application(1), self.create_application(2)
+        second.status = 'rejected'
+        second.save()
+
+        response = self.client.post(
+            '/api/applications/bulk_reject/', {'ids': [first.id, second.id], 'reason': 'Role closed'}, format='json'
+        )
+
+        self.assertEqual([result['status'] for result in response.data['results']], ['rejected', 'unchanged'])
+        first.refresh_from_db()
+        self.assertEqual((first.status, first.rejection_reason), ('rejected', 'Role closed'))
+        self.assertEqual(list(first.transitions.values_list('to_stage', flat=True)), ['rejected'])
+        self.assertEqual(self.bulk_stage('1,2', 'onsite').status_code, 400)
+        self.assertEqual(self.bulk_stage([first.id], 'nowhere').status_code, 400)
+
+
+class OptimisticConcurrencyTests(CandidatesTestCase):
+
+    def test_concurrent_stage_moves_conflict_instead_of_double_advancing(self):
+        application = self.create_application(1)
+        first, second = JobApplication.objects.get(pk=application.pk), JobApplication.objects.get(pk=application.pk)
+
+        first.move_to_stage('screening')
+        with self.assertRaises(StaleApplication):
+            second.move_to_stage('screening')
+
+        application.refresh_from_db()
+        self.assertEqual((application.stage, application.version), ('screening', 2))
+        self.assertEqual(application.transitions.count(), 1)
+        self.assertEqual(dict(self.job.stage_counts.filter(count__gt=0).values_list('stage', 'count')), {'screening': 1})
+
+    def test_advance_stage_checks_the_stage_the_client_saw(self):
+        application = self.create_application(1)
+        url = f'/api/applications/{application.id}/advance_stage/'
+
+        self.assertEqual(self.client.post(url, {'expected_stage': 'applied'}).status_code, 200)
+        response = self.client.post(url, {'expected_stage': 'applied'})
+
+        self.assertEqual(response.status_code, 409)
+        self.assertEqual(response.data['current']['stage'], 'screening')
+
+    def test_edits_with_a_stale_version_are_rejected(self):
+        application = self.create_application(1)
+        url = f'/api/applications/{application.id}/'
+
+        response = self.client.patch(url, {'overall_rating': '4.00', 'version': 1}, format='json')
+        self.assertEqual((response.status_code, response.data['version']), (200, 2))
+
+        response = self.client.patch(url, {'stage': 'technical', 'version': 1}, format='json')
+        self.assertEqual(response.status_code, 409)
+        self.assertEqual(response.data['current'], {'stage': 'applied', 'status': 'active', 'version': 2})
+
+        response = self.client.patch(url, {'stage': 'technical', 'version': 2}, format='json')
+        self.assertEqual((response.data['stage'], response.data['version']), ('technical', 3))
@@ -1,9 +1,16 @@
 from rest_framework import viewsets, status
 from rest_framework.decorators import action
 from rest_framework.response import Response
+from recruitment_backend.mixins import ConditionalGetMixin, SparseFieldsViewSetMixin, UserIdentityMapMixin
 from django_filters.rest_framework import DjangoFilterBackend
-from django.db import models
-from .models import Candidate, JobApplication, ApplicationActivity, CandidateNote
+from django.db import models, transaction
+from django.db.models.functions import Coalesce
+from django.utils import timezone
+from recruitment_backend.pagination import KeysetPagination
+from jobs.pipelines import pipeline_for
+from . import bulk
+from .exports import APPLICATION_EXPORT_COLUMNS, CANDIDATE_EXPORT_COLUMNS, EXPORT_FORMATS, stream_export
+from .models import Candidate, JobApplication, ApplicationActivity, CandidateNote, StageTransition, StaleApplication
 from .serializers import (
     CandidateSerializer, CandidateListSerializer, JobApplicationSerializer,
     JobApplicationCreateSerializer, JobApplicationListSerializer, ApplicationActivitySerializer,
@@ -11,10 +18,32 @@ from .serializers import (
 )
 
 
-class CandidateViewSet(viewsets.ModelViewSet):
+def with_application_summary(queryset):
+    """Annotate candidates with their application count and latest application via subqueries"""
+    applications = JobApplication.objects.filter(candidate=models.OuterRef('pk'))
+    latest = applications.order_by('-applied_at', '-id')
+    return queryset.annotate(
+        applications_total=Coalesce(
+            models.Subquery(
+                applications.order_by().values('candidate').annotate(total=models.Count('id')).values('total')
+            ),
+            0
+        ),
+        latest_job_title=models.Subquery(latest.values('job__title')[:1]),
+        latest_stage=models.Subquery(latest.values('stage')[:1]),
+        latest_applied_at=models.Subquery(latest.values('applied_at')[:1]),
+    )
+
+
+class CandidateViewSet(ConditionalGetMixin, UserIdentityMapMixin, SparseFieldsViewSetMixin, viewsets.ModelViewSet):
     queryset = Candidate.objects.all()
+    pagination_class = KeysetPagination
+    keyset_ordering = ('-created_at', '-id')
     filter_backends = [DjangoFilterBackend]
     filterset_fields = ['source', 'years_of_experience']
+    user_relations = {
+        'referrer_details': 'referrer_id',
+    }
     
     def get_serializer_class(self):
         if self.action == 'list':
@@ -38,16 +67,42 @@ class CandidateViewSet(viewsets.ModelViewSet):
                 models.Q(current_title__icontains=search)
             )
         
+        if self.action == 'list':
+            queryset = with_application_summary(queryset)
+        
         return queryset.order_by('-created_at')
     
     def perform_create(self, serializer):
         serializer.save(organization=self.request.user.organization)
+    
+    @action(detail=False, methods=['get'])
+    def export(self, request):
+        """Stream all matching candidates as ?file_format=csv (default) or ndjson"""
+        file_format = request.query_params.get('file_format', 'csv')
+        if file_format not in EXPORT_FORMATS:
+            return Response(
+                {'detail': f'file_format must be one of: {", ".join(EXPORT_FORMATS)}'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        
+        queryset = self.filter_queryset(self.get_queryset())
+        return stream_export(queryset, CANDIDATE_EXPORT_COLUMNS, file_format, 'candidates')
 
 
-class JobApplicationViewSet(viewsets.ModelViewSet):
+class JobApplicationViewSet(ConditionalGetMixin, UserIdentityMapMixin, SparseFieldsViewSetMixin, viewsets.ModelViewSet):
     queryset = JobApplication.objects.all()
+    pagination_class = KeysetPagination
+    keyset_ordering = ('-applied_at', '-id')
     filter_backends = [DjangoFilterBackend]
     filterset_fields = ['stage', 'status', 'job']
+    shape_relations = {
+        'job_details': (['job__department'], ['job__stage_counts']),
+        'activities': ([], ['activities']),
+    }
+    user_relations = {
+        'candidate_details.referrer_details': 'candidate.referrer_id',
+        'activities.user_details': 'activities.user_id',
+    }
     
     def get_serializer_class(self):
         if self.action == 'create':
@@ -74,23 +129,35 @@ class JobApplicationViewSet(viewsets.ModelViewSet):
         
         return queryset.select_related('candidate', 'job').order_by('-applied_at')
     
+    def conflict_response(self, pk):
+        """409 with the application's current stage and version, so the client can reload and retry"""
+        current = JobApplication.objects.filter(pk=pk).values('stage', 'status', 'version').first()
+        return Response(
+            {'detail': 'Application was changed by someone else', 'current': current},
+            status=status.HTTP_409_CONFLICT
+        )
+    
+    def update(self, request, *args, **kwargs):
+        try:
+            return super().update(request, *args, **kwargs)
+        except StaleApplication as exc:
+            return self.conflict_response(exc.args[0])
+    
     @action(detail=True, methods=['post'])
     def advance_stage(self, request, pk=None):
         application = self.get_object()
         
-        stage_progression = {
-            'applied': 'screening',
-            'screening': 'phone_screen',
-            'phone_screen': 'technical',
-            'technical': 'onsite',
-            'onsite': 'final',
-            'final': 'offer',
-        }
-        
-        if application.stage in stage_progression:
-            new_stage = stage_progression[application.stage]
-            application.stage = new_stage
-            application.save()
+        # The stage the client saw, if it says; the UPDATE is conditional on it
+        expected_stage = request.data.get('expected_stage', application.stage)
+        if expected_stage != application.stage:
+            return self.conflict_response(application.pk)
+        
+        new_stage = pipeline_for(application.job).advance(application.stage)
+        if new_stage is not None:
+            try:
+                application.move_to_stage(new_stage, actor=request.user)
+            except StaleApplication:
+                return self.conflict_response(application.pk)
             
             # Create activity log
             ApplicationActivity.objects.create(
@@ -100,7 +167,7 @@ class JobApplicationViewSet(viewsets.ModelViewSet):
                 description=f'Advanced to {new_stage} stage'
             )
             
-            return Response({'detail': f'Application advanced to {new_stage} stage'})
+            return Response({'detail': f'Application advanced to {new_stage} stage', 'version': application.version})
         
         return Response(
             {'detail': 'Cannot advance from current stage'},
@@ -112,9 +179,23 @@ class JobApplicationViewSet(viewsets.ModelViewSet):
         application = self.get_object()
         reason = request.data.get('reason', '')
         
-        application.status = 'rejected'
-        application.rejection_reason = reason
-        application.save()
+        try:
+            with transaction.atomic():
+                application.conditional_update(
+                    {'stage': application.stage, 'status': application.status},
+                    status='rejected', rejection_reason=reason, rejected_at=timezone.now()
+                )
+                
+                # Rejection ends the time spent in the current stage
+                StageTransition.objects.create(
+                    application=application,
+                    from_stage=application.stage,
+                    to_stage='rejected',
+                    at=application.rejected_at,
+                    actor=request.user
+                )
+        except StaleApplication:
+            return self.conflict_response(application.pk)
         
         # Create activity log
         ApplicationActivity.objects.create(
@@ -124,14 +205,64 @@ class JobApplicationViewSet(viewsets.ModelViewSet):
             description=f'Application rejected: {reason}'
         )
         
-        return Response({'detail': 'Application rejected'})
+        return Response({'detail': 'Application rejected', 'version': application.version})
+    
+    def bulk_response(self, results):
+        updated = sum(1 for result in results if result['status'] not in ('unchanged', 'not_found'))
+        return Response({'updated': updated, 'results': results})
+    
+    @action(detail=False, methods=['post'])
+    def bulk_stage(self, request):
+        """Move up to BULK_MAX_IDS applications to one stage: {"ids": [...], "stage": "..."}"""
+        ids = bulk.parse_ids(request.data.get('ids'))
+        if ids is None:
+            return Response(
+                {'detail': f'ids must be a list of 1 to {bulk.BULK_MAX_IDS} application ids'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        stage = request.data.get('stage')
+        if stage not in dict(JobApplication.STAGE_CHOICES):
+            return Response({'detail': 'Unknown stage'}, status=status.HTTP_400_BAD_REQUEST)
+        
+        return self.bulk_response(bulk.bulk_move_to_stage(self.get_queryset(), ids, stage, actor=request.user))
+    
+    @action(detail=False, methods=['post'])
+    def bulk_reject(self, request):
+        """Reject up to BULK_MAX_IDS applications: {"ids": [...], "reason": "..."}"""
+        ids = bulk.parse_ids(request.data.get('ids'))
+        if ids is None:
+            return Response(
+                {'detail': f'ids must be a list of 1 to {bulk.BULK_MAX_IDS} application ids'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        reason = request.data.get('reason', '')
+        
+        return self.bulk_response(bulk.bulk_reject(self.get_queryset(), ids, reason, actor=request.user))
+    
+    @action(detail=False, methods=['get'])
+    def export(self, request):
+        """Stream all matching applications as ?file_format=csv (default) or ndjson"""
+        file_format = request.query_params.get('file_format', 'csv')
+        if file_format not in EXPORT_FORMATS:
+            return Response(
+                {'detail': f'file_format must be one of: {", ".join(EXPORT_FORMATS)}'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        
+        queryset = self.filter_queryset(self.get_queryset())
+        return stream_export(queryset, APPLICATION_EXPORT_COLUMNS, file_format, 'applications')
 
 
-class ApplicationActivityViewSet(viewsets.ReadOnlyModelViewSet):
+class ApplicationActivityViewSet(UserIdentityMapMixin, SparseFieldsViewSetMixin, viewsets.ReadOnlyModelViewSet):
     queryset = ApplicationActivity.objects.all()
+    pagination_class = KeysetPagination
+    keyset_ordering = ('-created_at', '-id')
     serializer_class = ApplicationActivitySerializer
     filter_backends = [DjangoFilterBackend]
     filterset_fields = ['activity_type', 'application']
+    user_relations = {
+        'user_details': 'user_id',
+    }
     
     def get_queryset(self):
         user = self.request.user
@@ -142,11 +273,16 @@ class ApplicationActivityViewSet(viewsets.ReadOnlyModelViewSet):
         ).order_by('-created_at')
 
 
-class CandidateNoteViewSet(viewsets.ModelViewSet):
+class CandidateNoteViewSet(UserIdentityMapMixin, SparseFieldsViewSetMixin, viewsets.ModelViewSet):
     queryset = CandidateNote.objects.all()
+    pagination_class = KeysetPagination
+    keyset_ordering = ('-created_at', '-id')
     serializer_class = CandidateNoteSerializer
     filter_backends = [DjangoFilterBackend]
     filterset_fields = ['candidate', 'application', 'note_type', 'is_private']
+    user_relations = {
+        'created_by_details': 'created_by_id',
+    }
     
     def get_queryset(self):
         user = self.request.user
@@ -1,10 +1,11 @@
 from rest_framework import serializers
+from recruitment_backend.serializers import SparseFieldsMixin
 from .models import Interview, InterviewFeedback, FeedbackTemplate
 from candidates.serializers import JobApplicationListSerializer
 from accounts.serializers import UserSerializer
 
 
-class InterviewSerializer(serializers.ModelSerializer):
+class InterviewSerializer(SparseFieldsMixin, serializers.ModelSerializer):
     application_details = JobApplicationListSerializer(source='application', read_only=True)
     interviewers_details = UserSerializer(source='interviewers', many=True, read_only=True)
     lead_interviewer_details = UserSerializer(source='lead_interviewer', read_only=True)
@@ -21,6 +22,7 @@ class InterviewSerializer(serializers.ModelSerializer):
             'confirmed_at', 'completed_at', 'cancelled_at', 'cancellation_reason',
             'created_by', 'created_at', 'updated_at'
         ]
+        expandable_fields = ['application_details', 'interviewers_details', 'lead_interviewer_details']
         read_only_fields = ['id', 'created_at', 'updated_at']
 
 
@@ -41,7 +43,7 @@ class InterviewCreateSerializer(serializers.ModelSerializer):
         return interview
 
 
-class InterviewFeedbackSerializer(serializers.ModelSerializer):
+class InterviewFeedbackSerializer(SparseFieldsMixin, serializers.ModelSerializer):
     interviewer_details = UserSerializer(source='interviewer', read_only=True)
     interview_details = InterviewSerializer(source='interview', read_only=True)
     
@@ -55,10 +57,11 @@ class InterviewFeedbackSerializer(serializers.ModelSerializer):
             'questions_asked', 'detailed_notes', 'red_flags', 'submitted_at',
             'updated_at', 'is_submitted'
         ]
+        expandable_fields = ['interviewer_details', 'interview_details']
         read_only_fields = ['id', 'submitted_at', 'updated_at']
 
 
-class FeedbackTemplateSerializer(serializers.ModelSerializer):
+class FeedbackTemplateSerializer(SparseFieldsMixin, serializers.ModelSerializer):
     created_by_details = UserSerializer(source='created_by', read_only=True)
     
     class Meta:
@@ -68,10 +71,11 @@ class FeedbackTemplateSerializer(serializers.ModelSerializer):
             'sections', 'rating_criteria', 'status', 'is_active', 'is_default',
             'created_by', 'created_by_details', 'created_at', 'updated_at'
         ]
+        expandable_fields = ['created_by_details']
         read_only_fields = ['id', 'created_at', 'updated_at']
 
 
-class InterviewListSerializer(serializers.ModelSerializer):
+class InterviewListSerializer(SparseFieldsMixin, serializers.ModelSerializer):
     candidate_name = serializers.CharField(source='application.candidate.full_name', read_only=True)
     job_title = serializers.CharField(source='application.job.title', read_only=True)
     lead_interviewer_name = serializers.CharField(source='lead_interviewer.get_full_name', read_only=True)
@@ -1,6 +1,7 @@
 from rest_framework import viewsets, status
 from rest_framework.decorators import action
 from rest_framework.response import Response
+from recruitment_backend.mixins import ConditionalGetMixin, SparseFieldsViewSetMixin, UserIdentityMapMixin
 from django_filters.rest_framework import DjangoFilterBackend
 from django.utils import timezone
 from .models import Interview, InterviewFeedback, FeedbackTemplate
@@ -10,11 +11,14 @@ from .serializers import (
 )
 
 
-class FeedbackTemplateViewSet(viewsets.ModelViewSet):
+class FeedbackTemplateViewSet(UserIdentityMapMixin, SparseFieldsViewSetMixin, viewsets.ModelViewSet):
     queryset = FeedbackTemplate.objects.all()
     serializer_class = FeedbackTemplateSerializer
     filter_backends = [DjangoFilterBackend]
     filterset_fields = ['status', 'is_active', 'is_default']
+    user_relations = {
+        'created_by_details': 'created_by_id',
+    }
     
     def get_queryset(self):
         user = self.request.user
@@ -57,10 +61,14 @@ class FeedbackTemplateViewSet(viewsets.ModelViewSet):
         return Response({'detail': 'Template unpublished successfully'})
 
 
-class InterviewViewSet(viewsets.ModelViewSet):
+class InterviewViewSet(ConditionalGetMixin, UserIdentityMapMixin, SparseFieldsViewSetMixin, viewsets.ModelViewSet):
     queryset = Interview.objects.all()
     filter_backends = [DjangoFilterBackend]
     filterset_fields = ['status', 'interview_type', 'application__job']
+    user_relations = {
+        'interviewers_details': 'interviewers',
+        'lead_interviewer_details': 'lead_interviewer_id',
+    }
     
     def get_serializer_class(self):
         if self.action == 'create':
@@ -138,11 +146,20 @@ class InterviewViewSet(viewsets.ModelViewSet):
         return Response({'detail': 'Interview completed successfully'})
 
 
-class InterviewFeedbackViewSet(viewsets.ModelViewSet):
+class InterviewFeedbackViewSet(UserIdentityMapMixin, SparseFieldsViewSetMixin, viewsets.ModelViewSet):
     queryset = InterviewFeedback.objects.all()
     serializer_class = InterviewFeedbackSerializer
     filter_backends = [DjangoFilterBackend]
     filterset_fields = ['interview', 'interviewer', 'recommendation', 'is_submitted']
+    shape_relations = {
+        'interview_details.application_details': (['interview__application__candidate', 'interview__application__job'], []),
+        'interview_details.interviewers_details': ([], ['interview__interviewers']),
+    }
+    user_relations = {
+        'interviewer_details': 'interviewer_id',
+        'interview_details.interviewers_details': 'interview.interviewers',
+        'interview_details.lead_interviewer_details': 'interview.lead_interviewer_id',
+    }
     
     def get_queryset(self):
         user = self.request.user
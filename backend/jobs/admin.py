@@ -3,7 +3,7 @@ from django.utils.html import format_html
 from django.urls import reverse
 from django.utils.safestring import mark_safe
 from django.contrib.auth import get_user_model
-from .models import Department, Job
+from .models import Department, GenerationTask, Job, Pipeline
 
 User = get_user_model()
 
@@ -71,6 +71,21 @@ class DepartmentAdmin(admin.ModelAdmin):
         return super().formfield_for_foreignkey(db_field, request, **kwargs)
 
 
+@admin.register(Pipeline)
+class PipelineAdmin(admin.ModelAdmin):
+    list_display = ['name', 'organization', 'is_default', 'allow_skips', 'updated_at']
+    list_filter = ['organization', 'is_default']
+    search_fields = ['name', 'organization__name']
+    readonly_fields = ['created_at', 'updated_at']
+
+
+@admin.register(GenerationTask)
+class GenerationTaskAdmin(admin.ModelAdmin):
+    list_display = ['id', 'organization', 'requested_by', 'status', 'attempts', 'created_at', 'finished_at']
+    list_filter = ['status', 'organization']
+    readonly_fields = ['created_at', 'started_at', 'finished_at']
+
+
 @admin.register(Job)
 class JobAdmin(admin.ModelAdmin):
     list_display = ['title', 'organization', 'department', 'status', 'urgency', 'applications_count', 'days_open_display', 'created_at']
@@ -100,7 +115,7 @@ class JobAdmin(admin.ModelAdmin):
             'classes': ('collapse',)
         }),
         ('Priority & Timeline', {
-            'fields': ('urgency', 'openings', 'target_hire_date', 'sla_days')
+            'fields': ('urgency', 'openings', 'target_hire_date', 'sla_days', 'pipeline')
         }),
         ('Team', {
             'fields': ('hiring_manager', 'recruiters')
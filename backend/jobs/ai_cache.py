@@ -0,0 +1,136 @@
+"""
+Content-addressed cache for AI job description generations.
+
+A generation is stored under the SHA-256 of its normalized inputs (case
+and whitespace folded), the model and the prompt version, so the same
+title/level/location/department asked for twice costs one upstream
+call, and changing the model or prompt never serves stale text.
+Entries expire after JD_CACHE_TTL seconds. Beyond JD_CACHE_MAX_ENTRIES,
+the least recently used entries are evicted. Concurrent identical
+misses in a process share one upstream call (single flight).
+"""
+import hashlib
+import json
+import re
+import threading
+from datetime import timedelta
+from django.conf import settings
+from django.db.models import F
+from django.utils import timezone
+from analytics.cache import CacheStats
+from .models import CachedGeneration
+
+STATS_NAME = 'job_description'
+
+stats = CacheStats()
+
+
+def normalize(value):
+    return re.sub(r'\s+', ' ', str(value or '')).strip().casefold()
+
+
+def cache_key(params, model, prompt_version):
+    normalized = {name: normalize(value) for name, value in sorted(params.items())}
+    raw = json.dumps([normalized, model, prompt_version], sort_keys=True)
+    return hashlib.sha256(raw.encode()).hexdigest()
+
+
+def _ttl():
+    return timedelta(seconds=getattr(settings, 'JD_CACHE_TTL', 7 * 24 * 3600))
+
+
+def lookup(key):
+    """The cached result for a key, or None; refreshes its LRU position"""
+    now = timezone.now()
+    entry = CachedGeneration.objects.filter(key=key, created_at__gte=now - _ttl()).values_list('pk', 'result').first()
+    if entry is None:
+        return None
+    CachedGeneration.objects.filter(pk=entry[0]).update(hits=F('hits') + 1, last_used_at=now)
+    return entry[1]
+
+
+def store(key, params, model, prompt_version, result):
+    now = timezone.now()
+    CachedGeneration.objects.update_or_create(key=key, defaults={
+        'model': model, 'prompt_version': prompt_version, 'params': params, 'result': result,
+        'hits': 0, 'created_at': now, 'last_used_at': now,
+    })
+    evict()
+
+
+def evict():
+    """Drop expired entries, then the least recently used beyond JD_CACHE_MAX_ENTRIES"""
+    removed, _ = CachedGeneration.objects.filter(created_at__lt=timezone.now() - _ttl()).delete()
+    excess = CachedGeneration.objects.count() - getattr(settings, 'JD_CACHE_MAX_ENTRIES', 10000)
+    if excess > 0:
+        oldest = CachedGeneration.objects.order_by('last_used_at', 'pk').values_list('pk', flat=True)[:excess]
+        removed += CachedGeneration.objects.filter(pk__in=list(oldest)).delete()[0]
+    return removed
+
+
+class _Flight:
+    def __init__(self):
+        self.done = threading.Event()
+        self.result = None
+        self.error = None
+
+
+_flights = {}
+_flights_lock = threading.Lock()
+
+
+def single_flight(key, compute):
+    """
+    Run compute() once for concurrent callers with the same key.
+
+    Returns (result, shared): shared is True for callers that waited on
+    another caller's run instead of running compute() themselves.
+    """
+    with _flights_lock:
+        flight = _flights.get(key)
+        leader = flight is None
+        if leader:
+            flight = _flights[key] = _Flight()
+
+    if not leader:
+        flight.done.wait()
+        if flight.error is not None:
+            raise flight.error
+        return flight.result, True
+
+    try:
+        flight.result = compute()
+        return flight.result, False
+    except Exception as exc:
+        flight.error = exc
+        raise
+    finally:
+        with _flights_lock:
+            del _flights[key]
+        flight.done.set()
+
+
+def get_or_generate(params, model, prompt_version, generate, bypass=False):
+    """
+    The cached result for `params`, or the result of generate().
+
+    generate() returns (result, cacheable); template fallbacks are not
+    cacheable, so an upstream outage is never pinned in the cache. With
+    bypass the cache is not read, but a fresh result still replaces it.
+    """
+    key = cache_key(params, model, prompt_version)
+    if not bypass:
+        cached = lookup(key)
+        if cached is not None:
+            stats.record(STATS_NAME, hit=True)
+            return cached
+
+    def compute():
+        result, cacheable = generate()
+        if cacheable:
+            store(key, params, model, prompt_version, result)
+        return result
+
+    result, shared = single_flight(key, compute)
+    stats.record(STATS_NAME, hit=shared)
+    return result
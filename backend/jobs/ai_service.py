@@ -1,28 +1,164 @@
 """
 AI Service for generating job descriptions using OpenAI API
 """
+import asyncio
 import openai
+from asgiref.sync import sync_to_async
 from django.conf import settings
+from django.db import connections
 from decouple import config
 import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FutureTimeout
+from . import ai_cache
+from .ai_cache import get_or_generate
+from .resilience import (
+    CircuitBreaker, CircuitOpen, RateLimitGate, backoff_delay, call_with_retries, retry_after
+)
 
 logger = logging.getLogger(__name__)
 
+# Bump whenever the prompt or system message changes; part of the generation cache key
+PROMPT_VERSION = 1
+
+# Upstream failures worth retrying and counting against the circuit breaker
+RETRYABLE_ERRORS = (
+    openai.APITimeoutError, openai.APIConnectionError, openai.RateLimitError, openai.InternalServerError
+)
+
 # Configure OpenAI
 openai.api_key = config('OPENAI_API_KEY', default='')
 
+
+class SectionParser:
+    """
+    Split AI output into DESCRIPTION/RESPONSIBILITIES/REQUIREMENTS as it arrives.
+    
+    feed() takes chunks of any size and returns (section, text) deltas;
+    joined per section they equal the final `sections`. Text on a line is
+    held back only while it could still turn out to be a section header.
+    """
+    
+    HEADERS = (
+        ('**DESCRIPTION:', 'description'),
+        ('**RESPONSIBILITIES:', 'responsibilities'),
+        ('**REQUIREMENTS:', 'requirements'),
+    )
+    
+    def __init__(self):
+        self.lines = {name: [] for _, name in self.HEADERS}
+        self.current = None
+        self.raw = []
+        self.pending = ''
+        self.sent = 0
+    
+    def feed(self, chunk):
+        self.raw.append(chunk)
+        *complete, self.pending = (self.pending + chunk).split('\n')
+        deltas = []
+        for line in complete:
+            deltas.extend(self._end_line(line))
+        text = self.pending.strip()
+        if self.current and text and not self._could_be_header(text):
+            deltas.extend(self._emit(text))
+        return deltas
+    
+    def close(self):
+        """Flush the last line; returns its deltas"""
+        deltas = self._end_line(self.pending)
+        self.pending = ''
+        return deltas
+    
+    @property
+    def sections(self):
+        sections = {name: '\n'.join(lines) for name, lines in self.lines.items()}
+        # If parsing failed, use the entire content as description
+        if not any(sections.values()):
+            sections['description'] = ''.join(self.raw).strip()
+        return sections
+    
+    def _could_be_header(self, text):
+        upper = text.upper()
+        return any(marker.startswith(upper) or upper.startswith(marker) for marker, _ in self.HEADERS)
+    
+    def _end_line(self, line):
+        text = line.strip()
+        upper = text.upper()
+        for marker, name in self.HEADERS:
+            if upper.startswith(marker):
+                self.current = name
+                self.sent = 0
+                return []
+        deltas = []
+        if self.current and text:
+            deltas = self._emit(text)
+            self.lines[self.current].append(text)
+        self.sent = 0
+        return deltas
+    
+    def _emit(self, text):
+        """The not yet sent part of the current line, newline-separated from earlier lines"""
+        delta = text[self.sent:]
+        if not delta:
+            return []
+        if not self.sent and self.lines[self.current]:
+            delta = '\n' + delta
+        self.sent = len(text)
+        return [(self.current, delta)]
+
+
+_upstream_executor = None
+_upstream_lock = threading.Lock()
+
+
+def _get_upstream_executor():
+    """Threads that make budgeted OpenAI calls, so a caller can stop waiting on them"""
+    global _upstream_executor
+    with _upstream_lock:
+        if _upstream_executor is None:
+            _upstream_executor = ThreadPoolExecutor(
+                max_workers=getattr(settings, 'JD_AI_MAX_CONCURRENCY', 8), thread_name_prefix='jd-upstream'
+            )
+    return _upstream_executor
+
+
+class _Hedge:
+    """Who owns an AI result: the caller while it waits, the upstream thread once the caller gave up"""
+    
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.finished = False
+        self.abandoned = False
+
+
 class AIJobDescriptionGenerator:
     """Service class for generating job descriptions using OpenAI GPT"""
     
     def __init__(self):
         api_key = config('OPENAI_API_KEY', default='')
         if api_key:
-            self.client = openai.OpenAI(api_key=api_key)
+            self.client = openai.OpenAI(
+                api_key=api_key,
+                timeout=openai.Timeout(
+                    getattr(settings, 'JD_AI_READ_TIMEOUT', 30), connect=getattr(settings, 'JD_AI_CONNECT_TIMEOUT', 5)
+                ),
+                # Retries are ours (call_with_retries), with jitter and the breaker in the loop
+                max_retries=0,
+            )
+            # Streams can only be retried before their first chunk, which the SDK's
+            # own (jittered) retries already cover
+            self.async_client = self.new_async_client(max_retries=getattr(settings, 'JD_AI_MAX_RETRIES', 2))
         else:
             self.client = None
+            self.async_client = None
         self.model = "gpt-3.5-turbo"
+        self.breaker = CircuitBreaker(
+            failure_threshold=getattr(settings, 'JD_AI_BREAKER_THRESHOLD', 5),
+            reset_timeout=getattr(settings, 'JD_AI_BREAKER_COOLDOWN', 60),
+        )
         
-    def generate_job_description(self, title, department, level, location, work_type, company_info=None):
+    def generate_job_description(self, title, department, level, location, work_type, company_info=None,
+                                 use_cache=True, on_upgrade=None):
         """
         Generate a comprehensive job description using OpenAI
         
@@ -33,38 +169,274 @@ class AIJobDescriptionGenerator:
             location (str): Job location
             work_type (str): Work type (remote, onsite, hybrid)
             company_info (str, optional): Additional company information
+            use_cache (bool): Serve a cached generation for the same inputs if there is one
+            on_upgrade (callable, optional): Called with the AI sections when a
+                hedged (template) answer is later superseded by the AI result
             
         Returns:
-            dict: Generated job description with sections
+            dict: Generated job description with sections; 'source' is
+            'ai', 'template' or 'hedged' (template sent because the AI call
+            ran over JD_AI_LATENCY_BUDGET)
         """
+        params = {
+            'title': title,
+            'department': department,
+            'level': level,
+            'location': location,
+            'work_type': work_type,
+            'company_info': company_info or '',
+        }
+        return get_or_generate(
+            params, self.model, PROMPT_VERSION,
+            lambda: self._generate(**params, on_upgrade=on_upgrade), bypass=not use_cache
+        )
+    
+    def new_async_client(self, max_retries=0):
+        """An AsyncOpenAI client with our timeouts, or None without an API key"""
+        api_key = config('OPENAI_API_KEY', default='')
+        if not api_key:
+            return None
+        return openai.AsyncOpenAI(
+            api_key=api_key,
+            timeout=openai.Timeout(
+                getattr(settings, 'JD_AI_READ_TIMEOUT', 30), connect=getattr(settings, 'JD_AI_CONNECT_TIMEOUT', 5)
+            ),
+            max_retries=max_retries,
+        )
+    
+    async def agenerate_job_description(self, title, department, level, location, work_type, company_info=None,
+                                        use_cache=True, client=None, gate=None):
+        """
+        generate_job_description for asyncio callers running many generations at once.
         
-        if not self.client or not getattr(self.client, 'api_key', None):
-            logger.warning("OpenAI API key not configured, falling back to template generation")
-            return self._fallback_generation(title, department, level, location, work_type)
+        `client` is an AsyncOpenAI client created on the running loop (see
+        new_async_client). A 429 pauses every caller sharing `gate` (a
+        RateLimitGate) for the upstream's Retry-After, then the call is
+        retried; rate limiting is not counted against the circuit breaker.
+        """
+        params = {
+            'title': title, 'department': department, 'level': level,
+            'location': location, 'work_type': work_type, 'company_info': company_info or '',
+        }
+        key = ai_cache.cache_key(params, self.model, PROMPT_VERSION)
+        if use_cache:
+            cached = await sync_to_async(ai_cache.lookup)(key)
+            if cached is not None:
+                ai_cache.stats.record(ai_cache.STATS_NAME, hit=True)
+                return cached
+        ai_cache.stats.record(ai_cache.STATS_NAME, hit=False)
         
-        try:
-            # Create the prompt
-            prompt = self._create_prompt(title, department, level, location, work_type, company_info)
+        if client is None:
+            return self._template(title, department, level, location, work_type)
+        
+        gate = gate or RateLimitGate()
+        prompt = self._create_prompt(title, department, level, location, work_type, company_info)
+        retries = getattr(settings, 'JD_AI_MAX_RETRIES', 2)
+        base_delay = getattr(settings, 'JD_AI_RETRY_BASE_DELAY', 0.5)
+        for attempt in range(retries + 1):
+            await gate.wait()
+            if not self.breaker.allow():
+                break
+            try:
+                response = await client.chat.completions.create(
+                    model=self.model,
+                    messages=self._messages(prompt),
+                    max_tokens=1500,
+                    temperature=0.7
+                )
+            except openai.RateLimitError as e:
+                self.breaker.record_success()
+                gate.pause(retry_after(e.response) or backoff_delay(attempt, base_delay))
+                logger.warning("OpenAI rate limit hit, pausing batch generation")
+                continue
+            except RETRYABLE_ERRORS as e:
+                self.breaker.record_failure()
+                logger.warning(f"Transient error generating job description with AI: {str(e)}")
+                await asyncio.sleep(backoff_delay(attempt, base_delay))
+                continue
+            except Exception as e:
+                self.breaker.record_success()
+                logger.error(f"Error generating job description with AI: {str(e)}")
+                break
+            self.breaker.record_success()
             
-            # Call OpenAI API
-            response = self.client.chat.completions.create(
+            sections = self._parse_ai_response(response.choices[0].message.content)
+            sections['source'] = 'ai'
+            await sync_to_async(ai_cache.store)(key, params, self.model, PROMPT_VERSION, sections)
+            return sections
+        
+        return self._template(title, department, level, location, work_type)
+    
+    async def stream_job_description(self, title, department, level, location, work_type, company_info=None,
+                                     use_cache=True):
+        """
+        Generate like generate_job_description, yielding (event, data) pairs as the AI writes.
+        
+        'delta' events carry {'section', 'text'} to append to that section;
+        the last event is always 'done' with the complete sections (which
+        replace the streamed text: a cached result, the template if the
+        upstream is unavailable or fails, or the parsed AI output).
+        """
+        params = {
+            'title': title, 'department': department, 'level': level,
+            'location': location, 'work_type': work_type, 'company_info': company_info or '',
+        }
+        key = ai_cache.cache_key(params, self.model, PROMPT_VERSION)
+        if use_cache:
+            cached = await sync_to_async(ai_cache.lookup)(key)
+            if cached is not None:
+                ai_cache.stats.record(ai_cache.STATS_NAME, hit=True)
+                yield 'done', cached
+                return
+        ai_cache.stats.record(ai_cache.STATS_NAME, hit=False)
+        
+        if not self.async_client or not self.breaker.allow():
+            logger.warning("OpenAI unavailable, streaming the template job description")
+            yield 'done', self._template(title, department, level, location, work_type)
+            return
+        
+        prompt = self._create_prompt(title, department, level, location, work_type, company_info)
+        parser = SectionParser()
+        failed = False
+        try:
+            stream = await self.async_client.chat.completions.create(
                 model=self.model,
-                messages=[
-                    {"role": "system", "content": "You are an expert HR professional and technical recruiter with 15+ years of experience creating compelling job descriptions. You write clear, engaging, and comprehensive job descriptions that attract top talent."},
-                    {"role": "user", "content": prompt}
-                ],
+                messages=self._messages(prompt),
                 max_tokens=1500,
-                temperature=0.7
+                temperature=0.7,
+                stream=True,
             )
-            
-            # Parse the response
-            content = response.choices[0].message.content
-            return self._parse_ai_response(content)
-            
+            async for chunk in stream:
+                content = chunk.choices[0].delta.content if chunk.choices else None
+                for section, text in parser.feed(content or ''):
+                    yield 'delta', {'section': section, 'text': text}
+            for section, text in parser.close():
+                yield 'delta', {'section': section, 'text': text}
+        except Exception as e:
+            failed = isinstance(e, RETRYABLE_ERRORS)
+            logger.error(f"Error streaming job description with AI: {str(e)}")
+            yield 'done', self._template(title, department, level, location, work_type)
+            return
+        finally:
+            # Also runs when the client disconnects mid-stream, so a half-open trial is never left dangling
+            (self.breaker.record_failure if failed else self.breaker.record_success)()
+        
+        sections = parser.sections
+        sections['source'] = 'ai'
+        await sync_to_async(ai_cache.store)(key, params, self.model, PROMPT_VERSION, sections)
+        yield 'done', sections
+    
+    def _generate(self, title, department, level, location, work_type, company_info=None, on_upgrade=None):
+        """Generate without the cache; returns (sections, generated by AI)"""
+        
+        if not self.client or not getattr(self.client, 'api_key', None):
+            logger.warning("OpenAI API key not configured, falling back to template generation")
+            return self._template(title, department, level, location, work_type), False
+        
+        prompt = self._create_prompt(title, department, level, location, work_type, company_info)
+        budget = getattr(settings, 'JD_AI_LATENCY_BUDGET', 0)
+        
+        if not budget:
+            try:
+                return self._complete(prompt), True
+            except Exception as e:
+                logger.error(f"Error generating job description with AI: {str(e)}")
+                return self._template(title, department, level, location, work_type), False
+        
+        # Race the AI call against the budget; past it, answer with the template
+        # and let the upstream thread hand its result on when it arrives
+        params = {
+            'title': title, 'department': department, 'level': level,
+            'location': location, 'work_type': work_type, 'company_info': company_info or '',
+        }
+        hedge = _Hedge()
+        future = _get_upstream_executor().submit(self._complete_hedged, prompt, hedge, params, on_upgrade)
+        try:
+            return future.result(timeout=budget), True
+        except FutureTimeout:
+            with hedge.lock:
+                hedge.abandoned = not hedge.finished
+            if not hedge.abandoned:
+                return self._budget_result(future, title, department, level, location, work_type)
+            logger.warning("AI job description over the %ss budget, answering with the template", budget)
+            return self._template(title, department, level, location, work_type, source='hedged'), False
         except Exception as e:
             logger.error(f"Error generating job description with AI: {str(e)}")
-            # Fallback to template generation
-            return self._fallback_generation(title, department, level, location, work_type)
+            return self._template(title, department, level, location, work_type), False
+    
+    def _budget_result(self, future, title, department, level, location, work_type):
+        """The result of an AI call that finished just as the budget ran out"""
+        try:
+            return future.result(), True
+        except Exception as e:
+            logger.error(f"Error generating job description with AI: {str(e)}")
+            return self._template(title, department, level, location, work_type), False
+    
+    def _complete(self, prompt):
+        """One AI generation with bounded, jittered retries, gated by the circuit breaker"""
+        if not self.breaker.allow():
+            raise CircuitOpen("OpenAI circuit is open, skipping the upstream")
+        
+        try:
+            response = call_with_retries(
+                lambda: self.client.chat.completions.create(
+                    model=self.model,
+                    messages=self._messages(prompt),
+                    max_tokens=1500,
+                    temperature=0.7
+                ),
+                retries=getattr(settings, 'JD_AI_MAX_RETRIES', 2),
+                base_delay=getattr(settings, 'JD_AI_RETRY_BASE_DELAY', 0.5),
+                retry_on=RETRYABLE_ERRORS,
+            )
+        except RETRYABLE_ERRORS:
+            self.breaker.record_failure()
+            raise
+        except Exception:
+            # The upstream answered (e.g. a 400); it is reachable, so not a health failure
+            self.breaker.record_success()
+            raise
+        self.breaker.record_success()
+        
+        sections = self._parse_ai_response(response.choices[0].message.content)
+        sections['source'] = 'ai'
+        return sections
+    
+    def _complete_hedged(self, prompt, hedge, params, on_upgrade):
+        """_complete on an upstream thread; upgrades the hedged answer if the caller gave up waiting"""
+        sections = None
+        try:
+            sections = self._complete(prompt)
+            return sections
+        finally:
+            with hedge.lock:
+                hedge.finished = True
+                abandoned = hedge.abandoned
+            if abandoned and sections is not None:
+                try:
+                    self._upgrade(params, sections, on_upgrade)
+                except Exception:
+                    logger.exception("Upgrading a hedged job description failed")
+                finally:
+                    connections.close_all()
+    
+    def _upgrade(self, params, sections, on_upgrade):
+        """Cache a late AI result so the next request gets it, and pass it to the caller's hook"""
+        key = ai_cache.cache_key(params, self.model, PROMPT_VERSION)
+        ai_cache.store(key, params, self.model, PROMPT_VERSION, sections)
+        if on_upgrade is not None:
+            on_upgrade(sections)
+    
+    def _template(self, title, department, level, location, work_type, source='template'):
+        sections = self._fallback_generation(title, department, level, location, work_type)
+        sections['source'] = source
+        return sections
+    
+    def _messages(self, prompt):
+        return [
+            {"role": "system", "content": "You are an expert HR professional and technical recruiter with 15+ years of experience creating compelling job descriptions. You write clear, engaging, and comprehensive job descriptions that attract top talent."},
+            {"role": "user", "content": prompt}
+        ]
     
     def _create_prompt(self, title, department, level, location, work_type, company_info):
         """Create a detailed prompt for the AI"""
@@ -129,52 +501,10 @@ Format the response with clear section headers exactly as shown above.
     
     def _parse_ai_response(self, content):
         """Parse the AI response into structured sections"""
-        
-        sections = {
-            'description': '',
-            'responsibilities': '',
-            'requirements': ''
-        }
-        
-        # Split content by section headers
-        content = content.strip()
-        current_section = None
-        current_content = []
-        
-        for line in content.split('\n'):
-            line = line.strip()
-            
-            # Check for section headers
-            if line.upper().startswith('**DESCRIPTION:'):
-                if current_section and current_content:
-                    sections[current_section] = '\n'.join(current_content).strip()
-                current_section = 'description'
-                current_content = []
-            elif line.upper().startswith('**RESPONSIBILITIES:'):
-                if current_section and current_content:
-                    sections[current_section] = '\n'.join(current_content).strip()
-                current_section = 'responsibilities'
-                current_content = []
-            elif line.upper().startswith('**REQUIREMENTS:'):
-                if current_section and current_content:
-                    sections[current_section] = '\n'.join(current_content).strip()
-                current_section = 'requirements'
-                current_content = []
-            else:
-                # Add content to current section
-                if current_section and line:
-                    current_content.append(line)
-        
-        # Add the last section
-        if current_section and current_content:
-            sections[current_section] = '\n'.join(current_content).strip()
-        
-        # If parsing failed, try to extract content more liberally
-        if not any(sections.values()):
-            # Fallback: use the entire content as description
-            sections['description'] = content
-            
-        return sections
+        parser = SectionParser()
+        parser.feed(content.strip())
+        parser.close()
+        return parser.sections
     
     def _fallback_generation(self, title, department, level, location, work_type):
         """Fallback to template-based generation when AI is not available"""
@@ -0,0 +1,188 @@
+"""
+Job description generation for many draft jobs at once.
+
+A batch is a list of items, each a draft job id and the
+generate_job_description arguments for it. The generations run
+concurrently on one event loop, at most JD_BATCH_CONCURRENCY at a time,
+sharing a RateLimitGate so one 429 pauses the whole batch instead of
+every generation running into the limit. The results are then written to
+the drafts with one bulk_update. Only AI results are written: when the AI
+is unavailable the fallback template is not, and the draft stays as it
+was. A draft edited while its description was being generated keeps the
+edit. bulk_update skips model signals, so cache
+versions and the sync change log are updated here.
+"""
+import asyncio
+from asgiref.sync import async_to_sync, sync_to_async
+from django.conf import settings
+from django.db import transaction
+from django.utils import timezone
+from recruitment_backend.versions import bump_version_on_commit
+from sync.changes import record_changes
+from .ai_service import ai_generator
+from .models import Department, Job
+from .resilience import RateLimitGate
+
+BATCH_MAX_JOBS = 200
+
+LEVELS = {value for value, _ in Job.EXPERIENCE_LEVEL_CHOICES}
+WORK_TYPES = {value for value, _ in Job.WORK_TYPE_CHOICES}
+
+
+def parse_ids(value):
+    """A list of unique job ids, or None if `value` is not one"""
+    if not isinstance(value, list) or not value or len(value) > BATCH_MAX_JOBS:
+        return None
+    try:
+        ids = [int(item) for item in value]
+    except (TypeError, ValueError):
+        return None
+    return list(dict.fromkeys(ids))
+
+
+def parse_specs(value):
+    """generate_job_description arguments for each job spec, or None if `value` is not a valid list of them"""
+    if not isinstance(value, list) or not value or len(value) > BATCH_MAX_JOBS:
+        return None
+    specs = []
+    for spec in value:
+        if not isinstance(spec, dict) or not str(spec.get('title') or '').strip():
+            return None
+        params = {
+            'title': str(spec['title']).strip(),
+            'department': str(spec.get('department') or ''),
+            'level': spec.get('level') or 'mid',
+            'location': str(spec.get('location') or 'Remote'),
+            'work_type': spec.get('work_type') or 'remote',
+            'company_info': str(spec.get('company_info') or ''),
+        }
+        if params['level'] not in LEVELS or params['work_type'] not in WORK_TYPES:
+            return None
+        specs.append(params)
+    return specs
+
+
+def job_params(job):
+    """generate_job_description arguments for an existing job"""
+    return {
+        'title': job.title,
+        'department': job.department.name if job.department else '',
+        'level': job.experience_level,
+        'location': job.location,
+        'work_type': job.work_type,
+        'company_info': '',
+    }
+
+
+def create_drafts(specs, organization, user=None):
+    """Create a draft job per spec (see parse_specs); returns the batch items for them"""
+    departments = {
+        department.name.casefold(): department
+        for department in Department.objects.filter(organization=organization)
+    }
+    items = []
+    with transaction.atomic():
+        for params in specs:
+            job = Job.objects.create(
+                organization=organization,
+                title=params['title'],
+                department=departments.get(params['department'].casefold()),
+                experience_level=params['level'],
+                location=params['location'],
+                work_type=params['work_type'],
+                is_remote=params['work_type'] == 'remote',
+                description='',
+                requirements='',
+                status='draft',
+                created_by=user,
+            )
+            items.append({'job_id': job.pk, 'params': params})
+    return items
+
+
+async def _generate_all(params_list, concurrency, use_cache, on_progress=None):
+    semaphore = asyncio.Semaphore(concurrency)
+    gate = RateLimitGate()
+    # A client per batch: its connection pool belongs to this event loop
+    client = ai_generator.new_async_client()
+
+    async def generate(params):
+        try:
+            async with semaphore:
+                return await ai_generator.agenerate_job_description(
+                    **params, use_cache=use_cache, client=client, gate=gate
+                )
+        finally:
+            if on_progress is not None:
+                await sync_to_async(on_progress)()
+
+    try:
+        return await asyncio.gather(*(generate(params) for params in params_list), return_exceptions=True)
+    finally:
+        if client is not None:
+            await client.close()
+
+
+def _after_write(jobs):
+    """Signal-equivalent bookkeeping for jobs changed by a bulk write"""
+    by_organization = {}
+    for job in jobs:
+        by_organization.setdefault(job.organization_id, []).append(job.pk)
+    for organization_id, job_ids in by_organization.items():
+        bump_version_on_commit(organization_id)
+        record_changes(Job, job_ids, 'updated', organization_id)
+
+
+def run_batch(items, organization_id=None, concurrency=None, use_cache=True, on_progress=None):
+    """
+    Generate descriptions for the draft jobs in `items` and write them back.
+
+    `on_progress` is called (synchronously) after each generation finishes.
+
+    Returns one {'id', 'status'} outcome per item: 'generated' (with the
+    result's 'source'), 'edited' (the draft changed while generating and
+    was left alone), 'failed' (with 'error'; also when only the fallback
+    template was available, which is not written) or 'not_found'
+    (missing, no longer a draft or another tenant's).
+    """
+    drafts = Job.objects.filter(pk__in=[item['job_id'] for item in items], status='draft')
+    if organization_id is not None:
+        drafts = drafts.filter(organization_id=organization_id)
+    loaded_at = dict(drafts.values_list('id', 'updated_at'))
+    todo = [item for item in items if item['job_id'] in loaded_at and item.get('params')]
+
+    results = async_to_sync(_generate_all)(
+        [item['params'] for item in todo],
+        concurrency or getattr(settings, 'JD_BATCH_CONCURRENCY', 5),
+        use_cache,
+        on_progress,
+    )
+
+    outcomes = {}
+    generated = {}
+    for item, result in zip(todo, results):
+        if isinstance(result, Exception):
+            outcomes[item['job_id']] = {'status': 'failed', 'error': str(result)}
+        elif result.get('source') != 'ai':
+            outcomes[item['job_id']] = {'status': 'failed', 'error': 'AI generation unavailable'}
+        else:
+            generated[item['job_id']] = result
+
+    now = timezone.now()
+    with transaction.atomic():
+        changed = []
+        for job in Job.objects.select_for_update().filter(pk__in=generated, status='draft'):
+            if job.updated_at != loaded_at[job.pk]:
+                outcomes[job.pk] = {'status': 'edited'}
+                continue
+            sections = generated[job.pk]
+            job.description = sections['description']
+            job.responsibilities = sections['responsibilities']
+            job.requirements = sections['requirements']
+            job.updated_at = now
+            changed.append(job)
+            outcomes[job.pk] = {'status': 'generated', 'source': sections['source']}
+        Job.objects.bulk_update(changed, ['description', 'responsibilities', 'requirements', 'updated_at'])
+        _after_write(changed)
+
+    return [{'id': item['job_id'], **outcomes.get(item['job_id'], {'status': 'not_found'})} for item in items]
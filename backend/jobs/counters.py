@@ -0,0 +1,80 @@
+"""
+Per-job, per-stage application counters.
+
+Counters are adjusted with F() expressions, so concurrent writers never
+lose an update. reconcile_stage_counts() recomputes them from the
+applications table in bulk and repairs any drift, e.g. after queryset
+update() calls that bypass signals.
+"""
+from django.db import IntegrityError, transaction
+from django.db.models import Count, F
+from .models import JobStageCount
+
+
+def adjust_stage_count(job_id, stage, delta):
+    """Atomically add `delta` to one job's counter for a stage"""
+    if not delta:
+        return
+    updated = JobStageCount.objects.filter(job_id=job_id, stage=stage).update(count=F('count') + delta)
+    if updated or delta < 0:
+        return
+    try:
+        with transaction.atomic():
+            JobStageCount.objects.create(job_id=job_id, stage=stage, count=delta)
+    except IntegrityError:
+        # Another writer created the row first
+        JobStageCount.objects.filter(job_id=job_id, stage=stage).update(count=F('count') + delta)
+
+
+def move_stage_count(job_id, from_stage, to_job_id, to_stage):
+    adjust_stage_count(job_id, from_stage, -1)
+    adjust_stage_count(to_job_id, to_stage, 1)
+
+
+def stage_count_map(job, stages):
+    """{stage: count} for a job with every given stage present; uses prefetched stage_counts"""
+    counts = dict.fromkeys(stages, 0)
+    for row in job.stage_counts.all():
+        counts[row.stage] = row.count
+    return counts
+
+
+def reconcile_stage_counts(jobs=None):
+    """
+    Rebuild counters from the applications table.
+
+    Returns the number of counter rows that were created, changed or removed.
+    """
+    from candidates.models import JobApplication
+    from .models import Job
+
+    if jobs is None:
+        jobs = Job.objects.all()
+
+    actual = {
+        (row['job_id'], row['stage']): row['total']
+        for row in JobApplication.objects.filter(job__in=jobs).values('job_id', 'stage').annotate(
+            total=Count('id')
+        ).order_by()
+    }
+
+    with transaction.atomic():
+        stored = {
+            (row.job_id, row.stage): row
+            for row in JobStageCount.objects.select_for_update().filter(job__in=jobs)
+        }
+        to_update, to_create = [], []
+        for key, total in actual.items():
+            row = stored.pop(key, None)
+            if row is None:
+                to_create.append(JobStageCount(job_id=key[0], stage=key[1], count=total))
+            elif row.count != total:
+                row.count = total
+                to_update.append(row)
+        stale = [row.pk for row in stored.values()]
+
+        JobStageCount.objects.bulk_create(to_create)
+        JobStageCount.objects.bulk_update(to_update, ['count'])
+        JobStageCount.objects.filter(pk__in=stale).delete()
+
+    return len(to_create) + len(to_update) + len(stale)
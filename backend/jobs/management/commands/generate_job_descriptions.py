@@ -0,0 +1,67 @@
+import json
+from collections import Counter
+from django.core.management.base import BaseCommand, CommandError
+from accounts.models import Organization
+from jobs.batch import create_drafts, job_params, parse_specs, run_batch
+from jobs.models import Job
+
+
+class Command(BaseCommand):
+    help = 'Generate descriptions for many draft jobs at once, concurrently, and write them to the drafts'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            'job_ids', nargs='*', type=int,
+            help='Draft job ids (default: every draft of --organization)'
+        )
+        parser.add_argument(
+            '--organization', dest='organization',
+            help='Organization slug whose drafts to generate, or to create the --specs drafts in'
+        )
+        parser.add_argument(
+            '--specs', dest='specs',
+            help='JSON file with a list of job specs (title, department, level, location, work_type, '
+                 'company_info) to create drafts from'
+        )
+        parser.add_argument(
+            '--concurrency', type=int, default=None,
+            help='Generations to run at once (default: JD_BATCH_CONCURRENCY)'
+        )
+        parser.add_argument(
+            '--bypass-cache', action='store_true',
+            help='Generate afresh even where a cached generation exists'
+        )
+
+    def handle(self, *args, **options):
+        organization = None
+        if options['organization']:
+            organization = Organization.objects.filter(slug=options['organization']).first()
+            if organization is None:
+                raise CommandError(f"Unknown organization {options['organization']}")
+
+        if options['specs']:
+            if organization is None:
+                raise CommandError('--specs needs --organization')
+            with open(options['specs']) as specs_file:
+                specs = parse_specs(json.load(specs_file))
+            if specs is None:
+                raise CommandError('The specs file must hold a list of job specs, each with a title')
+            items = create_drafts(specs, organization)
+            self.stdout.write(f"  {len(items)} draft(s) created")
+        else:
+            if not options['job_ids'] and organization is None:
+                raise CommandError('Give job ids, --organization or --specs')
+            drafts = Job.objects.filter(status='draft').select_related('department')
+            if options['job_ids']:
+                drafts = drafts.filter(pk__in=options['job_ids'])
+            if organization is not None:
+                drafts = drafts.filter(organization=organization)
+            items = [{'job_id': job.pk, 'params': job_params(job)} for job in drafts]
+
+        outcomes = run_batch(items, concurrency=options['concurrency'], use_cache=not options['bypass_cache'])
+        for status, count in sorted(Counter(outcome['status'] for outcome in outcomes).items()):
+            self.stdout.write(f"  {count} job(s) {status}")
+
+        self.stdout.write(
+            self.style.SUCCESS('Successfully generated job descriptions!')
+        )
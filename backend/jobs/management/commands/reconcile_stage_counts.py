@@ -0,0 +1,27 @@
+from django.core.management.base import BaseCommand
+from accounts.models import Organization
+from jobs.counters import reconcile_stage_counts
+from jobs.models import Job
+
+
+class Command(BaseCommand):
+    help = 'Recompute per-stage application counters on jobs and repair any drift'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--organization', dest='organization',
+            help='Only reconcile jobs of this organization slug'
+        )
+
+    def handle(self, *args, **options):
+        organizations = Organization.objects.all()
+        if options['organization']:
+            organizations = organizations.filter(slug=options['organization'])
+
+        for organization in organizations:
+            repaired = reconcile_stage_counts(Job.objects.filter(organization=organization))
+            self.stdout.write(f"  {organization.name}: {repaired} counter(s) repaired")
+
+        self.stdout.write(
+            self.style.SUCCESS('Successfully reconciled stage counts!')
+        )
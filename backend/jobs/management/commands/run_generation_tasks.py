@@ -0,0 +1,29 @@
+from datetime import timedelta
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from jobs.tasks import requeue_stale_tasks, run_pending_tasks
+
+
+class Command(BaseCommand):
+    help = 'Run queued job description generations, including ones interrupted by a restart'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--stale-after', type=int, default=getattr(settings, 'JD_GENERATION_STALE_SECONDS', 600),
+            help='Seconds after which a running task is considered abandoned and re-run'
+        )
+        parser.add_argument(
+            '--limit', type=int, default=None,
+            help='Run at most this many tasks'
+        )
+
+    def handle(self, *args, **options):
+        requeued = requeue_stale_tasks(timedelta(seconds=options['stale_after']))
+        self.stdout.write(f"  {requeued} abandoned task(s) requeued")
+
+        ran = run_pending_tasks(limit=options['limit'])
+        self.stdout.write(f"  {ran} task(s) run")
+
+        self.stdout.write(
+            self.style.SUCCESS('Successfully ran generation tasks!')
+        )
@@ -0,0 +1,39 @@
+# Generated by Django 5.0.2 on 2026-10-18 03:32
+
+import django.db.models.deletion
+from django.db import migrations, models
+from django.db.models import Count
+
+
+def populate_stage_counts(apps, schema_editor):
+    JobApplication = apps.get_model('candidates', 'JobApplication')
+    JobStageCount = apps.get_model('jobs', 'JobStageCount')
+    rows = JobApplication.objects.values('job_id', 'stage').annotate(total=Count('id')).order_by()
+    JobStageCount.objects.bulk_create([
+        JobStageCount(job_id=row['job_id'], stage=row['stage'], count=row['total']) for row in rows
+    ], batch_size=1000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('jobs', '0002_job_feedback_template_job_publish_company_website_and_more'),
+        ('candidates', '0003_stagetransition'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='JobStageCount',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('stage', models.CharField(max_length=20)),
+                ('count', models.IntegerField(default=0)),
+                ('job', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='stage_counts', to='jobs.job')),
+            ],
+            options={
+                'db_table': 'job_stage_counts',
+                'unique_together': {('job', 'stage')},
+            },
+        ),
+        migrations.RunPython(populate_stage_counts, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,38 @@
+# Generated by Django 5.0.2 on 2026-10-18 03:52
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('accounts', '0001_initial'),
+        ('jobs', '0003_jobstagecount'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Pipeline',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(max_length=100)),
+                ('stages', models.JSONField(default=list, help_text='Ordered list of {"key", "label", "terminal", "funnel", "skip_to"}; keys are application stages')),
+                ('allow_skips', models.BooleanField(default=True)),
+                ('is_default', models.BooleanField(default=False)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('organization', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='pipelines', to='accounts.organization')),
+            ],
+            options={
+                'db_table': 'pipelines',
+                'ordering': ['name'],
+                'unique_together': {('organization', 'name')},
+            },
+        ),
+        migrations.AddField(
+            model_name='job',
+            name='pipeline',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='jobs', to='jobs.pipeline'),
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 5.0.2 on 2026-10-18 04:01
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('jobs', '0006_cachedgeneration'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='generationtask',
+            name='upgraded_at',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+    ]
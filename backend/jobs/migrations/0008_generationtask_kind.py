@@ -0,0 +1,18 @@
+# Generated by Django 5.0.2 on 2026-10-18 04:07
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('jobs', '0007_generationtask_upgraded_at'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='generationtask',
+            name='kind',
+            field=models.CharField(choices=[('single', 'Single'), ('batch', 'Batch')], default='single', max_length=20),
+        ),
+    ]
@@ -0,0 +1,29 @@
+# Generated by Django 5.0.2 on 2026-10-18 04:17
+
+from django.db import migrations, models
+
+
+def keep_latest_default(apps, schema_editor):
+    """Leave one default pipeline per organization, the most recently updated"""
+    Pipeline = apps.get_model('jobs', 'Pipeline')
+    seen = set()
+    for pipeline in Pipeline.objects.filter(is_default=True).order_by('organization_id', '-updated_at', '-id'):
+        if pipeline.organization_id in seen:
+            Pipeline.objects.filter(pk=pipeline.pk).update(is_default=False)
+        seen.add(pipeline.organization_id)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('accounts', '0001_initial'),
+        ('jobs', '0008_generationtask_kind'),
+    ]
+
+    operations = [
+        migrations.RunPython(keep_latest_default, migrations.RunPython.noop),
+        migrations.AddConstraint(
+            model_name='pipeline',
+            constraint=models.UniqueConstraint(condition=models.Q(('is_default', True)), fields=('organization',), name='one_default_pipeline_per_organization'),
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 5.0.2 on 2026-10-18 04:25
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('jobs', '0009_one_default_pipeline'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='generationtask',
+            name='heartbeat_at',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+    ]
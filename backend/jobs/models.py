@@ -1,4 +1,6 @@
-from django.db import models
+import uuid
+from django.core.exceptions import ValidationError
+from django.db import models, transaction
 from django.contrib.auth import get_user_model
 from django.utils.text import slugify
 
@@ -22,6 +24,49 @@ class Department(models.Model):
         return f"{self.name} - {self.organization.name}"
 
 
+class Pipeline(models.Model):
+    """Stages a job's applications move through; compiled by jobs/pipelines.py"""
+    organization = models.ForeignKey('accounts.Organization', on_delete=models.CASCADE, related_name='pipelines')
+    name = models.CharField(max_length=100)
+    stages = models.JSONField(
+        default=list,
+        help_text='Ordered list of {"key", "label", "terminal", "funnel", "skip_to"}; keys are application stages'
+    )
+    allow_skips = models.BooleanField(default=True)  # any forward move, not only the next stage and skip_to
+    is_default = models.BooleanField(default=False)  # assigned to the organization's new jobs
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+    
+    class Meta:
+        db_table = 'pipelines'
+        unique_together = ['organization', 'name']
+        ordering = ['name']
+        constraints = [
+            models.UniqueConstraint(
+                fields=['organization'], condition=models.Q(is_default=True), name='one_default_pipeline_per_organization'
+            ),
+        ]
+    
+    def __str__(self):
+        return f"{self.name} - {self.organization.name}"
+    
+    def save(self, *args, **kwargs):
+        # Making a pipeline the default demotes the previous one
+        with transaction.atomic():
+            if self.is_default:
+                Pipeline.objects.filter(
+                    organization_id=self.organization_id, is_default=True
+                ).exclude(pk=self.pk).update(is_default=False)
+            super().save(*args, **kwargs)
+    
+    def clean(self):
+        from .pipelines import PipelineError, compile_pipeline
+        try:
+            compile_pipeline(self.stages, self.allow_skips)
+        except PipelineError as exc:
+            raise ValidationError({'stages': str(exc)})
+
+
 class Job(models.Model):
     STATUS_CHOICES = [
         ('draft', 'Draft'),
@@ -93,6 +138,7 @@ class Job(models.Model):
     openings = models.IntegerField(default=1)
     target_hire_date = models.DateField(null=True, blank=True)
     sla_days = models.IntegerField(default=21)  # Service Level Agreement in days
+    pipeline = models.ForeignKey(Pipeline, on_delete=models.SET_NULL, null=True, blank=True, related_name='jobs')
     
     # Team
     hiring_manager = models.ForeignKey(User, on_delete=models.SET_NULL, null=True, related_name='jobs_as_hiring_manager')
@@ -126,6 +172,10 @@ class Job(models.Model):
     def save(self, *args, **kwargs):
         if not self.slug:
             self.slug = slugify(f"{self.title}-{self.organization.name}")
+        if self._state.adding and self.pipeline_id is None:
+            self.pipeline_id = Pipeline.objects.filter(
+                organization_id=self.organization_id, is_default=True
+            ).values_list('id', flat=True).first()
         super().save(*args, **kwargs)
     
     @property
@@ -137,4 +187,80 @@ class Job(models.Model):
     
     @property
     def is_overdue(self):
-        return self.days_open > self.sla_days
\ No newline at end of file
+        return self.days_open > self.sla_days
+
+
+class JobStageCount(models.Model):
+    """Denormalized number of applications per stage for a job, kept current by jobs/signals.py"""
+    job = models.ForeignKey(Job, on_delete=models.CASCADE, related_name='stage_counts')
+    stage = models.CharField(max_length=20)
+    count = models.IntegerField(default=0)
+    
+    class Meta:
+        db_table = 'job_stage_counts'
+        unique_together = ['job', 'stage']
+    
+    def __str__(self):
+        return f"{self.job.title} - {self.stage}: {self.count}"
+
+
+class GenerationTask(models.Model):
+    """A queued AI job description generation, run by jobs/tasks.py"""
+    STATUS_CHOICES = [
+        ('pending', 'Pending'),
+        ('running', 'Running'),
+        ('succeeded', 'Succeeded'),
+        ('failed', 'Failed'),
+    ]
+    KIND_CHOICES = [
+        ('single', 'Single'),
+        ('batch', 'Batch'),
+    ]
+    
+    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    organization = models.ForeignKey(
+        'accounts.Organization', on_delete=models.CASCADE, null=True, blank=True, related_name='generation_tasks'
+    )
+    requested_by = models.ForeignKey(User, on_delete=models.SET_NULL, null=True, related_name='generation_tasks')
+    # single: params are generate_job_description arguments; batch: see jobs/batch.py
+    kind = models.CharField(max_length=20, choices=KIND_CHOICES, default='single')
+    params = models.JSONField(default=dict)
+    status = models.CharField(max_length=20, choices=STATUS_CHOICES, default='pending')
+    result = models.JSONField(null=True, blank=True)
+    error = models.TextField(blank=True)
+    attempts = models.IntegerField(default=0)
+    created_at = models.DateTimeField(auto_now_add=True)
+    started_at = models.DateTimeField(null=True, blank=True)
+    # Refreshed while a long task (a batch) makes progress, so it is not mistaken for abandoned
+    heartbeat_at = models.DateTimeField(null=True, blank=True)
+    finished_at = models.DateTimeField(null=True, blank=True)
+    # Set when a hedged template result was replaced by the late AI result
+    upgraded_at = models.DateTimeField(null=True, blank=True)
+    
+    class Meta:
+        db_table = 'generation_tasks'
+        ordering = ['-created_at']
+        indexes = [
+            models.Index(fields=['status', 'created_at'], name='generation_tasks_queue_idx'),
+        ]
+    
+    def __str__(self):
+        return f"{self.params.get('title', '')} - {self.status}"
+
+
+class CachedGeneration(models.Model):
+    """An AI generation result stored under a hash of its normalized inputs (jobs/ai_cache.py)"""
+    key = models.CharField(max_length=64, unique=True)
+    model = models.CharField(max_length=100)
+    prompt_version = models.IntegerField()
+    params = models.JSONField(default=dict)
+    result = models.JSONField()
+    hits = models.IntegerField(default=0)
+    created_at = models.DateTimeField(auto_now_add=True)
+    last_used_at = models.DateTimeField(auto_now_add=True, db_index=True)
+    
+    class Meta:
+        db_table = 'ai_generation_cache'
+    
+    def __str__(self):
+        return f"{self.params.get('title', '')} ({self.model}, v{self.prompt_version})"
@@ -0,0 +1,167 @@
+"""
+Pipeline definitions compiled into immutable transition tables.
+
+A Pipeline lists its stages in order by their JobApplication stage keys,
+so stage counters, snapshots and analytics keep one vocabulary, and adds
+its own labels, terminal states and allowed skips. compile_pipeline()
+turns a definition into a CompiledPipeline. Jobs without a pipeline
+follow DEFAULT_PIPELINE, which is the progression the API always had.
+
+Compiled tables are cached in process per pipeline. Saving or deleting a
+Pipeline replaces a generation token in the shared cache (see
+jobs/signals.py); every process drops its compiled tables the next time
+it sees a different token.
+"""
+import threading
+import uuid
+from dataclasses import dataclass
+from types import MappingProxyType
+from django.core.cache import cache
+from candidates.models import JobApplication
+from .models import Job, Pipeline
+
+GENERATION_KEY = 'jobs:pipelines:generation'
+
+_STAGE_LABELS = dict(JobApplication.STAGE_CHOICES)
+_STAGE_ORDER = {stage: position for position, (stage, _) in enumerate(JobApplication.STAGE_CHOICES)}
+
+DEFAULT_STAGES = [
+    {'key': stage, 'label': label}
+    for stage, label in JobApplication.STAGE_CHOICES
+    if stage not in ('hired', 'rejected', 'withdrawn')
+] + [
+    {'key': 'hired', 'label': 'Hired', 'terminal': True},
+    {'key': 'rejected', 'label': 'Rejected', 'terminal': True, 'funnel': False},
+    {'key': 'withdrawn', 'label': 'Withdrawn', 'terminal': True, 'funnel': False},
+]
+
+
+class PipelineError(ValueError):
+    pass
+
+
+@dataclass(frozen=True)
+class CompiledPipeline:
+    stages: tuple
+    labels: MappingProxyType
+    terminal: frozenset
+    funnel: tuple  # stages shown on dashboards, in order
+    transitions: MappingProxyType  # stage -> frozenset of stages it may move to
+    next_stages: MappingProxyType  # stage -> stage advance_stage moves to
+
+    @property
+    def initial(self):
+        return self.stages[0]
+
+    def allows(self, from_stage, to_stage):
+        return to_stage in self.transitions.get(from_stage, ())
+
+    def advance(self, stage):
+        """The next non-terminal stage, or None; advancing never hires or rejects"""
+        return self.next_stages.get(stage)
+
+
+def compile_pipeline(stages, allow_skips=True):
+    """
+    Build the transition table for a pipeline definition.
+
+    From a non-terminal stage an application may move to the next stage,
+    to later stages (any of them with allow_skips, else only those in the
+    stage's skip_to), back to any earlier stage, and to any terminal
+    stage. Terminal stages have no way out.
+    """
+    if not isinstance(stages, list) or not stages:
+        raise PipelineError('A pipeline needs a list of stages')
+    keys = []
+    for stage in stages:
+        key = stage.get('key') if isinstance(stage, dict) else None
+        if key not in _STAGE_LABELS:
+            raise PipelineError(f'Unknown stage: {key}')
+        if key in keys:
+            raise PipelineError(f'Duplicate stage: {key}')
+        keys.append(key)
+
+    terminal = frozenset(stage['key'] for stage in stages if stage.get('terminal'))
+    if terminal.issuperset(keys):
+        raise PipelineError('A pipeline needs at least one non-terminal stage')
+
+    transitions, next_stages = {}, {}
+    for position, stage in enumerate(stages):
+        key = stage['key']
+        if key in terminal:
+            transitions[key] = frozenset()
+            continue
+        later = [other for other in keys[position + 1:] if other not in terminal]
+        earlier = [other for other in keys[:position] if other not in terminal]
+        skips = stage.get('skip_to', [])
+        if not isinstance(skips, list) or not set(skips).issubset(later):
+            raise PipelineError(f'{key} can only skip to later non-terminal stages')
+
+        forward = later if allow_skips else later[:1] + skips
+        transitions[key] = frozenset([*forward, *earlier, *terminal])
+        if later:
+            next_stages[key] = later[0]
+
+    return CompiledPipeline(
+        stages=tuple(keys),
+        labels=MappingProxyType({stage['key']: stage.get('label') or _STAGE_LABELS[stage['key']] for stage in stages}),
+        terminal=terminal,
+        funnel=tuple(stage['key'] for stage in stages if stage.get('funnel', True)),
+        transitions=MappingProxyType(transitions),
+        next_stages=MappingProxyType(next_stages),
+    )
+
+
+DEFAULT_PIPELINE = compile_pipeline(DEFAULT_STAGES)
+
+_lock = threading.Lock()
+_generation = None
+_compiled = {}
+
+
+def invalidate_pipelines():
+    """Make every process recompile its pipelines on next use"""
+    cache.set(GENERATION_KEY, uuid.uuid4().hex, timeout=None)
+
+
+def compiled_pipeline(pipeline_id):
+    """The compiled table for a pipeline id (None for the default pipeline)"""
+    global _generation
+    if pipeline_id is None:
+        return DEFAULT_PIPELINE
+
+    generation = cache.get(GENERATION_KEY)
+    with _lock:
+        if generation != _generation:
+            _compiled.clear()
+            _generation = generation
+        compiled = _compiled.get(pipeline_id)
+    if compiled is not None:
+        return compiled
+
+    definition = Pipeline.objects.filter(pk=pipeline_id).values_list('stages', 'allow_skips').first()
+    compiled = compile_pipeline(*definition) if definition else DEFAULT_PIPELINE
+    with _lock:
+        if generation == _generation:
+            _compiled[pipeline_id] = compiled
+    return compiled
+
+
+def pipeline_for(job):
+    return compiled_pipeline(job.pipeline_id)
+
+
+def pipelines_for(job_ids):
+    """{job_id: compiled pipeline} for many jobs in one query"""
+    return {
+        job_id: compiled_pipeline(pipeline_id)
+        for job_id, pipeline_id in Job.objects.filter(pk__in=job_ids).values_list('id', 'pipeline_id')
+    }
+
+
+def funnel_for(jobs):
+    """Funnel stages across the pipelines a Job queryset uses, in stage order"""
+    stages = set()
+    for pipeline_id in jobs.order_by().values_list('pipeline_id', flat=True).distinct():
+        stages.update(compiled_pipeline(pipeline_id).funnel)
+    return sorted(stages, key=_STAGE_ORDER.get) if stages else list(DEFAULT_PIPELINE.funnel)
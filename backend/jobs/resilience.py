@@ -0,0 +1,118 @@
+"""
+Failure handling for calls to slow or flaky upstreams: bounded retries
+with jittered exponential backoff, a circuit breaker, and a shared pause
+for concurrent asyncio callers after the upstream rate-limits them.
+"""
+import asyncio
+import random
+import threading
+import time
+
+
+class CircuitOpen(Exception):
+    """The upstream is considered unhealthy; the call was not attempted"""
+
+
+class CircuitBreaker:
+    """
+    Stop calling an upstream after repeated failures.
+
+    After `failure_threshold` consecutive failures the circuit opens and
+    allow() refuses calls for `reset_timeout` seconds. Then one trial call
+    is let through (half-open): success closes the circuit, failure opens
+    it for another `reset_timeout`.
+    """
+
+    def __init__(self, failure_threshold=5, reset_timeout=60, clock=time.monotonic):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.clock = clock
+        self._lock = threading.Lock()
+        self._failures = 0
+        self._opened_at = None
+        self._trial_running = False
+
+    @property
+    def state(self):
+        with self._lock:
+            if self._opened_at is None:
+                return 'closed'
+            if self.clock() - self._opened_at >= self.reset_timeout:
+                return 'half_open'
+            return 'open'
+
+    def allow(self):
+        with self._lock:
+            if self._opened_at is None:
+                return True
+            if self.clock() - self._opened_at < self.reset_timeout or self._trial_running:
+                return False
+            self._trial_running = True
+            return True
+
+    def record_success(self):
+        with self._lock:
+            self._failures = 0
+            self._opened_at = None
+            self._trial_running = False
+
+    def record_failure(self):
+        with self._lock:
+            self._failures += 1
+            if self._trial_running or self._failures >= self.failure_threshold:
+                self._opened_at = self.clock()
+            self._trial_running = False
+
+
+def backoff_delay(attempt, base_delay=0.5, max_delay=8):
+    """A "full jitter" delay: random, up to base_delay * 2 ** attempt (capped at max_delay)"""
+    return random.uniform(0, min(max_delay, base_delay * 2 ** attempt))
+
+
+def retry_after(response):
+    """Seconds the upstream asked us to wait (Retry-After / retry-after-ms headers), or None"""
+    headers = getattr(response, 'headers', None) or {}
+    for name, scale in (('retry-after-ms', 1000), ('retry-after', 1)):
+        try:
+            return float(headers[name]) / scale
+        except (KeyError, TypeError, ValueError):
+            continue
+    return None
+
+
+class RateLimitGate:
+    """
+    A pause shared by concurrent asyncio callers of one rate-limited upstream.
+
+    When one caller is told to slow down it calls pause(); everyone then
+    waits in wait() until the pause is over, instead of each caller
+    discovering the limit with its own rejected request.
+    """
+
+    def __init__(self, clock=time.monotonic):
+        self.clock = clock
+        self._resume_at = 0
+
+    def pause(self, seconds):
+        self._resume_at = max(self._resume_at, self.clock() + seconds)
+
+    async def wait(self):
+        while (delay := self._resume_at - self.clock()) > 0:
+            await asyncio.sleep(delay)
+
+
+def call_with_retries(func, retries=2, base_delay=0.5, max_delay=8, retry_on=(Exception,), sleep=time.sleep):
+    """
+    Call func(), retrying up to `retries` times on `retry_on` exceptions.
+
+    Waits between attempts use "full jitter": a random delay up to
+    base_delay * 2 ** attempt (capped at max_delay), so callers that failed
+    together do not retry together.
+    """
+    for attempt in range(retries + 1):
+        try:
+            return func()
+        except retry_on:
+            if attempt == retries:
+                raise
+            sleep(backoff_delay(attempt, base_delay, max_delay))
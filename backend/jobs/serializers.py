@@ -1,9 +1,12 @@
 from rest_framework import serializers
-from .models import Department, Job
+from recruitment_backend.serializers import SparseFieldsMixin
+from .counters import stage_count_map
+from .models import Department, GenerationTask, Job, Pipeline
+from .pipelines import PipelineError, compile_pipeline, pipeline_for
 from accounts.serializers import UserSerializer
 
 
-class DepartmentSerializer(serializers.ModelSerializer):
+class DepartmentSerializer(SparseFieldsMixin, serializers.ModelSerializer):
     manager_details = UserSerializer(source='manager', read_only=True)
     
     class Meta:
@@ -12,10 +15,44 @@ class DepartmentSerializer(serializers.ModelSerializer):
             'id', 'organization', 'name', 'description', 'manager',
             'manager_details', 'created_at', 'updated_at'
         ]
+        expandable_fields = ['manager_details']
         read_only_fields = ['id', 'created_at', 'updated_at']
 
 
-class JobSerializer(serializers.ModelSerializer):
+class PipelineSerializer(serializers.ModelSerializer):
+    class Meta:
+        model = Pipeline
+        fields = [
+            'id', 'organization', 'name', 'stages', 'allow_skips', 'is_default',
+            'created_at', 'updated_at'
+        ]
+        read_only_fields = ['id', 'organization', 'created_at', 'updated_at']
+    
+    def validate(self, attrs):
+        stages = attrs.get('stages', self.instance.stages if self.instance else None)
+        allow_skips = attrs.get('allow_skips', self.instance.allow_skips if self.instance else True)
+        try:
+            compile_pipeline(stages, allow_skips)
+        except PipelineError as exc:
+            raise serializers.ValidationError({'stages': str(exc)})
+        return attrs
+
+
+def validate_job_pipeline(serializer, pipeline):
+    """A job may only use a pipeline of its own organization"""
+    if pipeline is None:
+        return pipeline
+    instance = getattr(serializer, 'instance', None)
+    if instance is not None:
+        organization_id = instance.organization_id
+    else:
+        organization_id = serializer.context['request'].user.organization_id
+    if pipeline.organization_id != organization_id:
+        raise serializers.ValidationError('Pipeline belongs to another organization')
+    return pipeline
+
+
+class JobSerializer(SparseFieldsMixin, serializers.ModelSerializer):
     department_details = DepartmentSerializer(source='department', read_only=True)
     hiring_manager_details = UserSerializer(source='hiring_manager', read_only=True)
     recruiters_details = UserSerializer(source='recruiters', many=True, read_only=True)
@@ -33,24 +70,24 @@ class JobSerializer(serializers.ModelSerializer):
             'description', 'requirements', 'responsibilities', 'job_type',
             'experience_level', 'location', 'work_type', 'is_remote', 'salary_min', 'salary_max',
             'salary_currency', 'show_salary', 'required_skills', 'preferred_skills',
-            'status', 'urgency', 'openings', 'target_hire_date', 'sla_days',
+            'status', 'urgency', 'openings', 'target_hire_date', 'sla_days', 'pipeline',
             'hiring_manager', 'hiring_manager_details', 'recruiters', 'recruiters_details',
             'posted_date', 'closed_date', 'created_by', 'created_at', 'updated_at',
             'auto_reject_after_days', 'application_form', 'screening_questions',
             'feedback_template', 'publish_internal', 'publish_external', 'publish_company_website',
             'days_open', 'is_overdue', 'applications_count', 'candidates_by_stage'
         ]
+        expandable_fields = ['department_details', 'hiring_manager_details', 'recruiters_details']
         read_only_fields = ['id', 'slug', 'created_at', 'updated_at']
     
+    def validate_pipeline(self, value):
+        return validate_job_pipeline(self, value)
+    
     def get_applications_count(self, obj):
-        return obj.applications.count()
+        return sum(row.count for row in obj.stage_counts.all())
     
     def get_candidates_by_stage(self, obj):
-        from candidates.models import JobApplication
-        stages = {}
-        for stage, _ in JobApplication.STAGE_CHOICES:
-            stages[stage] = obj.applications.filter(stage=stage).count()
-        return stages
+        return stage_count_map(obj, pipeline_for(obj).stages)
 
 
 class JobCreateSerializer(serializers.ModelSerializer):
@@ -61,11 +98,14 @@ class JobCreateSerializer(serializers.ModelSerializer):
             'job_type', 'experience_level', 'location', 'work_type', 'is_remote', 'salary_min',
             'salary_max', 'salary_currency', 'show_salary', 'required_skills',
             'preferred_skills', 'urgency', 'openings', 'target_hire_date',
-            'sla_days', 'hiring_manager', 'recruiters', 'auto_reject_after_days',
+            'sla_days', 'pipeline', 'hiring_manager', 'recruiters', 'auto_reject_after_days',
             'application_form', 'screening_questions', 'feedback_template',
             'publish_internal', 'publish_external', 'publish_company_website'
         ]
     
+    def validate_pipeline(self, value):
+        return validate_job_pipeline(self, value)
+    
     def create(self, validated_data):
         recruiters = validated_data.pop('recruiters', [])
         job = Job.objects.create(**validated_data)
@@ -73,7 +113,7 @@ class JobCreateSerializer(serializers.ModelSerializer):
         return job
 
 
-class JobListSerializer(serializers.ModelSerializer):
+class JobListSerializer(SparseFieldsMixin, serializers.ModelSerializer):
     department_name = serializers.CharField(source='department.name', read_only=True)
     applications_count = serializers.SerializerMethodField()
     days_open = serializers.IntegerField(read_only=True)
@@ -87,4 +127,14 @@ class JobListSerializer(serializers.ModelSerializer):
         ]
     
     def get_applications_count(self, obj):
-        return obj.applications.count()
\ No newline at end of file
+        return sum(row.count for row in obj.stage_counts.all())
+
+
+class GenerationTaskSerializer(serializers.ModelSerializer):
+    class Meta:
+        model = GenerationTask
+        fields = [
+            'id', 'kind', 'status', 'params', 'result', 'error', 'attempts',
+            'created_at', 'started_at', 'heartbeat_at', 'finished_at', 'upgraded_at'
+        ]
+        read_only_fields = fields
@@ -0,0 +1,49 @@
+"""
+Keep JobStageCount in step with application creates, stage or job moves
+and deletes. The stage and job an application was loaded with are
+remembered on the instance so a save knows which counter to decrement.
+
+Pipeline writes invalidate the compiled transition tables (pipelines.py).
+"""
+from django.db import transaction
+from django.db.models.signals import post_init, post_save, post_delete
+from django.dispatch import receiver
+from candidates.models import JobApplication
+from .counters import adjust_stage_count, move_stage_count
+from .models import Pipeline
+from .pipelines import invalidate_pipelines
+
+
+def _remember_counted(instance):
+    instance._counted_job_id = instance.job_id
+    instance._counted_stage = instance.stage
+
+
+@receiver(post_init, sender=JobApplication)
+def track_counted_stage(sender, instance, **kwargs):
+    _remember_counted(instance)
+
+
+@receiver(post_save, sender=JobApplication)
+def update_stage_counts(sender, instance, created, raw=False, **kwargs):
+    if raw:
+        return
+    if created:
+        adjust_stage_count(instance.job_id, instance.stage, 1)
+    elif (instance._counted_job_id, instance._counted_stage) != (instance.job_id, instance.stage):
+        move_stage_count(instance._counted_job_id, instance._counted_stage, instance.job_id, instance.stage)
+    _remember_counted(instance)
+
+
+@receiver(post_delete, sender=JobApplication)
+def release_stage_count(sender, instance, **kwargs):
+    adjust_stage_count(instance._counted_job_id, instance._counted_stage, -1)
+
+
+@receiver(post_save, sender=Pipeline)
+@receiver(post_delete, sender=Pipeline)
+def recompile_pipelines(sender, instance, **kwargs):
+    # Now for this transaction, and again on commit in case another process
+    # compiled the old definition in between
+    invalidate_pipelines()
+    transaction.on_commit(invalidate_pipelines)
@@ -0,0 +1,126 @@
+"""
+Background AI job description generation.
+
+generate_jd stores a GenerationTask and returns straight away. The task
+runs on a small in-process thread pool (JD_GENERATION_WORKERS) once the
+request's transaction commits, so no request thread waits on OpenAI.
+Workers claim a task with a conditional UPDATE, so each task runs once
+even if several processes pick up leftovers. Results are stored on the
+task row and survive restarts; `manage.py run_generation_tasks`, run from
+cron once per deployment, runs whatever a restart left pending or
+half-done. A running task counts as abandoned once neither started_at nor
+its heartbeat (refreshed as a batch progresses) has moved for
+JD_GENERATION_STALE_SECONDS. With JD_GENERATION_EAGER
+set, tasks run inline instead (tests, single-process setups).
+
+Batch tasks (kind 'batch') generate for many draft jobs at once and
+write the results to the jobs; see batch.py.
+
+A task can succeed with a hedged template answer when the AI call runs
+over JD_AI_LATENCY_BUDGET; when the AI result arrives it replaces the
+task result and upgraded_at is set, so pollers can pick it up.
+"""
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from django.conf import settings
+from django.db import connections, transaction
+from django.db.models import F
+from django.db.models.functions import Coalesce
+from django.utils import timezone
+from .ai_service import ai_generator
+from .batch import run_batch
+from .models import GenerationTask
+
+logger = logging.getLogger(__name__)
+
+_executor = None
+_lock = threading.Lock()
+
+
+def _get_executor():
+    global _executor
+    with _lock:
+        if _executor is None:
+            _executor = ThreadPoolExecutor(
+                max_workers=getattr(settings, 'JD_GENERATION_WORKERS', 4), thread_name_prefix='jd-generation'
+            )
+    return _executor
+
+
+def enqueue_generation(params, organization=None, user=None, kind='single'):
+    """
+    Store a task and schedule it. `params` are generate_job_description
+    keyword arguments, or for a batch {'items': [...], 'use_cache': bool}.
+    """
+    task = GenerationTask.objects.create(organization=organization, requested_by=user, params=params, kind=kind)
+    if getattr(settings, 'JD_GENERATION_EAGER', False):
+        run_generation(task.pk)
+        task.refresh_from_db()
+    else:
+        transaction.on_commit(lambda: _get_executor().submit(_run_in_worker, task.pk))
+    return task
+
+
+def _run_in_worker(task_id):
+    try:
+        run_generation(task_id)
+    except Exception:
+        logger.exception("Job description generation %s crashed", task_id)
+    finally:
+        connections.close_all()
+
+
+def run_generation(task_id):
+    """Claim and run one pending task; False if it was not pending (e.g. another worker has it)"""
+    claimed = GenerationTask.objects.filter(pk=task_id, status='pending').update(
+        status='running', started_at=timezone.now(), attempts=F('attempts') + 1
+    )
+    if not claimed:
+        return False
+
+    def upgrade(sections):
+        GenerationTask.objects.filter(pk=task_id).update(result=sections, upgraded_at=timezone.now())
+
+    task = GenerationTask.objects.get(pk=task_id)
+    try:
+        if task.kind == 'batch':
+            result = {'jobs': run_batch(
+                task.params['items'], organization_id=task.organization_id,
+                use_cache=task.params.get('use_cache', True), on_progress=lambda: heartbeat(task_id)
+            )}
+        else:
+            result = ai_generator.generate_job_description(**task.params, on_upgrade=upgrade)
+    except Exception as exc:
+        logger.exception("Job description generation %s failed", task_id)
+        GenerationTask.objects.filter(pk=task_id).update(
+            status='failed', error=str(exc), finished_at=timezone.now()
+        )
+    else:
+        # A late AI result may already have been stored by upgrade(); never put the template back over it
+        finished = GenerationTask.objects.filter(pk=task_id, upgraded_at__isnull=True).update(
+            status='succeeded', result=result, finished_at=timezone.now()
+        )
+        if not finished:
+            GenerationTask.objects.filter(pk=task_id).update(status='succeeded', finished_at=timezone.now())
+    return True
+
+
+def heartbeat(task_id):
+    """Record that a running task is still making progress"""
+    GenerationTask.objects.filter(pk=task_id, status='running').update(heartbeat_at=timezone.now())
+
+
+def requeue_stale_tasks(older_than):
+    """Put tasks left running by a process that died (no sign of life for `older_than`) back in the queue"""
+    return GenerationTask.objects.alias(
+        last_seen=Coalesce('heartbeat_at', 'started_at')
+    ).filter(status='running', last_seen__lt=timezone.now() - older_than).update(status='pending')
+
+
+def run_pending_tasks(limit=None):
+    """Run pending tasks, oldest first, in this thread; returns how many ran here"""
+    task_ids = GenerationTask.objects.filter(status='pending').order_by('created_at').values_list('id', flat=True)
+    if limit:
+        task_ids = task_ids[:limit]
+    return sum(1 for task_id in list(task_ids) if run_generation(task_id))
@@ -1,3 +1,659 @@
-from django.test import TestCase
+import asyncio
+import json
+import threading
+import time
+from datetime import timedelta
+from io import StringIO
+from types import SimpleNamespace
+from unittest import mock
+import httpx
+import openai
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.test import TestCase, override_settings
+from django.utils import timezone
+from rest_framework.test import APIClient
+from rest_framework_simplejwt.tokens import AccessToken
+from accounts.models import Organization
+from candidates.models import Candidate, JobApplication
+from .ai_cache import cache_key, single_flight
+from .ai_service import SectionParser, ai_generator
+from .batch import job_params, run_batch
+from .counters import reconcile_stage_counts
+from .models import CachedGeneration, Department, GenerationTask, Job, JobStageCount, Pipeline
+from .pipelines import DEFAULT_PIPELINE, PipelineError, compile_pipeline, pipeline_for
+from .resilience import CircuitBreaker, call_with_retries
+from .tasks import requeue_stale_tasks, run_generation
 
-# Create your tests here.
+User = get_user_model()
+
+
+class JobsTestCase(TestCase):
+    """Shared fixtures for job API tests"""
+
+    def setUp(self):
+        self.organization = Organization.objects.create(name='Acme', slug='acme')
+        self.user = User.objects.create_user(
+            username='recruiter', email='recruiter@acme.test', password='secret',
+            organization=self.organization, role='recruiter'
+        )
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+        self.job = self.create_job('Backend Engineer')
+
+    def create_job(self, title, **kwargs):
+        defaults = {
+            'organization': self.organization,
+            'title': title,
+            'description': 'Build things',
+            'requirements': 'Python',
+            'location': 'Remote',
+            'status': 'open',
+        }
+        defaults.update(kwargs)
+        return Job.objects.create(**defaults)
+
+    def create_applications(self, count, stage='applied', job=None):
+        offset = Candidate.objects.count()
+        return [
+            JobApplication.objects.create(
+                job=job or self.job, stage=stage,
+                candidate=Candidate.objects.create(
+                    organization=self.organization, first_name='Candidate', last_name=str(index),
+                    email=f'candidate{index}@example.com', phone='555-0100'
+                )
+            )
+            for index in range(offset, offset + count)
+        ]
+
+    def counts(self, job=None):
+        return dict((job or self.job).stage_counts.filter(count__gt=0).values_list('stage', 'count'))
+
+
+class StageCountTests(JobsTestCase):
+
+    def test_counters_follow_create_move_and_delete(self):
+        first, second, third = self.create_applications(3)
+        first.move_to_stage('screening')
+        other_job = self.create_job('Frontend Engineer')
+        second.job = other_job
+        second.save()
+        third.delete()
+
+        self.assertEqual(self.counts(), {'screening': 1})
+        self.assertEqual(self.counts(other_job), {'applied': 1})
+
+    def test_reconcile_repairs_drift(self):
+        self.create_applications(2, stage='technical')
+        # Queryset updates bypass signals
+        JobApplication.objects.update(stage='onsite')
+        JobStageCount.objects.create(job=self.create_job('Closed Role'), stage='offer', count=4)
+
+        self.assertEqual(reconcile_stage_counts(), 3)
+        self.assertEqual(self.counts(), {'onsite': 2})
+        self.assertFalse(JobStageCount.objects.filter(stage='offer').exists())
+        self.assertEqual(reconcile_stage_counts(), 0)
+
+    def test_job_list_query_count_is_independent_of_job_count(self):
+        self.create_applications(2)
+        # ETag validators, page count, jobs with departments, stage counters
+        with self.assertNumQueries(4) as few_jobs:
+            self.client.get('/api/jobs/')
+
+        for index in range(10):
+            self.create_applications(2, stage='technical', job=self.create_job(f'Role {index}'))
+        with self.assertNumQueries(len(few_jobs.captured_queries)):
+            response = self.client.get('/api/jobs/')
+
+        self.assertEqual(response.data['results'][0]['applications_count'], 2)
+
+    def test_detail_and_analytics_read_counters(self):
+        self.create_applications(3, stage='hired')
+        self.create_applications(1, stage='offer')
+
+        detail = self.client.get(f'/api/jobs/{self.job.id}/').data
+        analytics = self.client.get(f'/api/jobs/{self.job.id}/analytics/').data
+
+        self.assertEqual(detail['applications_count'], 4)
+        self.assertEqual(detail['candidates_by_stage']['hired'], 3)
+        self.assertEqual(analytics['total_applications'], 4)
+        self.assertEqual(analytics['conversion_rate'], 75)
+
+
+class PipelineTests(JobsTestCase):
+
+    def setUp(self):
+        super().setUp()
+        self.pipeline = Pipeline.objects.create(
+            organization=self.organization, name='Engineering', allow_skips=False, is_default=True,
+            stages=[
+                {'key': 'applied', 'label': 'New'},
+                {'key': 'technical', 'label': 'Take-home', 'skip_to': ['offer']},
+                {'key': 'final'},
+                {'key': 'offer'},
+                {'key': 'hired', 'terminal': True},
+                {'key': 'rejected', 'terminal': True, 'funnel': False},
+            ]
+        )
+
+    def test_compiled_table(self):
+        compiled = compile_pipeline(self.pipeline.stages, allow_skips=False)
+
+        self.assertEqual(compiled.advance('applied'), 'technical')
+        self.assertIsNone(compiled.advance('offer'))
+        self.assertTrue(compiled.allows('technical', 'offer'))
+        self.assertTrue(compiled.allows('final', 'applied'))
+        self.assertFalse(compiled.allows('applied', 'final'))
+        self.assertFalse(compiled.allows('hired', 'offer'))
+        self.assertEqual(compiled.funnel, ('applied', 'technical', 'final', 'offer', 'hired'))
+        self.assertEqual(compiled.labels['technical'], 'Take-home')
+        with self.assertRaises(PipelineError):
+            compile_pipeline([{'key': 'applied', 'skip_to': ['hired']}, {'key': 'hired', 'terminal': True}])
+
+    def test_new_jobs_follow_the_default_pipeline_through_the_api(self):
+        job = self.create_job('Platform Engineer')
+        application = self.create_applications(1, job=job)[0]
+
+        self.client.post(f'/api/applications/{application.id}/advance_stage/')
+        application.refresh_from_db()
+        self.assertEqual(application.stage, 'technical')
+
+        response = self.client.patch(f'/api/applications/{application.id}/', {'stage': 'onsite'}, format='json')
+        self.assertEqual(response.status_code, 400)
+
+        board = self.client.get(f'/api/jobs/{job.id}/candidates/').data
+        self.assertEqual(list(board), ['applied', 'technical', 'final', 'offer', 'hired', 'rejected'])
+        self.assertEqual(len(board['technical']), 1)
+
+    def test_compiled_tables_are_cached_until_the_pipeline_changes(self):
+        job = self.create_job('Platform Engineer')
+        pipeline_for(job)
+        with self.assertNumQueries(0):
+            self.assertEqual(pipeline_for(job).advance('applied'), 'technical')
+
+        self.pipeline.stages = [{'key': 'applied'}, {'key': 'screening'}, {'key': 'hired', 'terminal': True}]
+        self.pipeline.save()
+
+        self.assertEqual(pipeline_for(job).advance('applied'), 'screening')
+        self.assertEqual(pipeline_for(self.job), DEFAULT_PIPELINE)
+
+    def test_jobs_only_take_their_organizations_pipelines(self):
+        other = Organization.objects.create(name='Other', slug='other')
+        foreign = Pipeline.objects.create(
+            organization=other, name='Foreign', stages=[{'key': 'applied'}, {'key': 'hired', 'terminal': True}]
+        )
+        job = {'title': 'Platform Engineer', 'description': 'Build', 'requirements': 'Go', 'location': 'Remote'}
+
+        response = self.client.post('/api/jobs/', {**job, 'pipeline': foreign.pk}, format='json')
+        self.assertEqual(response.status_code, 400)
+        self.assertIn('pipeline', response.data)
+        response = self.client.patch(f'/api/jobs/{self.job.pk}/', {'pipeline': foreign.pk}, format='json')
+        self.assertEqual(response.status_code, 400)
+        response = self.client.post('/api/jobs/', {**job, 'pipeline': self.pipeline.pk}, format='json')
+        self.assertEqual(response.status_code, 201)
+
+    def test_one_default_pipeline_per_organization(self):
+        second = Pipeline.objects.create(
+            organization=self.organization, name='Sales', is_default=True,
+            stages=[{'key': 'applied'}, {'key': 'hired', 'terminal': True}]
+        )
+        self.pipeline.refresh_from_db()
+        self.assertFalse(self.pipeline.is_default)
+        self.assertEqual(list(Pipeline.objects.filter(is_default=True)), [second])
+
+
+class GenerationTaskTests(JobsTestCase):
+
+    def setUp(self):
+        super().setUp()
+        # Template generation: no OpenAI round-trips from tests
+        patcher = mock.patch.object(ai_generator, 'client', None)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    @override_settings(JD_GENERATION_EAGER=True)
+    def test_generate_jd_returns_a_task_with_its_result(self):
+        response = self.client.post('/api/jobs/generate_jd/', {'title': 'Data Engineer', 'department': 'Engineering'})
+
+        self.assertEqual(response.status_code, 202)
+        task = self.client.get(f"/api/generation-tasks/{response.data['id']}/").data
+        self.assertEqual(task['status'], 'succeeded')
+        self.assertIn('Data Engineer', task['result']['description'])
+        self.assertEqual(self.client.post('/api/jobs/generate_jd/', {}).status_code, 400)
+
+    def test_tasks_run_once_after_commit_and_survive_as_rows(self):
+        with self.captureOnCommitCallbacks() as callbacks:
+            response = self.client.post('/api/jobs/generate_jd/', {'title': 'Data Engineer'})
+        task = GenerationTask.objects.get(pk=response.data['id'])
+        self.assertEqual((response.data['status'], len(callbacks)), ('pending', 1))
+
+        self.assertTrue(run_generation(task.pk))
+        self.assertFalse(run_generation(task.pk))
+        task.refresh_from_db()
+        self.assertEqual((task.status, task.attempts), ('succeeded', 1))
+
+    def test_abandoned_tasks_are_requeued_and_run(self):
+        task = GenerationTask.objects.create(
+            requested_by=self.user, params={'title': 'Analyst', 'department': '', 'level': 'mid',
+                                            'location': 'Remote', 'work_type': 'remote'},
+            status='running', started_at=timezone.now() - timedelta(hours=1)
+        )
+        call_command('run_generation_tasks', stdout=StringIO())
+
+        task.refresh_from_db()
+        self.assertEqual(task.status, 'succeeded')
+
+        other = User.objects.create_user(username='other', email='other@acme.test', password='secret')
+        self.client.force_authenticate(other)
+        self.assertEqual(self.client.get(f'/api/generation-tasks/{task.pk}/').status_code, 404)
+
+    def test_a_batch_with_a_recent_heartbeat_is_not_requeued(self):
+        started_at = timezone.now() - timedelta(hours=1)
+        alive = GenerationTask.objects.create(
+            kind='batch', status='running', started_at=started_at, heartbeat_at=timezone.now()
+        )
+        dead = GenerationTask.objects.create(
+            kind='batch', status='running', started_at=started_at, heartbeat_at=started_at
+        )
+
+        self.assertEqual(requeue_stale_tasks(timedelta(minutes=10)), 1)
+        self.assertEqual(GenerationTask.objects.get(pk=alive.pk).status, 'running')
+        self.assertEqual(GenerationTask.objects.get(pk=dead.pk).status, 'pending')
+
+    def test_an_upgrade_before_the_task_finishes_is_kept(self):
+        def generate(on_upgrade=None, **params):
+            on_upgrade({'description': 'From the AI', 'source': 'ai'})
+            return {'description': 'Template', 'source': 'hedged'}
+
+        task = GenerationTask.objects.create(params={'title': 'Data Engineer'})
+        with mock.patch.object(ai_generator, 'generate_job_description', side_effect=generate):
+            run_generation(task.pk)
+
+        task.refresh_from_db()
+        self.assertEqual((task.status, task.result['source']), ('succeeded', 'ai'))
+        self.assertIsNotNone(task.upgraded_at)
+
+
+class GenerationCacheTests(JobsTestCase):
+
+    def setUp(self):
+        super().setUp()
+        self.calls = []
+
+        def generate(**params):
+            self.calls.append(params)
+            return {'description': f"About {params['title']}", 'responsibilities': '', 'requirements': ''}, True
+
+        patcher = mock.patch.object(ai_generator, '_generate', side_effect=generate)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def generate(self, title='Data Engineer', **kwargs):
+        params = {'department': 'Engineering', 'level': 'senior', 'location': 'Berlin', 'work_type': 'hybrid'}
+        params.update(kwargs)
+        return ai_generator.generate_job_description(title, **params)
+
+    def test_normalized_inputs_share_one_upstream_call(self):
+        first = self.generate()
+        second = self.generate('  data   ENGINEER ', location='berlin')
+        self.assertEqual(first, second)
+        self.assertEqual(CachedGeneration.objects.get().hits, 1)
+
+        self.generate(use_cache=False)
+        self.generate(level='lead')
+        self.assertEqual(len(self.calls), 3)
+
+    def test_model_and_prompt_version_are_part_of_the_key(self):
+        params = {'title': 'Data Engineer'}
+        self.assertNotEqual(cache_key(params, 'gpt-3.5-turbo', 1), cache_key(params, 'gpt-4o', 1))
+        self.assertNotEqual(cache_key(params, 'gpt-3.5-turbo', 1), cache_key(params, 'gpt-3.5-turbo', 2))
+
+    def test_fallbacks_are_not_cached_and_entries_expire_and_evict(self):
+        ai_generator._generate.side_effect = lambda **params: ({'description': 'Template'}, False)
+        self.generate()
+        self.assertFalse(CachedGeneration.objects.exists())
+        ai_generator._generate.side_effect = None
+        ai_generator._generate.return_value = ({'description': 'AI'}, True)
+
+        with override_settings(JD_CACHE_MAX_ENTRIES=2):
+            self.generate('First')
+            self.generate('Second')
+            self.generate('First')
+            self.generate('Third')
+        self.assertEqual(
+            sorted(CachedGeneration.objects.values_list('params__title', flat=True)), ['First', 'Third']
+        )
+
+        CachedGeneration.objects.update(created_at=timezone.now() - timedelta(days=30))
+        self.generate('First')
+        self.assertEqual(CachedGeneration.objects.count(), 1)
+
+    def test_single_flight_shares_one_run_between_concurrent_callers(self):
+        release = threading.Event()
+        runs = []
+
+        def compute():
+            runs.append(1)
+            release.wait(5)
+            return 'result'
+
+        results = []
+        threads = [
+            threading.Thread(target=lambda: results.append(single_flight('key', compute))) for _ in range(4)
+        ]
+        for thread in threads:
+            thread.start()
+        while len(runs) == 0:
+            time.sleep(0.01)
+        time.sleep(0.05)
+        release.set()
+        for thread in threads:
+            thread.join()
+
+        self.assertEqual(len(runs), 1)
+        self.assertEqual(sorted(results), [('result', False)] + [('result', True)] * 3)
+
+
+def timeout_error():
+    return openai.APITimeoutError(request=httpx.Request('POST', 'https://api.openai.com/v1/chat/completions'))
+
+
+class FakeCompletions:
+    """Stands in for client.chat.completions; create() blocks until released"""
+
+    def __init__(self, content='**DESCRIPTION:**\nFrom the AI'):
+        self.release = threading.Event()
+        self.release.set()
+        self.content = content
+        self.calls = 0
+
+    def create(self, **kwargs):
+        self.calls += 1
+        self.release.wait(5)
+        return SimpleNamespace(choices=[SimpleNamespace(message=SimpleNamespace(content=self.content))])
+
+
+class ResilienceTests(TestCase):
+
+    def setUp(self):
+        self.completions = FakeCompletions()
+        client = SimpleNamespace(api_key='test', chat=SimpleNamespace(completions=self.completions))
+        for name, value in (('client', client), ('breaker', CircuitBreaker(failure_threshold=2, reset_timeout=60))):
+            patcher = mock.patch.object(ai_generator, name, value)
+            patcher.start()
+            self.addCleanup(patcher.stop)
+
+    def generate(self, **kwargs):
+        return ai_generator._generate('Data Engineer', 'Engineering', 'senior', 'Berlin', 'hybrid', **kwargs)
+
+    def test_breaker_opens_then_lets_one_trial_through(self):
+        now = [0]
+        breaker = CircuitBreaker(failure_threshold=2, reset_timeout=30, clock=lambda: now[0])
+        breaker.record_failure()
+        self.assertTrue(breaker.allow())
+        breaker.record_failure()
+        self.assertEqual(breaker.state, 'open')
+        self.assertFalse(breaker.allow())
+
+        now[0] = 31
+        self.assertEqual(breaker.state, 'half_open')
+        self.assertTrue(breaker.allow())
+        self.assertFalse(breaker.allow())
+        breaker.record_failure()
+        self.assertEqual(breaker.state, 'open')
+
+        now[0] = 62
+        self.assertTrue(breaker.allow())
+        breaker.record_success()
+        self.assertEqual(breaker.state, 'closed')
+
+    def test_retries_transient_errors_with_capped_jitter(self):
+        attempts = []
+        sleeps = []
+
+        def flaky():
+            attempts.append(1)
+            if len(attempts) < 3:
+                raise timeout_error()
+            return 'ok'
+
+        result = call_with_retries(
+            flaky, retries=3, base_delay=1, max_delay=1.5, retry_on=openai.APITimeoutError, sleep=sleeps.append
+        )
+        self.assertEqual(result, 'ok')
+        self.assertEqual(len(sleeps), 2)
+        self.assertTrue(0 <= sleeps[0] <= 1 and 0 <= sleeps[1] <= 1.5)
+
+        with self.assertRaises(ValueError):
+            call_with_retries(mock.Mock(side_effect=ValueError), retry_on=openai.APITimeoutError, sleep=sleeps.append)
+        self.assertEqual(len(sleeps), 2)
+
+    @override_settings(JD_AI_LATENCY_BUDGET=0, JD_AI_MAX_RETRIES=0)
+    def test_open_circuit_skips_the_upstream(self):
+        self.completions.create = mock.Mock(side_effect=timeout_error())
+        for _ in range(2):
+            self.assertEqual(self.generate(), (mock.ANY, False))
+        self.assertEqual(self.completions.create.call_count, 2)
+
+        sections, cacheable = self.generate()
+        self.assertEqual(sections['source'], 'template')
+        self.assertEqual(self.completions.create.call_count, 2)
+
+    @override_settings(JD_AI_LATENCY_BUDGET=0.05)
+    def test_slow_upstream_is_hedged_then_upgraded(self):
+        sections, cacheable = self.generate()
+        self.assertEqual((sections['source'], sections['description'], cacheable), ('ai', 'From the AI', True))
+
+        self.completions.release.clear()
+        upgraded = threading.Event()
+        upgrades = []
+
+        def on_upgrade(result):
+            upgrades.append(result)
+            upgraded.set()
+
+        with mock.patch('jobs.ai_service.ai_cache.store') as store:
+            sections, cacheable = self.generate(on_upgrade=on_upgrade)
+            self.assertEqual((sections['source'], cacheable), ('hedged', False))
+            self.assertTrue(sections['description'].startswith('We are seeking'))
+
+            self.completions.release.set()
+            self.assertTrue(upgraded.wait(5))
+        self.assertEqual(upgrades[0]['source'], 'ai')
+        self.assertEqual(store.call_args.args[-1], upgrades[0])
+
+
+class FakeStream:
+    """Stands in for an OpenAI chat completion stream"""
+
+    def __init__(self, pieces):
+        self.pieces = list(pieces)
+
+    def __aiter__(self):
+        return self
+
+    async def __anext__(self):
+        if not self.pieces:
+            raise StopAsyncIteration
+        delta = SimpleNamespace(content=self.pieces.pop(0))
+        return SimpleNamespace(choices=[SimpleNamespace(delta=delta)])
+
+
+class StreamingGenerationTests(JobsTestCase):
+    TEXT = "**DESCRIPTION:**\nWe are hiring.\nJoin us.\n**RESPONSIBILITIES:**\n- Ship\n**REQUIREMENTS:**\n- Python"
+
+    def setUp(self):
+        super().setUp()
+        self.create = mock.AsyncMock(
+            side_effect=lambda **kwargs: FakeStream(self.TEXT[i:i + 5] for i in range(0, len(self.TEXT), 5))
+        )
+        client = SimpleNamespace(chat=SimpleNamespace(completions=SimpleNamespace(create=self.create)))
+        for name, value in (('async_client', client), ('breaker', CircuitBreaker())):
+            patcher = mock.patch.object(ai_generator, name, value)
+            patcher.start()
+            self.addCleanup(patcher.stop)
+        self.stream_headers = {
+            'Authorization': f'Bearer {AccessToken.for_user(self.user)}', 'Accept': 'text/event-stream'
+        }
+
+    async def stream(self, data):
+        # The ASGI test client consumes the async event stream natively, as uvicorn does
+        response = await self.async_client.post('/api/jobs/generate_jd_stream/', data, headers=self.stream_headers)
+        self.assertEqual(response['Content-Type'], 'text/event-stream')
+        body = b''.join([chunk async for chunk in response.streaming_content])
+        events = []
+        for block in body.decode().strip().split('\n\n'):
+            event, data = block.split('\n')
+            events.append((event[len('event: '):], json.loads(data[len('data: '):])))
+        return events
+
+    def test_incremental_parse_matches_whole_response_parse(self):
+        parser = SectionParser()
+        deltas = []
+        for i in range(0, len(self.TEXT), 3):
+            deltas.extend(parser.feed(self.TEXT[i:i + 3]))
+        deltas.extend(parser.close())
+
+        streamed = {}
+        for section, text in deltas:
+            streamed[section] = streamed.get(section, '') + text
+        self.assertEqual(streamed, ai_generator._parse_ai_response(self.TEXT))
+        # Text is sent before its line ends
+        self.assertEqual(deltas[0], ('description', 'W'))
+
+    async def test_stream_sends_sections_as_they_arrive_then_caches(self):
+        events = await self.stream({'title': 'Data Engineer'})
+        self.assertEqual({event for event, _ in events[:-1]}, {'delta'})
+        done = events[-1]
+        self.assertEqual(done[0], 'done')
+        self.assertEqual(done[1]['description'], 'We are hiring.\nJoin us.')
+        self.assertEqual((done[1]['requirements'], done[1]['source']), ('- Python', 'ai'))
+
+        self.assertEqual(await self.stream({'title': 'data engineer'}), [('done', done[1])])
+        self.assertEqual(self.create.call_count, 1)
+
+    async def test_upstream_failure_streams_the_template(self):
+        self.create.side_effect = timeout_error()
+        events = await self.stream({'title': 'Data Engineer'})
+        self.assertEqual(len(events), 1)
+        self.assertEqual((events[0][0], events[0][1]['source']), ('done', 'template'))
+        self.assertFalse(await CachedGeneration.objects.aexists())
+
+        response = await self.async_client.post('/api/jobs/generate_jd_stream/', {}, headers=self.stream_headers)
+        self.assertEqual(response.status_code, 400)
+        self.assertTrue(response.content.startswith(b'event: error\n'))
+
+
+class FakeAsyncCompletions:
+    """Stands in for AsyncOpenAI.chat.completions, tracking calls in flight"""
+
+    def __init__(self):
+        self.in_flight = 0
+        self.max_in_flight = 0
+        self.starts = []
+        self.rate_limited_at = None
+
+    async def create(self, messages, **kwargs):
+        self.starts.append(time.monotonic())
+        if self.rate_limited_at is None:
+            self.rate_limited_at = time.monotonic()
+            request = httpx.Request('POST', 'https://api.openai.com/v1/chat/completions')
+            response = httpx.Response(429, headers={'retry-after-ms': '100'}, request=request)
+            raise openai.RateLimitError('Rate limit reached', response=response, body=None)
+        self.in_flight += 1
+        self.max_in_flight = max(self.max_in_flight, self.in_flight)
+        await asyncio.sleep(0.01)
+        self.in_flight -= 1
+        title = messages[-1]['content'].split('Job Title: ')[1].split('\n')[0]
+        content = f"**DESCRIPTION:**\nAbout {title}\n**RESPONSIBILITIES:**\n- Work\n**REQUIREMENTS:**\n- Skill"
+        return SimpleNamespace(choices=[SimpleNamespace(message=SimpleNamespace(content=content))])
+
+
+class BatchGenerationTests(JobsTestCase):
+
+    def setUp(self):
+        super().setUp()
+        self.completions = FakeAsyncCompletions()
+        client = SimpleNamespace(chat=SimpleNamespace(completions=self.completions), close=mock.AsyncMock())
+        patches = [
+            mock.patch.object(ai_generator, 'new_async_client', return_value=client),
+            mock.patch.object(ai_generator, 'breaker', CircuitBreaker()),
+        ]
+        for patcher in patches:
+            patcher.start()
+            self.addCleanup(patcher.stop)
+
+    def draft(self, title, **kwargs):
+        return self.create_job(title, status='draft', description='', requirements='', **kwargs)
+
+    def test_concurrency_is_capped_and_a_rate_limit_pauses_the_batch(self):
+        drafts = [self.draft(f'Engineer {index}') for index in range(6)]
+        items = [{'job_id': job.pk, 'params': {
+            'title': job.title, 'department': '', 'level': 'mid', 'location': 'Berlin', 'work_type': 'hybrid',
+        }} for job in drafts]
+
+        progress = []
+        outcomes = run_batch(items, concurrency=2, on_progress=lambda: progress.append(True))
+
+        self.assertEqual([outcome['status'] for outcome in outcomes], ['generated'] * 6)
+        self.assertEqual(len(progress), 6)
+        self.assertEqual(self.completions.max_in_flight, 2)
+        resume_at = self.completions.rate_limited_at + 0.1
+        # Only the rate-limited call and the one running beside it started before the pause ended
+        self.assertTrue(all(start >= resume_at for start in self.completions.starts[2:]))
+        drafts[3].refresh_from_db()
+        self.assertEqual((drafts[3].description, drafts[3].requirements), ('About Engineer 3', '- Skill'))
+
+    @override_settings(JD_GENERATION_EAGER=True)
+    def test_specs_create_drafts_that_get_their_descriptions(self):
+        Department.objects.create(organization=self.organization, name='Engineering')
+        specs = [
+            {'title': 'Site Lead', 'department': 'engineering', 'level': 'lead', 'location': 'Lisbon'},
+            {'title': 'Office Manager', 'work_type': 'onsite'},
+        ]
+        response = self.client.post('/api/jobs/generate_batch/', {'jobs': specs}, format='json')
+
+        self.assertEqual((response.status_code, response.data['kind']), (202, 'batch'))
+        task = GenerationTask.objects.get(pk=response.data['id'])
+        self.assertEqual(task.status, 'succeeded')
+        self.assertIsNotNone(task.heartbeat_at)
+        drafts = Job.objects.filter(status='draft').order_by('pk')
+        self.assertEqual([job.description for job in drafts], ['About Site Lead', 'About Office Manager'])
+        self.assertEqual(drafts[0].department.name, 'Engineering')
+        self.assertEqual(
+            task.result['jobs'], [{'id': job.pk, 'status': 'generated', 'source': 'ai'} for job in drafts]
+        )
+
+        for body in ({}, {'jobs': [{'department': 'Sales'}]}, {'jobs': specs, 'job_ids': [1]}):
+            self.assertEqual(self.client.post('/api/jobs/generate_batch/', body, format='json').status_code, 400)
+
+    @override_settings(JD_GENERATION_EAGER=True)
+    def test_only_own_drafts_are_written_and_command_reports_outcomes(self):
+        draft = self.draft('Data Engineer')
+        other = Organization.objects.create(name='Other', slug='other')
+        foreign = self.create_job('Foreign', organization=other, status='draft')
+
+        response = self.client.post(
+            '/api/jobs/generate_batch/', {'job_ids': [draft.pk, self.job.pk, foreign.pk]}, format='json'
+        )
+        result = GenerationTask.objects.get(pk=response.data['id']).result['jobs']
+        self.assertEqual([outcome['status'] for outcome in result], ['generated', 'not_found', 'not_found'])
+        foreign.refresh_from_db()
+        self.assertEqual(foreign.description, 'Build things')
+
+        out = StringIO()
+        call_command('generate_job_descriptions', '--organization', 'other', '--bypass-cache', stdout=out)
+        self.assertIn('1 job(s) generated', out.getvalue())
+        foreign.refresh_from_db()
+        self.assertEqual(foreign.description, 'About Foreign')
+
+    def test_template_results_leave_the_drafts_alone(self):
+        draft = self.draft('Data Engineer')
+        params = job_params(draft)
+
+        with mock.patch.object(ai_generator, 'new_async_client', return_value=None):
+            outcomes = run_batch([{'job_id': draft.pk, 'params': params}], use_cache=False)
+
+        self.assertEqual(outcomes, [{'id': draft.pk, 'status': 'failed', 'error': 'AI generation unavailable'}])
+        draft.refresh_from_db()
+        self.assertEqual(draft.description, '')
@@ -1,8 +1,10 @@
 from rest_framework.routers import DefaultRouter
-from .views import DepartmentViewSet, JobViewSet
+from .views import DepartmentViewSet, GenerationTaskViewSet, JobViewSet, PipelineViewSet
 
 router = DefaultRouter()
 router.register(r'departments', DepartmentViewSet)
+router.register(r'pipelines', PipelineViewSet)
+router.register(r'generation-tasks', GenerationTaskViewSet)
 router.register(r'jobs', JobViewSet)
 
 urlpatterns = router.urls
\ No newline at end of file
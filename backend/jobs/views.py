@@ -1,7 +1,12 @@
 from rest_framework import viewsets, status
 from rest_framework.decorators import action
+from rest_framework.renderers import JSONRenderer
 from rest_framework.response import Response
+from recruitment_backend.renderers import EventStreamRenderer, sse_stream
+from recruitment_backend.mixins import ConditionalGetMixin, SparseFieldsViewSetMixin, UserIdentityMapMixin
 from rest_framework.parsers import MultiPartParser, FormParser
+from django.db.models import Count, Sum
+from django.http import StreamingHttpResponse
 from django.utils import timezone
 from django_filters.rest_framework import DjangoFilterBackend
 import io
@@ -16,18 +21,27 @@ try:
     DOCX_AVAILABLE = True
 except ImportError:
     DOCX_AVAILABLE = False
-from .models import Department, Job
+from .counters import stage_count_map
+from . import batch
+from .ai_cache import STATS_NAME as AI_CACHE_STATS_NAME, stats as ai_cache_stats
+from .ai_service import ai_generator
+from .models import CachedGeneration, Department, GenerationTask, Job, Pipeline
+from .pipelines import pipeline_for
 from .serializers import (
-    DepartmentSerializer, JobSerializer, JobCreateSerializer, JobListSerializer
+    DepartmentSerializer, GenerationTaskSerializer, JobSerializer, JobCreateSerializer, JobListSerializer,
+    PipelineSerializer
 )
-from .ai_service import ai_generator
+from .tasks import enqueue_generation
 
 
-class DepartmentViewSet(viewsets.ModelViewSet):
+class DepartmentViewSet(UserIdentityMapMixin, SparseFieldsViewSetMixin, viewsets.ModelViewSet):
     queryset = Department.objects.all()
     serializer_class = DepartmentSerializer
     filter_backends = [DjangoFilterBackend]
     filterset_fields = ['organization']
+    user_relations = {
+        'manager_details': 'manager_id',
+    }
     
     def get_queryset(self):
         user = self.request.user
@@ -42,10 +56,58 @@ class DepartmentViewSet(viewsets.ModelViewSet):
             serializer.save()
 
 
-class JobViewSet(viewsets.ModelViewSet):
+class PipelineViewSet(viewsets.ModelViewSet):
+    queryset = Pipeline.objects.all()
+    serializer_class = PipelineSerializer
+    
+    def get_queryset(self):
+        user = self.request.user
+        if user.is_platform_admin:
+            return Pipeline.objects.all()
+        return Pipeline.objects.filter(organization=user.organization)
+    
+    def perform_create(self, serializer):
+        serializer.save(organization=self.request.user.organization)
+
+
+class GenerationTaskViewSet(viewsets.ReadOnlyModelViewSet):
+    queryset = GenerationTask.objects.all()
+    serializer_class = GenerationTaskSerializer
+    
+    def get_queryset(self):
+        user = self.request.user
+        if user.is_platform_admin:
+            return GenerationTask.objects.all()
+        return GenerationTask.objects.filter(requested_by=user)
+    
+    @action(detail=False, methods=['get'])
+    def cache_stats(self, request):
+        """Generation cache hit rate in this process and stored entry counts"""
+        if not request.user.is_platform_admin:
+            return Response(
+                {'detail': 'Only platform admins can view cache statistics'},
+                status=status.HTTP_403_FORBIDDEN
+            )
+        stored = CachedGeneration.objects.aggregate(entries=Count('id'), hits=Sum('hits'))
+        return Response({
+            'process': ai_cache_stats.snapshot().get(AI_CACHE_STATS_NAME, {'hits': 0, 'misses': 0, 'hit_rate': 0}),
+            'entries': stored['entries'],
+            'stored_hits': stored['hits'] or 0,
+        })
+
+
+class JobViewSet(ConditionalGetMixin, UserIdentityMapMixin, SparseFieldsViewSetMixin, viewsets.ModelViewSet):
     queryset = Job.objects.all()
     filter_backends = [DjangoFilterBackend]
     filterset_fields = ['status', 'department', 'job_type', 'experience_level', 'urgency']
+    shape_relations = {
+        'recruiters_details': ([], ['recruiters']),
+    }
+    user_relations = {
+        'department_details.manager_details': 'department.manager_id',
+        'hiring_manager_details': 'hiring_manager_id',
+        'recruiters_details': 'recruiters',
+    }
     
     def get_serializer_class(self):
         if self.action == 'create':
@@ -66,7 +128,8 @@ class JobViewSet(viewsets.ModelViewSet):
         if search:
             queryset = queryset.filter(title__icontains=search)
         
-        return queryset
+        # Application counts come from the denormalized per-stage counters
+        return queryset.select_related('department').prefetch_related('stage_counts')
     
     def perform_create(self, serializer):
         job = serializer.save(
@@ -112,8 +175,8 @@ class JobViewSet(viewsets.ModelViewSet):
         job = self.get_object()
         applications = job.applications.select_related('candidate').all()
         
-        # Group by stage
-        candidates_by_stage = {}
+        # Group by stage, with a column for every stage of the job's pipeline
+        candidates_by_stage = {stage: [] for stage in pipeline_for(job).stages}
         for app in applications:
             if app.stage not in candidates_by_stage:
                 candidates_by_stage[app.stage] = []
@@ -133,28 +196,25 @@ class JobViewSet(viewsets.ModelViewSet):
     @action(detail=True, methods=['get'])
     def analytics(self, request, pk=None):
         job = self.get_object()
-        applications = job.applications.all()
         
         # Calculate metrics
-        total_applications = applications.count()
-        stages_count = {}
-        for stage, _ in applications.model.STAGE_CHOICES:
-            stages_count[stage] = applications.filter(stage=stage).count()
+        stages_count = stage_count_map(job, pipeline_for(job).stages)
+        total_applications = sum(stages_count.values())
         
         # Time metrics
-        hired_apps = applications.filter(stage='hired')
-        if hired_apps.exists():
+        hired_apps = list(job.applications.filter(stage='hired').values_list('applied_at', 'stage_updated_at'))
+        if hired_apps:
             time_to_hire = sum([
-                (app.stage_updated_at - app.applied_at).days
-                for app in hired_apps
-            ]) / hired_apps.count()
+                (stage_updated_at - applied_at).days
+                for applied_at, stage_updated_at in hired_apps
+            ]) / len(hired_apps)
         else:
             time_to_hire = 0
         
         analytics = {
             'total_applications': total_applications,
             'stages_count': stages_count,
-            'conversion_rate': (hired_apps.count() / total_applications * 100) if total_applications > 0 else 0,
+            'conversion_rate': (stages_count.get('hired', 0) / total_applications * 100) if total_applications > 0 else 0,
             'time_to_hire': time_to_hire,
             'days_open': job.days_open,
             'is_overdue': job.is_overdue
@@ -164,43 +224,106 @@ class JobViewSet(viewsets.ModelViewSet):
     
     @action(detail=False, methods=['post'])
     def generate_jd(self, request):
-        """Generate job description using OpenAI API"""
+        """Queue a job description generation; poll /api/generation-tasks/<id>/ for the result"""
         title = request.data.get('title', '')
-        department = request.data.get('department', '')
-        level = request.data.get('level', 'mid')
-        location = request.data.get('location', 'Remote')
-        work_type = request.data.get('work_type', 'remote')
-        company_info = request.data.get('company_info', '')
-        
         if not title:
             return Response(
                 {'detail': 'Job title is required'},
                 status=status.HTTP_400_BAD_REQUEST
             )
         
-        try:
-            # Use AI service to generate job description
-            generated_content = ai_generator.generate_job_description(
-                title=title,
-                department=department,
-                level=level,
-                location=location,
-                work_type=work_type,
-                company_info=company_info
-            )
-            
-            return Response({
-                'success': True,
-                'data': generated_content,
-                'ai_generated': True
-            })
-            
-        except Exception as e:
+        task = enqueue_generation(
+            {
+                'title': title,
+                'department': request.data.get('department', ''),
+                'level': request.data.get('level', 'mid'),
+                'location': request.data.get('location', 'Remote'),
+                'work_type': request.data.get('work_type', 'remote'),
+                'company_info': request.data.get('company_info', ''),
+                'use_cache': str(request.data.get('bypass_cache', '')).lower() not in ('1', 'true', 'yes'),
+            },
+            organization=request.user.organization,
+            user=request.user
+        )
+        return Response(GenerationTaskSerializer(task).data, status=status.HTTP_202_ACCEPTED)
+    
+    @action(detail=False, methods=['post'])
+    def generate_batch(self, request):
+        """
+        Queue description generation for many draft jobs at once: existing
+        drafts by `job_ids`, or new drafts created from `jobs` specs (title,
+        department, level, location, work_type, company_info). Poll
+        /api/generation-tasks/<id>/ for the per-job outcomes.
+        """
+        job_ids = request.data.get('job_ids')
+        specs = request.data.get('jobs')
+        if (job_ids is None) == (specs is None):
             return Response(
-                {'detail': f'Error generating job description: {str(e)}'},
-                status=status.HTTP_500_INTERNAL_SERVER_ERROR
+                {'detail': 'Provide either job_ids or jobs'},
+                status=status.HTTP_400_BAD_REQUEST
             )
+        
+        if job_ids is not None:
+            ids = batch.parse_ids(job_ids)
+            if ids is None:
+                return Response(
+                    {'detail': f'job_ids must be a list of at most {batch.BATCH_MAX_JOBS} job ids'},
+                    status=status.HTTP_400_BAD_REQUEST
+                )
+            drafts = self.get_queryset().filter(pk__in=ids, status='draft').select_related('department')
+            params = {job.pk: batch.job_params(job) for job in drafts}
+            items = [{'job_id': job_id, 'params': params.get(job_id)} for job_id in ids]
+        else:
+            parsed = batch.parse_specs(specs)
+            if parsed is None:
+                return Response(
+                    {'detail': f'jobs must be a list of at most {batch.BATCH_MAX_JOBS} job specs, each with a title '
+                               'and a valid level and work_type'},
+                    status=status.HTTP_400_BAD_REQUEST
+                )
+            items = batch.create_drafts(parsed, request.user.organization, request.user)
+        
+        task = enqueue_generation(
+            {
+                'items': items,
+                'use_cache': str(request.data.get('bypass_cache', '')).lower() not in ('1', 'true', 'yes'),
+            },
+            organization=request.user.organization,
+            user=request.user,
+            kind='batch'
+        )
+        return Response(GenerationTaskSerializer(task).data, status=status.HTTP_202_ACCEPTED)
     
+    @action(detail=False, methods=['post'], renderer_classes=[JSONRenderer, EventStreamRenderer])
+    def generate_jd_stream(self, request):
+        """
+        Generate a job description as server-sent events, section by section.
+        
+        The stream is an async iterator, so under ASGI no worker thread is
+        held while OpenAI writes; see AIJobDescriptionGenerator.stream_job_description
+        for the events.
+        """
+        title = request.data.get('title', '')
+        if not title:
+            return Response(
+                {'detail': 'Job title is required'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        
+        events = ai_generator.stream_job_description(
+            title=title,
+            department=request.data.get('department', ''),
+            level=request.data.get('level', 'mid'),
+            location=request.data.get('location', 'Remote'),
+            work_type=request.data.get('work_type', 'remote'),
+            company_info=request.data.get('company_info', ''),
+            use_cache=str(request.data.get('bypass_cache', '')).lower() not in ('1', 'true', 'yes'),
+        )
+        response = StreamingHttpResponse(sse_stream(events), content_type='text/event-stream')
+        response['Cache-Control'] = 'no-cache'
+        # Keep reverse proxies (nginx) from buffering the stream
+        response['X-Accel-Buffering'] = 'no'
+        return response
     
     @action(detail=False, methods=['post'], parser_classes=[MultiPartParser, FormParser])
     def parse_jd(self, request):
@@ -0,0 +1,171 @@
+"""
+Viewset mixins shared across apps.
+"""
+import hashlib
+from django.core.exceptions import ValidationError
+from django.db.models import Count, Max
+from django.http import Http404
+from django.utils.cache import get_conditional_response
+from django.utils.http import http_date
+from accounts.serializers import UserIdentityMap
+from .serializers import nested_spec, parse_field_paths, renders
+from .versions import get_version, scope_for
+
+
+class SparseFieldsViewSetMixin:
+    """
+    Pass ?fields= / ?expand= to the serializer and load only the relations
+    the requested shape renders.
+
+    `shape_relations` maps a nested field path (e.g.
+    'candidate_details.referrer_details') to the select_related and
+    prefetch_related lookups it needs. They are applied to list and
+    retrieve querysets whenever the serializer in use renders that path.
+    """
+    shape_relations = {}
+
+    def get_sparse_fields(self):
+        params = self.request.query_params
+        if self.request.method != 'GET' or not ('fields' in params or 'expand' in params):
+            return None
+        return parse_field_paths(params.get('fields')) or None, parse_field_paths(params.get('expand'))
+
+    def get_serializer_context(self):
+        context = super().get_serializer_context()
+        context['sparse_fields'] = self.get_sparse_fields()
+        return context
+
+    def renders_path(self, path):
+        names = path.split('.')
+        if names[0] not in self.get_serializer_class()._declared_fields:
+            return False
+        spec = self.get_sparse_fields()
+        if spec is None:
+            return True
+        only, expand = spec
+        for name in names:
+            if not renders(only, expand, name):
+                return False
+            only, expand = nested_spec(only, expand, name)
+        return True
+
+    def filter_queryset(self, queryset):
+        queryset = super().filter_queryset(queryset)
+        if self.action not in ('list', 'retrieve'):
+            return queryset
+        for path, (select, prefetch) in self.shape_relations.items():
+            if self.renders_path(path):
+                queryset = queryset.select_related(*select).prefetch_related(*prefetch)
+        return queryset
+
+
+def _user_ids(objects, path):
+    """User ids found by walking `path` (e.g. 'activities.user_id') over loaded objects"""
+    names = path.split('.')
+    values = list(objects)
+    for name in names[:-1]:
+        related_values = []
+        for value in values:
+            related = getattr(value, name, None)
+            if hasattr(related, 'all'):
+                related_values.extend(related.all())
+            elif related is not None:
+                related_values.append(related)
+        values = related_values
+
+    ids = []
+    for value in values:
+        attribute = getattr(value, names[-1], None)
+        if hasattr(attribute, 'all'):
+            ids.extend(user.pk for user in attribute.all())
+        else:
+            ids.append(attribute)
+    return ids
+
+
+class UserIdentityMapMixin:
+    """
+    Serialize each referenced user once per response.
+
+    `user_relations` maps a rendered nested user field path to the
+    attribute path holding the user id(s) on the loaded objects, e.g.
+    {'activities.user_details': 'activities.user_id'}. Every id on the page
+    is loaded in one query before serialization; the serializers then read
+    users from the map. Use together with SparseFieldsViewSetMixin.
+    """
+    user_relations = {}
+
+    def get_serializer_context(self):
+        context = super().get_serializer_context()
+        context['user_identity_map'] = UserIdentityMap()
+        return context
+
+    def get_serializer(self, *args, **kwargs):
+        serializer = super().get_serializer(*args, **kwargs)
+        if args and self.request.method == 'GET':
+            objects = args[0] if kwargs.get('many') else [args[0]]
+            ids = []
+            for field_path, attribute_path in self.user_relations.items():
+                if self.renders_path(field_path):
+                    ids.extend(_user_ids(objects, attribute_path))
+            serializer.context['user_identity_map'].prime(ids)
+        return serializer
+
+
+class ConditionalGetMixin:
+    """
+    ETag / Last-Modified on list and retrieve.
+
+    The validators come from one aggregate over the filtered queryset
+    (latest `updated_at` and row count) plus the organization's data
+    version (see versions.py), which also moves on deletes and on writes
+    to related rows rendered alongside. A request whose If-None-Match or
+    If-Modified-Since still matches gets a 304 before anything is loaded
+    or serialized. Keyset-paginated lists are served without validators,
+    since counting them would defeat the point of keyset pagination.
+    """
+    conditional_updated_field = 'updated_at'
+
+    def get_validators(self, queryset):
+        state = queryset.order_by().aggregate(
+            last_modified=Max(self.conditional_updated_field), count=Count('pk')
+        )
+        request = self.request
+        params = '&'.join(f'{key}={value}' for key, value in sorted(request.query_params.items()))
+        version = get_version(scope_for(request.user))
+        raw = (
+            f"{queryset.model._meta.label_lower}:{state['last_modified']}:{state['count']}:"
+            f"{version}:{request.user.pk}:{params}"
+        )
+        last_modified = state['last_modified'].timestamp() if state['last_modified'] else None
+        return f'"{hashlib.md5(raw.encode()).hexdigest()}"', last_modified
+
+    def conditional(self, queryset, render):
+        etag, last_modified = self.get_validators(queryset)
+        not_modified = get_conditional_response(self.request, etag=etag, last_modified=last_modified)
+        if not_modified is not None:
+            return not_modified
+        response = render()
+        if response.status_code == 200:
+            response['ETag'] = etag
+            if last_modified is not None:
+                response['Last-Modified'] = http_date(last_modified)
+        return response
+
+    def list(self, request, *args, **kwargs):
+        paginator = self.paginator
+        if paginator is not None and getattr(paginator, 'is_keyset', lambda request: False)(request):
+            return super().list(request, *args, **kwargs)
+        queryset = self.filter_queryset(self.get_queryset())
+        return self.conditional(queryset, lambda: super(ConditionalGetMixin, self).list(request, *args, **kwargs))
+
+    def retrieve(self, request, *args, **kwargs):
+        lookup_url_kwarg = self.lookup_url_kwarg or self.lookup_field
+        try:
+            queryset = self.filter_queryset(self.get_queryset()).filter(
+                **{self.lookup_field: self.kwargs[lookup_url_kwarg]}
+            )
+        except (TypeError, ValueError, ValidationError):
+            # As DRF's get_object_or_404: a malformed id is simply not found
+            raise Http404
+        return self.conditional(queryset, lambda: super(ConditionalGetMixin, self).retrieve(request, *args, **kwargs))
@@ -0,0 +1,148 @@
+"""
+List pagination with an opt-in keyset mode and cached total counts.
+
+By default lists paginate by page number exactly as before. Clients that
+scroll deep pass ?paginate=keyset (and then follow the `next` link, which
+carries ?cursor=): each page is fetched with a WHERE on the view's
+`keyset_ordering` columns instead of an OFFSET, so every page costs the
+same regardless of depth, and no COUNT(*) is issued.
+
+?count=cached (either mode) reuses a total count for
+PAGINATION_COUNT_CACHE_TIMEOUT seconds instead of counting on every page;
+keyset pages carry no total without it.
+"""
+import base64
+import hashlib
+import json
+from datetime import datetime
+from django.conf import settings
+from django.core.exceptions import ValidationError
+from django.core.cache import cache
+from django.core.paginator import Paginator
+from django.db.models import Q
+from django.utils.functional import cached_property
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import PageNumberPagination
+from rest_framework.response import Response
+from rest_framework.utils.urls import remove_query_param, replace_query_param
+
+DEFAULT_KEYSET_ORDERING = ('-created_at', '-id')
+
+
+def cached_count(queryset):
+    """Total rows of a queryset, shared across requests for a short while"""
+    digest = hashlib.md5(str(queryset.query).encode()).hexdigest()
+    key = f'pagination:count:{queryset.model._meta.label_lower}:{digest}'
+    count = cache.get(key)
+    if count is None:
+        count = queryset.count()
+        cache.set(key, count, getattr(settings, 'PAGINATION_COUNT_CACHE_TIMEOUT', 60))
+    return count
+
+
+class CachedCountPaginator(Paginator):
+    @cached_property
+    def count(self):
+        return cached_count(self.object_list)
+
+
+class KeysetPagination(PageNumberPagination):
+    """Page-number pagination with opt-in keyset mode; see the module docstring"""
+    page_size_query_param = 'page_size'
+    max_page_size = 100
+    cursor_query_param = 'cursor'
+    mode_query_param = 'paginate'
+    count_query_param = 'count'
+
+    def is_keyset(self, request):
+        return (
+            request.query_params.get(self.mode_query_param) == 'keyset'
+            or self.cursor_query_param in request.query_params
+        )
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.request = request
+        self.count_mode = request.query_params.get(self.count_query_param)
+        self.keyset = self.is_keyset(request)
+        if not self.keyset:
+            if self.count_mode == 'cached':
+                self.django_paginator_class = CachedCountPaginator
+            return super().paginate_queryset(queryset, request, view)
+        return self.paginate_keyset(queryset, request, view)
+
+    # Keyset mode
+
+    def get_keyset_ordering(self, view):
+        return tuple(getattr(view, 'keyset_ordering', DEFAULT_KEYSET_ORDERING))
+
+    def paginate_keyset(self, queryset, request, view):
+        self.ordering = self.get_keyset_ordering(view)
+        queryset = queryset.order_by(*self.ordering)
+        self.total = cached_count(queryset) if self.count_mode == 'cached' else None
+
+        position = self.decode_cursor(request, queryset.model)
+        if position is not None:
+            queryset = queryset.filter(self.after(position))
+
+        page_size = self.get_page_size(request)
+        rows = list(queryset[:page_size + 1])
+        self.has_next = len(rows) > page_size
+        self.page_rows = rows[:page_size]
+        return self.page_rows
+
+    def after(self, position):
+        """Q matching rows strictly after `position` in the keyset ordering"""
+        condition = Q()
+        for index in reversed(range(len(self.ordering))):
+            field = self.ordering[index].lstrip('-')
+            lookup = 'lt' if self.ordering[index].startswith('-') else 'gt'
+            step = Q(**{f'{field}__{lookup}': position[index]})
+            for previous in range(index):
+                step &= Q(**{self.ordering[previous].lstrip('-'): position[previous]})
+            condition |= step
+        return condition
+
+    def encode_cursor(self, row):
+        values = []
+        for ordering in self.ordering:
+            value = getattr(row, ordering.lstrip('-'))
+            values.append(value.isoformat() if isinstance(value, datetime) else value)
+        return base64.urlsafe_b64encode(json.dumps(values).encode()).decode()
+
+    def decode_cursor(self, request, model):
+        encoded = request.query_params.get(self.cursor_query_param)
+        if not encoded:
+            return None
+        try:
+            values = json.loads(base64.urlsafe_b64decode(encoded.encode()))
+            if len(values) != len(self.ordering):
+                raise ValueError
+            return [
+                model._meta.get_field(ordering.lstrip('-')).to_python(value)
+                for ordering, value in zip(self.ordering, values)
+            ]
+        except (ValueError, TypeError, ValidationError):
+            raise NotFound('Invalid cursor')
+
+    def get_keyset_next_link(self):
+        if not self.has_next:
+            return None
+        url = self.request.build_absolute_uri()
+        url = remove_query_param(url, self.mode_query_param)
+        return replace_query_param(url, self.cursor_query_param, self.encode_cursor(self.page_rows[-1]))
+
+    def get_paginated_response(self, data):
+        if self.keyset:
+            return Response({
+                'count': self.total,
+                'next': self.get_keyset_next_link(),
+                'previous': None,
+                'results': data,
+            })
+        return super().get_paginated_response(data)
+
+    def get_paginated_response_schema(self, schema):
+        response_schema = super().get_paginated_response_schema(schema)
+        response_schema['properties']['count']['nullable'] = True
+        return response_schema
+
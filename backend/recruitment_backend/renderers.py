@@ -0,0 +1,29 @@
+"""
+Server-sent events.
+
+Streaming endpoints return a StreamingHttpResponse over sse_stream(events)
+directly; EventStreamRenderer only lets DRF negotiate
+`Accept: text/event-stream` and renders their error responses (e.g. a
+400) as a single `error` event the client's stream reader understands.
+"""
+import json
+from rest_framework.renderers import BaseRenderer
+
+
+def format_event(event, data):
+    return f"event: {event}\ndata: {json.dumps(data)}\n\n"
+
+
+async def sse_stream(events):
+    """Encode an async iterator of (event, data) pairs as an event stream"""
+    async for event, data in events:
+        yield format_event(event, data)
+
+
+class EventStreamRenderer(BaseRenderer):
+    media_type = 'text/event-stream'
+    format = 'sse'
+    charset = 'utf-8'
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        return format_event('error', data).encode(self.charset)
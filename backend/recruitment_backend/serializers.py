@@ -0,0 +1,75 @@
+"""
+Sparse fieldsets and opt-in expansion for nested serializers.
+
+Serializers using SparseFieldsMixin list their nested serializer fields
+in Meta.expandable_fields. Without ?fields= or ?expand= a response keeps
+its full shape. As soon as either parameter is given:
+
+* ?fields=id,stage,candidate_details.email keeps only the named fields,
+  at any depth (dotted paths reach into nested serializers);
+* expandable fields are left out unless named in ?expand= (or ?fields=),
+  e.g. ?expand=job_details,candidate_details.referrer_details.
+
+The parsed request is put in the serializer context by
+SparseFieldsViewSetMixin (see mixins.py) for GET requests only, so
+writes always validate against every field.
+"""
+from rest_framework import serializers
+
+
+def parse_field_paths(value):
+    """'a,b.c,b.d' -> {'a': {}, 'b': {'c': {}, 'd': {}}}"""
+    tree = {}
+    for path in (part.strip() for part in (value or '').split(',')):
+        if not path:
+            continue
+        node = tree
+        for name in path.split('.'):
+            node = node.setdefault(name, {})
+    return tree
+
+
+def renders(only, expand, name):
+    """Whether an expandable field appears under the given (fields, expand) trees"""
+    return name in expand or (only is not None and name in only)
+
+
+def nested_spec(only, expand, name):
+    """The (fields, expand) trees that apply inside a nested field"""
+    return (only or {}).get(name) or None, expand.get(name, {})
+
+
+class SparseFieldsMixin:
+    """Trim fields per ?fields= / ?expand=; see the module docstring"""
+
+    def _sparse_spec(self):
+        if hasattr(self, '_sparse'):
+            return self._sparse
+        parent = self.parent
+        if isinstance(parent, serializers.ListSerializer):
+            parent = parent.parent
+        if parent is None:
+            return self.context.get('sparse_fields')
+        return None
+
+    def get_fields(self):
+        fields = super().get_fields()
+        spec = self._sparse_spec()
+        if spec is None:
+            return fields
+
+        only, expand = spec
+        expandable = set(getattr(self.Meta, 'expandable_fields', ()))
+        for name in list(fields):
+            if name in expandable:
+                keep = renders(only, expand, name)
+            else:
+                keep = only is None or name in only
+            if not keep:
+                del fields[name]
+
+        for name, field in fields.items():
+            nested = getattr(field, 'child', field)
+            if isinstance(nested, SparseFieldsMixin):
+                nested._sparse = nested_spec(only, expand, name)
+        return fields
@@ -53,6 +53,7 @@ INSTALLED_APPS = [
     'candidates',
     'interviews',
     'analytics',
+    'sync',
 ]
 
 MIDDLEWARE = [
@@ -170,6 +171,18 @@ MEDIA_ROOT = BASE_DIR / 'media'
 
 DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
 
+# Cache
+# Local memory by default, which is per process. Data versions (analytics
+# results, ETags) must be shared by every worker, so production has to point
+# CACHE_BACKEND/CACHE_LOCATION at a shared cache such as redis
+# (`manage.py check --deploy` warns otherwise).
+CACHES = {
+    'default': {
+        'BACKEND': config('CACHE_BACKEND', default='django.core.cache.backends.locmem.LocMemCache'),
+        'LOCATION': config('CACHE_LOCATION', default='recruitment-backend'),
+    }
+}
+
 # Custom User Model
 AUTH_USER_MODEL = 'accounts.User'
 
@@ -244,4 +257,45 @@ SPECTACULAR_SETTINGS = {
     'DESCRIPTION': 'API for Recruitment Management System',
     'VERSION': '1.0.0',
     'SERVE_INCLUDE_SCHEMA': False,
-}
\ No newline at end of file
+}
+
+# Analytics
+# Organizations rollup_metrics processes in parallel; it is run by cron, not in the web processes
+ANALYTICS_ROLLUP_WORKERS = config('ANALYTICS_ROLLUP_WORKERS', default=1, cast=int)
+# Seconds an analytics endpoint result stays cached; writes invalidate it earlier
+ANALYTICS_CACHE_TIMEOUT = config('ANALYTICS_CACHE_TIMEOUT', default=300, cast=int)
+# Seconds a closed analytics series bucket stays cached; writes invalidate it earlier
+ANALYTICS_SERIES_BUCKET_TIMEOUT = config('ANALYTICS_SERIES_BUCKET_TIMEOUT', default=24 * 3600, cast=int)
+# Where columnar analytics snapshots (Parquet / Arrow IPC) are written
+ANALYTICS_SNAPSHOT_DIR = config('ANALYTICS_SNAPSHOT_DIR', default=str(BASE_DIR / 'snapshots'))
+
+# Seconds a list total requested with ?count=cached is reused
+PAGINATION_COUNT_CACHE_TIMEOUT = config('PAGINATION_COUNT_CACHE_TIMEOUT', default=60, cast=int)
+
+# Change log entries younger than this are held back from the sync feed so
+# late-committing transactions cannot land behind a client's cursor
+SYNC_SETTLE_SECONDS = config('SYNC_SETTLE_SECONDS', default=2, cast=int)
+
+# AI job description generation runs on an in-process thread pool
+JD_GENERATION_WORKERS = config('JD_GENERATION_WORKERS', default=4, cast=int)
+# Run generations inline in the request instead (tests, single-process setups)
+JD_GENERATION_EAGER = config('JD_GENERATION_EAGER', default=False, cast=bool)
+# Seconds without progress after which run_generation_tasks treats a running task as abandoned
+JD_GENERATION_STALE_SECONDS = config('JD_GENERATION_STALE_SECONDS', default=600, cast=int)
+# Generated job descriptions are cached by normalized inputs, model and prompt version
+JD_CACHE_TTL = config('JD_CACHE_TTL', default=7 * 24 * 3600, cast=int)
+JD_CACHE_MAX_ENTRIES = config('JD_CACHE_MAX_ENTRIES', default=10000, cast=int)
+# OpenAI connect/read timeouts (seconds) and retries of transient failures, with jittered backoff
+JD_AI_CONNECT_TIMEOUT = config('JD_AI_CONNECT_TIMEOUT', default=5, cast=float)
+JD_AI_READ_TIMEOUT = config('JD_AI_READ_TIMEOUT', default=30, cast=float)
+JD_AI_MAX_RETRIES = config('JD_AI_MAX_RETRIES', default=2, cast=int)
+JD_AI_RETRY_BASE_DELAY = config('JD_AI_RETRY_BASE_DELAY', default=0.5, cast=float)
+# Seconds to wait for the AI before answering with the template (0 waits for the AI);
+# the late AI result still lands in the cache and on the generation task
+JD_AI_LATENCY_BUDGET = config('JD_AI_LATENCY_BUDGET', default=10, cast=float)
+JD_AI_MAX_CONCURRENCY = config('JD_AI_MAX_CONCURRENCY', default=8, cast=int)
+# Consecutive upstream failures that open the circuit, and seconds before it is retried
+JD_AI_BREAKER_THRESHOLD = config('JD_AI_BREAKER_THRESHOLD', default=5, cast=int)
+JD_AI_BREAKER_COOLDOWN = config('JD_AI_BREAKER_COOLDOWN', default=60, cast=int)
+# Generations a batch (generate_batch, generate_job_descriptions) runs at once
+JD_BATCH_CONCURRENCY = config('JD_BATCH_CONCURRENCY', default=5, cast=int)
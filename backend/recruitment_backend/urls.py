@@ -30,6 +30,7 @@ urlpatterns = [
     path('api/', include('candidates.urls')),
     path('api/', include('interviews.urls')),
     path('api/analytics/', include('analytics.urls')),
+    path('api/sync/', include('sync.urls')),
     
     # JWT token refresh
     path('api/auth/token/refresh/', TokenRefreshView.as_view(), name='token_refresh'),
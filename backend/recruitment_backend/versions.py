@@ -0,0 +1,78 @@
+"""
+Per-organization data versions.
+
+A version is a number in the cache that moves whenever an organization's
+data changes (analytics/signals.py bumps it on writes). Anything derived
+from that data — cached analytics results, ETags — includes the version,
+so a bump makes every derived value stale at once without flushing
+anything.
+
+The version has to be the same for every worker, so the default cache must
+be shared (redis in production): with a per-process cache one worker's
+bump is invisible to the others, which keep serving stale results and
+answering 304 to stale ETags. `manage.py check --deploy` warns about that.
+"""
+import time
+from django.conf import settings
+from django.core.cache import cache
+from django.core.checks import Tags, Warning, register
+from django.db import transaction
+
+# Scope used for platform admins, who see every organization's data
+GLOBAL_SCOPE = 'all'
+
+PER_PROCESS_CACHES = (
+    'django.core.cache.backends.locmem.LocMemCache',
+    'django.core.cache.backends.dummy.DummyCache',
+)
+
+
+@register(Tags.caches, deploy=True)
+def check_shared_cache(app_configs, **kwargs):
+    backend = settings.CACHES.get('default', {}).get('BACKEND')
+    if backend not in PER_PROCESS_CACHES:
+        return []
+    return [
+        Warning(
+            f'The default cache ({backend}) is not shared between worker processes.',
+            hint='Data versions would diverge between workers. Set CACHE_BACKEND/CACHE_LOCATION '
+                 'to a shared cache, e.g. django.core.cache.backends.redis.RedisCache.',
+            id='recruitment_backend.W001',
+        )
+    ]
+
+
+def _version_key(scope):
+    return f'data-version:{scope}'
+
+
+def scope_for(user):
+    if user.is_platform_admin:
+        return GLOBAL_SCOPE
+    return user.organization_id
+
+
+def get_version(scope):
+    """Current data version for a scope, initialised on first use"""
+    key = _version_key(scope)
+    version = cache.get(key)
+    if version is None:
+        # Seed from the clock so a lost key can never revive old entries
+        cache.add(key, time.time_ns(), timeout=None)
+        version = cache.get(key)
+    return version
+
+
+def bump_version(organization_id):
+    """Invalidate data derived for an organization (and the global view)"""
+    for scope in (organization_id, GLOBAL_SCOPE):
+        key = _version_key(scope)
+        try:
+            cache.incr(key)
+        except ValueError:
+            cache.set(key, time.time_ns(), timeout=None)
+
+
+def bump_version_on_commit(organization_id):
+    """Bump once the surrounding transaction commits, so readers never cache uncommitted state"""
+    transaction.on_commit(lambda: bump_version(organization_id))
@@ -0,0 +1,9 @@
+from django.contrib import admin
+from .models import ChangeLogEntry
+
+
+@admin.register(ChangeLogEntry)
+class ChangeLogEntryAdmin(admin.ModelAdmin):
+    list_display = ['id', 'organization', 'entity', 'object_id', 'action', 'changed_at']
+    list_filter = ['organization', 'entity', 'action']
+    readonly_fields = ['organization', 'entity', 'object_id', 'action', 'changed_at']
@@ -0,0 +1,114 @@
+"""
+Recording and reading the per-organization change log.
+
+Every create, update and delete of a synced object appends one
+ChangeLogEntry. Clients read the entries after an opaque cursor (the last
+entry id they saw), so a sync is an index range scan on
+(organization, id) however much data the organization has.
+"""
+import base64
+from datetime import timedelta
+from django.conf import settings
+from django.utils import timezone
+from candidates.models import Candidate, CandidateNote, JobApplication
+from interviews.models import Interview
+from jobs.models import Job
+from .models import ChangeLogEntry
+
+# model -> (entity name, how to find the organization: None for a direct
+# organization_id, else (parent model, parent id attribute, organization lookup))
+SYNCED_MODELS = {
+    Job: ('job', None),
+    Candidate: ('candidate', None),
+    JobApplication: ('application', (Job, 'job_id', 'organization_id')),
+    Interview: ('interview', (JobApplication, 'application_id', 'job__organization_id')),
+    CandidateNote: ('note', (Candidate, 'candidate_id', 'organization_id')),
+}
+
+DEFAULT_LIMIT = 500
+MAX_LIMIT = 1000
+
+CURSOR_PREFIX = 'c1:'
+
+
+class InvalidCursor(ValueError):
+    pass
+
+
+def organization_id_for(instance):
+    _, parent = SYNCED_MODELS[type(instance)]
+    if parent is None:
+        return instance.organization_id
+    model, attribute, lookup = parent
+    return model.objects.filter(pk=getattr(instance, attribute)).values_list(lookup, flat=True).first()
+
+
+def record_change(instance, action, organization_id=None):
+    record_changes(type(instance), [instance.pk], action, organization_id or organization_id_for(instance))
+
+
+def record_changes(model, object_ids, action, organization_id):
+    """Append entries for many objects of one model, e.g. after a bulk update"""
+    if organization_id is None:
+        return
+    entity, _ = SYNCED_MODELS[model]
+    ChangeLogEntry.objects.bulk_create([
+        ChangeLogEntry(organization_id=organization_id, entity=entity, object_id=object_id, action=action)
+        for object_id in object_ids
+    ])
+
+
+def encode_cursor(entry_id):
+    return base64.urlsafe_b64encode(f'{CURSOR_PREFIX}{entry_id}'.encode()).decode()
+
+
+def decode_cursor(cursor):
+    if not cursor:
+        return 0
+    try:
+        raw = base64.urlsafe_b64decode(cursor.encode()).decode()
+        if not raw.startswith(CURSOR_PREFIX):
+            raise ValueError
+        return int(raw[len(CURSOR_PREFIX):])
+    except ValueError:
+        raise InvalidCursor(cursor)
+
+
+def latest_cursor(organization_id):
+    """Cursor for "now", for clients that have just done a full fetch"""
+    last = ChangeLogEntry.objects.filter(organization_id=organization_id).order_by('-id').values_list('id', flat=True).first()
+    return encode_cursor(last or 0)
+
+
+def changes_since(organization_id, cursor, limit=DEFAULT_LIMIT):
+    """
+    Changes after `cursor`, collapsed to the latest state per object.
+
+    Entries younger than SYNC_SETTLE_SECONDS are held back: ids are handed
+    out before commit, so a slow transaction could otherwise commit an
+    entry behind a cursor a client already holds.
+    """
+    after = decode_cursor(cursor)
+    settle = timedelta(seconds=getattr(settings, 'SYNC_SETTLE_SECONDS', 2))
+    entries = list(ChangeLogEntry.objects.filter(
+        organization_id=organization_id, id__gt=after, changed_at__lte=timezone.now() - settle
+    ).order_by('id').values_list('id', 'entity', 'object_id', 'action')[:limit + 1])
+
+    has_more = len(entries) > limit
+    entries = entries[:limit]
+
+    changes = {entity: {'created': [], 'updated': [], 'deleted': []} for entity, _ in ChangeLogEntry.ENTITY_CHOICES}
+    states = {}
+    for _, entity, object_id, action in entries:
+        previous = states.get((entity, object_id))
+        if action == 'updated' and previous == 'created':
+            action = 'created'
+        states[(entity, object_id)] = action
+    for (entity, object_id), action in states.items():
+        changes[entity][action].append(object_id)
+
+    return {
+        'changes': changes,
+        'cursor': encode_cursor(entries[-1][0]) if entries else encode_cursor(after),
+        'has_more': has_more,
+    }
@@ -0,0 +1,32 @@
+# Generated by Django 5.0.2 on 2026-10-18 03:42
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    initial = True
+
+    dependencies = [
+        ('accounts', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ChangeLogEntry',
+            fields=[
+                ('id', models.BigAutoField(primary_key=True, serialize=False)),
+                ('entity', models.CharField(choices=[('job', 'Job'), ('candidate', 'Candidate'), ('application', 'Job Application'), ('interview', 'Interview'), ('note', 'Candidate Note')], max_length=20)),
+                ('object_id', models.BigIntegerField()),
+                ('action', models.CharField(choices=[('created', 'Created'), ('updated', 'Updated'), ('deleted', 'Deleted')], max_length=10)),
+                ('changed_at', models.DateTimeField(auto_now_add=True)),
+                ('organization', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='change_log', to='accounts.organization')),
+            ],
+            options={
+                'db_table': 'change_log_entries',
+                'ordering': ['id'],
+                'indexes': [models.Index(fields=['organization', 'id'], name='change_log_feed_idx')],
+            },
+        ),
+    ]
@@ -0,0 +1,35 @@
+from django.db import models
+
+
+class ChangeLogEntry(models.Model):
+    """One create/update/delete of a synced object; the id doubles as the feed cursor"""
+    ENTITY_CHOICES = [
+        ('job', 'Job'),
+        ('candidate', 'Candidate'),
+        ('application', 'Job Application'),
+        ('interview', 'Interview'),
+        ('note', 'Candidate Note'),
+    ]
+    
+    ACTION_CHOICES = [
+        ('created', 'Created'),
+        ('updated', 'Updated'),
+        ('deleted', 'Deleted'),
+    ]
+    
+    id = models.BigAutoField(primary_key=True)
+    organization = models.ForeignKey('accounts.Organization', on_delete=models.CASCADE, related_name='change_log')
+    entity = models.CharField(max_length=20, choices=ENTITY_CHOICES)
+    object_id = models.BigIntegerField()
+    action = models.CharField(max_length=10, choices=ACTION_CHOICES)
+    changed_at = models.DateTimeField(auto_now_add=True)
+    
+    class Meta:
+        db_table = 'change_log_entries'
+        ordering = ['id']
+        indexes = [
+            models.Index(fields=['organization', 'id'], name='change_log_feed_idx'),
+        ]
+    
+    def __str__(self):
+        return f"{self.entity} {self.object_id} {self.action} (#{self.id})"
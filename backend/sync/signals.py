@@ -0,0 +1,20 @@
+"""
+Append a change log entry for every save and delete of a synced model.
+Bulk paths that skip signals call changes.record_changes themselves.
+"""
+from django.db.models.signals import post_save, post_delete
+from .changes import SYNCED_MODELS, record_change
+
+
+def log_save(sender, instance, created, raw=False, **kwargs):
+    if not raw:
+        record_change(instance, 'created' if created else 'updated')
+
+
+def log_delete(sender, instance, **kwargs):
+    record_change(instance, 'deleted')
+
+
+for model in SYNCED_MODELS:
+    post_save.connect(log_save, sender=model, dispatch_uid=f'sync_log_save_{model.__name__}')
+    post_delete.connect(log_delete, sender=model, dispatch_uid=f'sync_log_delete_{model.__name__}')
@@ -0,0 +1,74 @@
+from django.contrib.auth import get_user_model
+from django.test import TestCase, override_settings
+from rest_framework.test import APIClient
+from accounts.models import Organization
+from candidates.models import Candidate, CandidateNote, JobApplication
+from jobs.models import Job
+
+User = get_user_model()
+
+
+@override_settings(SYNC_SETTLE_SECONDS=0)
+class ChangesFeedTests(TestCase):
+
+    def setUp(self):
+        self.organization = Organization.objects.create(name='Acme', slug='acme')
+        self.user = User.objects.create_user(
+            username='recruiter', email='recruiter@acme.test', password='secret',
+            organization=self.organization, role='recruiter'
+        )
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+        self.job = Job.objects.create(
+            organization=self.organization, title='Backend Engineer', description='Build things',
+            requirements='Python', location='Remote', status='open'
+        )
+        self.candidate = Candidate.objects.create(
+            organization=self.organization, first_name='Ada', last_name='Lovelace',
+            email='ada@example.com', phone='555-0100'
+        )
+
+    def sync(self, cursor=None, **params):
+        if cursor:
+            params['cursor'] = cursor
+        return self.client.get('/api/sync/changes/', params).data
+
+    def test_changes_since_cursor_with_tombstones(self):
+        first = self.sync()
+        self.assertEqual(first['changes']['job']['created'], [self.job.id])
+        self.assertEqual(first['changes']['candidate']['created'], [self.candidate.id])
+
+        application = JobApplication.objects.create(job=self.job, candidate=self.candidate)
+        self.job.title = 'Senior Backend Engineer'
+        self.job.save()
+        note = CandidateNote.objects.create(candidate=self.candidate, content='Strong', created_by=self.user)
+        note_id = note.id
+        note.delete()
+
+        second = self.sync(first['cursor'])
+        self.assertEqual(second['changes']['application']['created'], [application.id])
+        self.assertEqual(second['changes']['job']['updated'], [self.job.id])
+        self.assertEqual(second['changes']['note']['deleted'], [note_id])
+        self.assertEqual(second['changes']['candidate'], {'created': [], 'updated': [], 'deleted': []})
+
+        self.assertFalse(any(
+            ids for entity in self.sync(second['cursor'])['changes'].values() for ids in entity.values()
+        ))
+
+    def test_feed_is_tenant_scoped_and_paged(self):
+        other = Organization.objects.create(name='Other', slug='other')
+        Job.objects.create(
+            organization=other, title='Hidden', description='x', requirements='x', location='x'
+        )
+
+        page = self.sync(limit=1)
+        self.assertTrue(page['has_more'])
+        rest = self.sync(page['cursor'])
+        self.assertFalse(rest['has_more'])
+        self.assertEqual(rest['changes']['candidate']['created'], [self.candidate.id])
+        self.assertNotIn(Job.objects.get(title='Hidden').id, rest['changes']['job']['created'])
+
+    def test_latest_cursor_and_invalid_cursor(self):
+        cursor = self.client.get('/api/sync/changes/', {'latest': 'true'}).data['cursor']
+        self.assertEqual(self.sync(cursor)['changes']['job']['created'], [])
+        self.assertEqual(self.client.get('/api/sync/changes/', {'cursor': 'bogus'}).status_code, 400)
@@ -0,0 +1,6 @@
+from django.urls import path
+from .views import changes_feed
+
+urlpatterns = [
+    path('changes/', changes_feed, name='changes_feed'),
+]
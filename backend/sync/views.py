@@ -0,0 +1,32 @@
+from rest_framework import status
+from rest_framework.decorators import api_view, permission_classes
+from rest_framework.permissions import IsAuthenticated
+from rest_framework.response import Response
+from .changes import DEFAULT_LIMIT, MAX_LIMIT, InvalidCursor, changes_since, latest_cursor
+
+
+@api_view(['GET'])
+@permission_classes([IsAuthenticated])
+def changes_feed(request):
+    """
+    Ids of jobs, candidates, applications, interviews and notes created,
+    updated or deleted since ?cursor=. Omit the cursor to read from the
+    beginning, or pass ?latest=true to get only a cursor for "now".
+    """
+    organization_id = request.user.organization_id
+    if organization_id is None:
+        return Response(
+            {'detail': 'The changes feed is per organization'},
+            status=status.HTTP_400_BAD_REQUEST
+        )
+    
+    if request.query_params.get('latest') == 'true':
+        return Response({'cursor': latest_cursor(organization_id)})
+    
+    try:
+        limit = min(max(int(request.query_params.get('limit', DEFAULT_LIMIT)), 1), MAX_LIMIT)
+        return Response(changes_since(organization_id, request.query_params.get('cursor'), limit=limit))
+    except InvalidCursor:
+        return Response({'detail': 'Invalid cursor'}, status=status.HTTP_400_BAD_REQUEST)
+    except ValueError:
+        return Response({'detail': 'limit must be an integer'}, status=status.HTTP_400_BAD_REQUEST)
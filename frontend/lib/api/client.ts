@@ -92,6 +92,46 @@ export class ApiClient {
     return this.request<T>(endpoint, { method: 'DELETE' });
   }
   
+  // POST and read a text/event-stream response, calling onEvent for each event
+  async stream(
+    endpoint: string,
+    data: any,
+    onEvent: (event: string, data: any) => void
+  ): Promise<void> {
+    const url = `${API_URL}${endpoint}`;
+    const headers = await this.getHeaders();
+    
+    const response = await fetch(url, {
+      method: 'POST',
+      headers: { ...headers, Accept: 'text/event-stream' },
+      body: JSON.stringify(data),
+    });
+    
+    if (!response.ok || !response.body) {
+      const text = await response.text().catch(() => '');
+      const match = text.match(/^data: (.*)$/m);
+      throw match ? JSON.parse(match[1]) : { detail: 'An error occurred' };
+    }
+    
+    const reader = response.body.getReader();
+    const decoder = new TextDecoder();
+    let buffer = '';
+    for (;;) {
+      const { done, value } = await reader.read();
+      if (done) break;
+      buffer += decoder.decode(value, { stream: true });
+      const blocks = buffer.split('\n\n');
+      buffer = blocks.pop() ?? '';
+      for (const block of blocks) {
+        const event = block.match(/^event: (.*)$/m)?.[1] ?? 'message';
+        const payload = block.match(/^data: (.*)$/m)?.[1];
+        if (payload !== undefined) {
+          onEvent(event, JSON.parse(payload));
+        }
+      }
+    }
+  }
+  
   async uploadFile<T>(endpoint: string, formData: FormData): Promise<T> {
     const url = `${API_URL}${endpoint}`;
     const session = getSession();
@@ -198,6 +198,34 @@ export interface GeneratedJD {
   description: string;
   responsibilities: string;
   requirements: string;
+  // 'hedged': the template, sent because the AI ran over its latency budget
+  source?: 'ai' | 'template' | 'hedged';
+}
+
+export interface GenerationTask {
+  id: string;
+  kind: 'single' | 'batch';
+  status: 'pending' | 'running' | 'succeeded' | 'failed';
+  params: GenerateJDRequest;
+  result: GeneratedJD | null;
+  error: string;
+  attempts: number;
+  created_at: string;
+  started_at: string | null;
+  heartbeat_at: string | null;
+  finished_at: string | null;
+  upgraded_at: string | null;
+}
+
+export interface BatchJobOutcome {
+  id: number;
+  status: 'generated' | 'edited' | 'failed' | 'not_found';
+  source?: GeneratedJD['source'];
+  error?: string;
+}
+
+export interface BatchGenerationTask extends Omit<GenerationTask, 'result'> {
+  result: { jobs: BatchJobOutcome[] } | null;
 }
 
 export interface GenerateJDResponse {
@@ -206,6 +234,55 @@ export interface GenerateJDResponse {
   ai_generated: boolean;
 }
 
-export async function generateJD(data: GenerateJDRequest): Promise<GenerateJDResponse> {
-  return apiClient.post<GenerateJDResponse>('/jobs/generate_jd/', data);
-}
\ No newline at end of file
+export async function getGenerationTask(id: string): Promise<GenerationTask> {
+  return apiClient.get<GenerationTask>(`/generation-tasks/${id}/`);
+}
+
+// Generation runs in the background: queue it, then poll the task until it finishes
+export async function generateJD(
+  data: GenerateJDRequest,
+  { intervalMs = 1000, timeoutMs = 120000 }: { intervalMs?: number; timeoutMs?: number } = {}
+): Promise<GenerateJDResponse> {
+  let task = await apiClient.post<GenerationTask>('/jobs/generate_jd/', data);
+  const deadline = Date.now() + timeoutMs;
+  while (task.status === 'pending' || task.status === 'running') {
+    if (Date.now() > deadline) {
+      throw new Error('Job description generation timed out');
+    }
+    await new Promise(resolve => setTimeout(resolve, intervalMs));
+    task = await getGenerationTask(task.id);
+  }
+  if (task.status === 'failed' || !task.result) {
+    throw new Error(task.error || 'Job description generation failed');
+  }
+  return { success: true, data: task.result, ai_generated: task.result.source === 'ai' };
+}
+
+// Stream a generation over server-sent events: onDelta receives text to append to a
+// section as the AI writes it; the resolved value is the final result, which replaces it
+export async function streamJD(
+  data: GenerateJDRequest,
+  onDelta: (section: keyof Omit<GeneratedJD, 'source'>, text: string) => void
+): Promise<GenerateJDResponse> {
+  let result: GeneratedJD | null = null;
+  await apiClient.stream('/jobs/generate_jd_stream/', data, (event, payload) => {
+    if (event === 'delta') {
+      onDelta(payload.section, payload.text);
+    } else if (event === 'done') {
+      result = payload;
+    }
+  });
+  if (!result) {
+    throw new Error('Job description stream ended early');
+  }
+  const generated: GeneratedJD = result;
+  return { success: true, data: generated, ai_generated: generated.source === 'ai' };
+}
+
+// Queue generation for many draft jobs, existing ones by id or new drafts from specs;
+// poll getGenerationTask for the per-job outcomes
+export async function generateBatch(
+  input: { job_ids: number[] } | { jobs: GenerateJDRequest[] }
+): Promise<BatchGenerationTask> {
+  return apiClient.post<BatchGenerationTask>('/jobs/generate_batch/', input);
+}